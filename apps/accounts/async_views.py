@@ -0,0 +1,152 @@
+"""
+Async variants of the signup, login and Google sign-in endpoints for ASGI.
+
+The views run on the event loop and hand blocking work to bounded pools
+from ``apps.core.concurrency``: password hashing goes to the ``hashing``
+pool (sized to the CPU count, since PBKDF2 releases the GIL) and database,
+Redis and outbound provider calls go to the ``io`` pool. A slow login no
+longer pins a worker, and at most ``ASYNC_EXECUTORS["hashing"]`` hashes run
+at once however many requests are in flight.
+
+Responses match the sync views, which share their response builders.
+"""
+
+import abc
+
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.serializers import as_serializer_error
+from rest_framework.settings import api_settings
+
+from apps.core.concurrency import run_in_executor
+from apps.core.queries import query_budget
+from apps.core.throttling import TokenBucketThrottle
+from .serializers import GoogleSignInSerializer, LoginSerializer, SignupSerializer
+from .views import (
+    google_error_response,
+    login_error_response,
+    register,
+    signed_in_response,
+)
+
+
+class AsyncAuthView(View, metaclass=abc.ABCMeta):
+    """
+    Parse, throttle and render like the DRF views, without a sync thread hop.
+
+    Subclasses implement ``handle``.
+    """
+
+    http_method_names = ["post", "options"]
+    throttle_scope = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Authenticated by credentials in the body, like DRF's csrf-exempt APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def post(self, request, *args, **kwargs):
+        drf_request = Request(
+            request,
+            parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+        )
+        try:
+            drf_request.data
+        except exceptions.ParseError as e:
+            return self.render(drf_request, Response({"detail": e.detail}, status=400))
+
+        throttle = TokenBucketThrottle()
+        if not await run_in_executor("io", throttle.allow_request, drf_request, self):
+            throttled = exceptions.Throttled(throttle.wait())
+            response = Response(
+                {"detail": throttled.detail},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={"Retry-After": "%d" % throttled.wait},
+            )
+        else:
+            response = await self.handle(drf_request)
+        return self.render(drf_request, response)
+
+    @abc.abstractmethod
+    async def handle(self, request):
+        """The DRF ``Response`` for a parsed request that passed the throttle."""
+
+    def render(self, request, response):
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        content = renderer.render(
+            response.data, renderer.media_type, {"response": response}
+        )
+        rendered = HttpResponse(
+            content, status=response.status_code, content_type=renderer.media_type
+        )
+        for header, value in response.items():
+            if header != "Content-Type":
+                rendered[header] = value
+        rendered.cookies = response.cookies
+
+        quota = getattr(request, "throttle_quota", None)
+        if quota is not None:
+            rendered["X-RateLimit-Limit"] = str(quota[0])
+            rendered["X-RateLimit-Remaining"] = str(quota[1])
+        return rendered
+
+
+@query_budget(5)
+class AsyncSignupView(AsyncAuthView):
+    throttle_scope = "signup"
+
+    async def handle(self, request):
+        serializer = SignupSerializer(data=request.data)
+        try:
+            # Field validation includes the unique email lookup
+            await run_in_executor("io", serializer.is_valid, raise_exception=True)
+        except exceptions.ValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        # Hashing dominates; the insert shares its transaction with the outbox row
+        return await run_in_executor("hashing", register, serializer)
+
+
+@query_budget(2)
+class AsyncLoginView(AsyncAuthView):
+    throttle_scope = "login"
+
+    async def handle(self, request):
+        serializer = LoginSerializer(data=request.data, context={"request": request})
+        try:
+            attrs = serializer.to_internal_value(request.data)
+            failure_key = await run_in_executor("io", serializer.check_attempts, attrs)
+            user = await run_in_executor("hashing", serializer.authenticate_user, attrs)
+            user = await run_in_executor(
+                "io", serializer.record_attempt, failure_key, user
+            )
+        except exceptions.ValidationError as e:
+            return login_error_response(as_serializer_error(e))
+
+        return await run_in_executor(
+            "io", signed_in_response, user, "Login successful."
+        )
+
+
+@query_budget(3)
+class AsyncGoogleSignInView(AsyncAuthView):
+    throttle_scope = "google_signin"
+
+    async def handle(self, request):
+        serializer = GoogleSignInSerializer(data=request.data)
+        if not await run_in_executor("io", serializer.is_valid):
+            return google_error_response(serializer.errors)
+
+        user = serializer.validated_data["user"]
+        return await run_in_executor(
+            "io",
+            signed_in_response,
+            user,
+            "Google Sign-In successful.",
+            is_google_user=user.is_google_user,
+        )
@@ -0,0 +1,103 @@
+import logging
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+logger = logging.getLogger(__name__)
+
+# Account fields kept in the shared cache: what authentication, permissions
+# and the profile views read. Everything else (the password hash included)
+# is loaded from the database if a view asks for it.
+CACHED_FIELDS = (
+    "id",
+    "email",
+    "phone",
+    "full_name",
+    "birthday",
+    "is_active",
+    "is_admin",
+    "is_google_user",
+)
+# simplejwt's revoke claim, derived from the password hash
+_PASSWORD_MD5 = "password_md5"
+
+
+def user_cache_key(user_id):
+    return f"auth_user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    invalidate_cached_users([user_id])
+
+
+def invalidate_cached_users(user_ids):
+    try:
+        cache.delete_many([user_cache_key(user_id) for user_id in user_ids])
+    except redis.RedisError:
+        # Entries expire after AUTH_USER_CACHE_TIMEOUT regardless
+        logger.warning("Could not invalidate cached users", exc_info=True)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that loads the user from a short-lived cache entry.
+
+    Only ``CACHED_FIELDS`` are cached, never the password hash. Entries are
+    dropped whenever the account is saved, deleted or updated through the
+    ``Account`` manager, so the TTL only bounds staleness for writes that
+    bypass the ORM. If the cache is unavailable users come from the database.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        key = user_cache_key(user_id)
+        try:
+            cached = cache.get(key)
+        except redis.RedisError:
+            logger.warning("Auth user cache read failed", exc_info=True)
+            cached = None
+
+        if cached is None:
+            try:
+                user = self.user_model.objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            password_md5 = get_md5_hash_password(user.password)
+            self._cache(key, user, password_md5)
+        else:
+            password_md5 = cached.pop(_PASSWORD_MD5)
+            user = self.user_model.from_db(
+                router.db_for_read(self.user_model), list(cached), list(cached.values())
+            )
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_md5:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+    def _cache(self, key, user, password_md5):
+        fields = {name: getattr(user, name) for name in CACHED_FIELDS}
+        fields[_PASSWORD_MD5] = password_md5
+        try:
+            cache.set(key, fields, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        except redis.RedisError:
+            logger.warning("Auth user cache write failed", exc_info=True)
@@ -0,0 +1,213 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+from apps.core.redis import get_pubsub_client, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "token_blacklist:"
+CHANNEL = "token_blacklist"
+# How long a new process waits for its subscription before loading the
+# blacklist, and how often the subscriber wakes up to ping the server
+SUBSCRIBE_TIMEOUT = 2.0
+POLL_INTERVAL = 1.0
+
+
+class RevocationError(Exception):
+    """A revocation reached this process but not the shared store."""
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for ``capacity`` items at ``error_rate``."""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class TokenBlacklist:
+    """
+    Revoked refresh tokens keyed by ``jti``.
+
+    Revocations live in Redis with a TTL equal to the token's remaining
+    lifetime. Every process keeps a Bloom filter of revoked ids, kept in sync
+    through Redis pub/sub, so checking a token that was never revoked costs
+    no network call. The filter is only trusted while the subscription is
+    up; otherwise every check asks Redis. Without Redis the blacklist is kept
+    in-process.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._pid = None
+        self._bloom = None
+        self._complete = False
+        self._subscribed = threading.Event()
+        self._built_at = 0.0
+        self._rebuilding = False
+        self._recent = set()
+        self._local = {}
+
+    def _ensure_started(self, client):
+        """Build the Bloom filter and start the subscriber once per process."""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._bloom = self._new_bloom()
+                    self._complete = False
+                    if client is not None:
+                        # Subscribe before scanning, so nothing revoked in
+                        # between is missed
+                        self._subscribed.clear()
+                        threading.Thread(target=self._listen, daemon=True).start()
+                        self._subscribed.wait(SUBSCRIBE_TIMEOUT)
+                    self._rebuild(client)
+                    self._pid = os.getpid()
+            return
+
+        interval = settings.TOKEN_BLACKLIST["BLOOM_REBUILD_INTERVAL"]
+        if not self._complete:
+            interval = min(interval, 5)
+        if time.monotonic() - self._built_at >= interval and not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild, args=(client,), daemon=True).start()
+
+    def _new_bloom(self):
+        options = settings.TOKEN_BLACKLIST
+        return BloomFilter(options["BLOOM_CAPACITY"], options["BLOOM_ERROR_RATE"])
+
+    def _rebuild(self, client):
+        """Replace the Bloom filter with one holding only unexpired revocations."""
+        self._recent = set()
+        bloom = self._new_bloom()
+        try:
+            if client is None:
+                now = time.time()
+                with self._lock:
+                    self._local = {
+                        jti: exp for jti, exp in self._local.items() if exp > now
+                    }
+                    revoked = list(self._local)
+            else:
+                revoked = (
+                    key.decode().removeprefix(KEY_PREFIX)
+                    for key in client.scan_iter(match=f"{KEY_PREFIX}*", count=1000)
+                )
+            for jti in revoked:
+                bloom.add(jti)
+        except redis.RedisError:
+            logger.warning("Could not load token blacklist from Redis", exc_info=True)
+            self._complete = False
+        else:
+            # Revocations published while scanning
+            for jti in self._recent:
+                bloom.add(jti)
+            self._bloom = bloom
+            # Without a live subscription later revocations would be missed
+            self._complete = client is None or self._subscribed.is_set()
+        finally:
+            self._built_at = time.monotonic()
+            self._rebuilding = False
+
+    def _listen(self):
+        while True:
+            pubsub = None
+            try:
+                pubsub = get_pubsub_client().pubsub()
+                pubsub.subscribe(CHANNEL)
+                while True:
+                    message = pubsub.get_message(timeout=POLL_INTERVAL)
+                    if message is None:
+                        continue
+                    if message["type"] == "subscribe":
+                        self._subscribed.set()
+                    elif message["type"] == "message":
+                        jti = message["data"].decode()
+                        self._recent.add(jti)
+                        self._bloom.add(jti)
+            except redis.RedisError:
+                logger.warning("Token blacklist subscriber disconnected", exc_info=True)
+                # Anything published while disconnected is only visible in Redis
+                self._subscribed.clear()
+                self._complete = False
+                time.sleep(1)
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+
+    def revoke(self, jti, exp):
+        """
+        Revoke ``jti`` until its expiry timestamp ``exp``.
+
+        Returns ``False`` if it was already revoked, which lets rotation treat
+        a concurrent reuse of the same refresh token as a replay. Raises
+        ``RevocationError`` if Redis could not be written: the token is then
+        only revoked in this process, and other hosts still accept it.
+        """
+        ttl = int(exp - time.time())
+        if ttl <= 0:
+            return True
+
+        client = get_redis_client()
+        self._ensure_started(client)
+        self._recent.add(jti)
+        self._bloom.add(jti)
+
+        if client is None:
+            with self._lock:
+                if jti in self._local:
+                    return False
+                self._local[jti] = exp
+            return True
+
+        try:
+            created = client.set(f"{KEY_PREFIX}{jti}", 1, ex=ttl, nx=True)
+            client.publish(CHANNEL, jti)
+        except redis.RedisError as e:
+            logger.error("Could not revoke refresh token %s", jti, exc_info=True)
+            raise RevocationError(jti) from e
+        return bool(created)
+
+    def is_revoked(self, jti):
+        client = get_redis_client()
+        self._ensure_started(client)
+
+        if self._complete and jti not in self._bloom:
+            return False
+
+        if client is None:
+            return self._local.get(jti, 0) > time.time()
+
+        try:
+            return bool(client.exists(f"{KEY_PREFIX}{jti}"))
+        except redis.RedisError:
+            logger.warning("Token blacklist lookup failed for %s", jti, exc_info=True)
+            # Possibly revoked and unverifiable: refuse rather than risk a replay
+            return True
+
+
+token_blacklist = TokenBlacklist()
@@ -0,0 +1,123 @@
+import logging
+import re
+import threading
+import time
+
+import requests
+from django.conf import settings
+from google.auth import exceptions, transport
+
+from apps.core.http import get_client
+
+logger = logging.getLogger(__name__)
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+def _max_age(headers):
+    """Seconds a response may be cached for, from ``Cache-Control`` and ``Age``."""
+    cache_control = headers.get("Cache-Control", "")
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+
+    match = MAX_AGE_RE.search(cache_control)
+    if not match:
+        return settings.GOOGLE_CERTS_DEFAULT_MAX_AGE
+    try:
+        age = int(headers.get("Age", 0))
+    except ValueError:
+        age = 0
+    return max(0, int(match.group(1)) - age)
+
+
+class _CachedResponse(transport.Response):
+    def __init__(self, status, headers, data):
+        self._status = status
+        self._headers = headers
+        self._data = data
+
+    @property
+    def status(self):
+        return self._status
+
+    @property
+    def headers(self):
+        return self._headers
+
+    @property
+    def data(self):
+        return self._data
+
+
+class CachedCertsRequest(transport.Request):
+    """
+    google-auth transport that caches GET responses such as Google's certs.
+
+    Entries live for the ``max-age`` Google sends (about six hours) and are
+    refreshed in a background thread ``GOOGLE_CERTS_REFRESH_MARGIN`` seconds
+    before they expire, so sign-ins never wait on the certificate endpoint
+    once the cache is warm. Calls go through the pooled, circuit-broken
+    ``google`` outbound client.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._refreshing = set()
+
+    def __call__(self, url, method="GET", body=None, headers=None, **kwargs):
+        if method != "GET" or body is not None:
+            return self._send(url, method, body, headers)
+
+        entry = self._entries.get(url)
+        now = time.monotonic()
+        if entry is not None:
+            refresh_at, expires_at, response = entry
+            if now < expires_at:
+                if now >= refresh_at:
+                    self._refresh_in_background(url, headers)
+                return response
+
+        return self._fetch(url, headers)
+
+    def _send(self, url, method, body=None, headers=None):
+        try:
+            response = get_client("google").request(
+                method, url, data=body, headers=headers
+            )
+        except requests.RequestException as e:
+            raise exceptions.TransportError(e) from e
+        return _CachedResponse(response.status_code, response.headers, response.content)
+
+    def _fetch(self, url, headers=None):
+        response = self._send(url, "GET", headers=headers)
+        if response.status == 200:
+            max_age = _max_age(response.headers)
+            if max_age:
+                expires_at = time.monotonic() + max_age
+                margin = min(settings.GOOGLE_CERTS_REFRESH_MARGIN, max_age / 2)
+                self._entries[url] = (expires_at - margin, expires_at, response)
+        return response
+
+    def _refresh_in_background(self, url, headers):
+        with self._lock:
+            if url in self._refreshing:
+                return
+            self._refreshing.add(url)
+
+        def refresh():
+            try:
+                self._fetch(url, headers)
+            except exceptions.TransportError:
+                # The current entry is still valid; the next request retries
+                logger.warning("Could not refresh %s", url, exc_info=True)
+            finally:
+                self._refreshing.discard(url)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def clear(self):
+        self._entries = {}
+
+
+google_request = CachedCertsRequest()
@@ -0,0 +1,136 @@
+import logging
+from datetime import datetime
+
+import redis
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.redis import get_redis_client
+from .models import Account
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "last_login:pending"
+
+
+def record_login(user, when=None):
+    """
+    Set ``user.last_login`` and buffer the write in Redis.
+
+    Repeated logins by the same account collapse into one hash field, and
+    ``flush_last_logins`` writes them all at once every
+    ``LAST_LOGIN_FLUSH_INTERVAL`` seconds. Without Redis the row is updated
+    immediately.
+    """
+    when = when or timezone.now()
+    user.last_login = when
+
+    client = get_redis_client()
+    if client is not None:
+        try:
+            pipe = client.pipeline()
+            pipe.hset(PENDING_KEY, user.pk, when.isoformat())
+            pipe.expire(PENDING_KEY, settings.LAST_LOGIN_BUFFER_TTL)
+            pipe.execute()
+            return
+        except redis.RedisError:
+            logger.warning("Could not buffer last_login for %s", user.pk, exc_info=True)
+
+    Account.objects.filter(pk=user.pk).update(last_login=when)
+
+
+def _update_rows(rows):
+    """Apply ``[(account_id, last_login), ...]`` without moving any value back."""
+    if connection.vendor != "postgresql":
+        with transaction.atomic():
+            for account_id, when in rows:
+                Account.objects.filter(
+                    Q(last_login__isnull=True) | Q(last_login__lt=when), pk=account_id
+                ).update(last_login=when)
+        return
+
+    table = connection.ops.quote_name(Account._meta.db_table)
+    pk = connection.ops.quote_name(Account._meta.pk.column)
+    column = connection.ops.quote_name(Account._meta.get_field("last_login").column)
+    values = ", ".join(["(%s, %s::timestamptz)"] * len(rows))
+    sql = (
+        f"UPDATE {table} AS a SET {column} = v.last_login "
+        f"FROM (VALUES {values}) AS v(id, last_login) "
+        f"WHERE a.{pk} = v.id AND (a.{column} IS NULL OR a.{column} < v.last_login)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+
+
+def flush_login(user):
+    """
+    Write ``user``'s buffered login now, and set it on ``user``.
+
+    Called before hashing ``last_login`` into a token, so checking the token
+    only needs the row. If Redis can't be read the login stays buffered.
+    """
+    client = get_redis_client()
+    if client is None:
+        return
+
+    try:
+        pipe = client.pipeline()
+        pipe.hget(PENDING_KEY, user.pk)
+        pipe.hdel(PENDING_KEY, user.pk)
+        pending, _ = pipe.execute()
+    except redis.RedisError:
+        logger.error(
+            "Could not flush buffered last_login for %s", user.pk, exc_info=True
+        )
+        return
+    if pending is None:
+        return
+
+    when = datetime.fromisoformat(pending.decode())
+    try:
+        _update_rows([(user.pk, when)])
+    except DatabaseError:
+        client.hsetnx(PENDING_KEY, user.pk, pending)
+        raise
+    if user.last_login is None or when > user.last_login:
+        user.last_login = when
+
+
+def flush_last_logins(batch_size=None):
+    """
+    Write buffered logins with one batched UPDATE per ``batch_size`` accounts.
+
+    The buffer is taken atomically, so logins recorded meanwhile wait for the
+    next flush. If the database write fails the entries go back into the
+    buffer, without overwriting newer logins. Returns the accounts updated.
+    """
+    client = get_redis_client()
+    if client is None:
+        return 0
+
+    batch_size = batch_size or settings.LAST_LOGIN_FLUSH_BATCH_SIZE
+    pipe = client.pipeline()
+    pipe.hgetall(PENDING_KEY)
+    pipe.delete(PENDING_KEY)
+    pending, _ = pipe.execute()
+    if not pending:
+        return 0
+
+    rows = [
+        (int(account_id), datetime.fromisoformat(when.decode()))
+        for account_id, when in pending.items()
+    ]
+    try:
+        for start in range(0, len(rows), batch_size):
+            stop = start + batch_size
+            _update_rows(rows[start:stop])
+    except DatabaseError:
+        restore = client.pipeline()
+        for account_id, when in pending.items():
+            restore.hsetnx(PENDING_KEY, account_id, when)
+        restore.execute()
+        raise
+
+    return len(rows)
@@ -1,7 +1,22 @@
 from django.contrib.auth.models import BaseUserManager
+from django.db import models
 
 
-class AccountManager(BaseUserManager):
+class AccountQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """Bulk update that also drops affected users from the auth cache."""
+        from .authentication import CACHED_FIELDS, invalidate_cached_users
+
+        if not kwargs.keys() & {*CACHED_FIELDS, "password"}:
+            # e.g. the buffered last_login flush
+            return super().update(**kwargs)
+        user_ids = list(self.values_list("pk", flat=True))
+        updated = super().update(**kwargs)
+        invalidate_cached_users(user_ids)
+        return updated
+
+
+class AccountManager(BaseUserManager.from_queryset(AccountQuerySet)):
     def _create_user(self, email, phone, full_name, birthday, password, **extra_fields):
         """
         Create and save a user with the given email, phone, full_name, birthday and password.
@@ -1,16 +1,18 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
-from django.core.cache import cache
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_decode
 from .models import Account
+from apps.core.http import get_client
+from apps.core.ratelimit import SlidingWindowCounter
+from .blacklist import token_blacklist
+from .google import google_request
 from .tokens import password_reset_token
-import requests
 from django.conf import settings
 from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 
 
 class SignupSerializer(serializers.ModelSerializer):
@@ -34,21 +36,37 @@ class SignupSerializer(serializers.ModelSerializer):
         return account
 
 
+# Failed logins per email and IP over the last 30 minutes. If Redis fails,
+# failures are counted per process, so the captcha guard stays on
+login_failures = SlidingWindowCounter("failed_attempts", window=1800)
+
+recaptcha_client = get_client("recaptcha")
+
+
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
     captcha = serializers.CharField(required=False, allow_blank=True)
 
     def validate(self, attrs):
+        failure_key = self.check_attempts(attrs)
+        user = self.authenticate_user(attrs)
+        attrs["user"] = self.record_attempt(failure_key, user)
+        return attrs
+
+    # The steps below are also called one by one from the async login view so
+    # that only password hashing runs in the bounded hashing pool.
+
+    def check_attempts(self, attrs):
+        """Require a valid captcha after repeated failures; return the failure key."""
         email = attrs.get("email")
-        password = attrs.get("password")
         captcha = attrs.get("captcha", "")
 
         request = self.context.get("request")
         ip_address = request.META.get("REMOTE_ADDR", "unknown")
 
-        cache_key = f"failed_attempts:{email}:{ip_address}"
-        failed_attempts = cache.get(cache_key, 0)
+        failure_key = f"{email}:{ip_address}"
+        failed_attempts = login_failures.count(failure_key)
 
         if failed_attempts >= 3:
             if not captcha:
@@ -63,11 +81,18 @@ class LoginSerializer(serializers.Serializer):
                     {"message": "Invalid captcha. Please try again."}
                 )
 
-        user = authenticate(request=request, username=email, password=password)
+        return failure_key
 
+    def authenticate_user(self, attrs):
+        request = self.context.get("request")
+        return authenticate(
+            request=request, username=attrs.get("email"), password=attrs.get("password")
+        )
+
+    def record_attempt(self, failure_key, user):
+        """Count a failed attempt or clear the counter; return the active user."""
         if not user:
-            new_failed_attempts = failed_attempts + 1
-            cache.set(cache_key, new_failed_attempts, timeout=1800)  # 30 minutes
+            new_failed_attempts = login_failures.increment(failure_key)
 
             if new_failed_attempts >= 3:
                 raise serializers.ValidationError(
@@ -81,10 +106,9 @@ class LoginSerializer(serializers.Serializer):
         if not user.is_active:
             raise serializers.ValidationError({"message": "Invalid credentials."})
 
-        cache.delete(cache_key)
+        login_failures.reset(failure_key)
 
-        attrs["user"] = user
-        return attrs
+        return user
 
     def verify_captcha(self, captcha_token):
         """
@@ -102,7 +126,7 @@ class LoginSerializer(serializers.Serializer):
         }
 
         try:
-            response = requests.post(verification_url, data=data, timeout=5)
+            response = recaptcha_client.post(verification_url, data=data)
             result = response.json()
             return result.get("success", False)
         except Exception:
@@ -122,9 +146,30 @@ class RefreshTokenSerializer(serializers.Serializer):
             if not user:
                 raise serializers.ValidationError({"message": "Invalid token."})
 
-            attrs["refresh"] = refresh
+            jti = refresh.payload[jwt_settings.JTI_CLAIM]
+            if token_blacklist.is_revoked(jti):
+                raise serializers.ValidationError(
+                    {"message": "Token has been revoked."}
+                )
+
             attrs["access"] = refresh.access_token
 
+            if jwt_settings.ROTATE_REFRESH_TOKENS:
+                if (
+                    jwt_settings.BLACKLIST_AFTER_ROTATION
+                    and not token_blacklist.revoke(jti, refresh.payload["exp"])
+                ):
+                    # A concurrent refresh already rotated this token
+                    raise serializers.ValidationError(
+                        {"message": "Token has been revoked."}
+                    )
+
+                refresh.set_jti()
+                refresh.set_exp()
+                refresh.set_iat()
+
+            attrs["refresh"] = refresh
+
         except TokenError:
             raise serializers.ValidationError({"message": "Invalid or expired token."})
 
@@ -145,7 +190,7 @@ class GoogleSignInSerializer(serializers.Serializer):
                 )
 
             idinfo = id_token.verify_oauth2_token(
-                credential, google_requests.Request(), google_client_id
+                credential, google_request, google_client_id
             )
 
             if idinfo["iss"] not in [
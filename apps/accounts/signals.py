@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .authentication import invalidate_cached_user
+from .models import Account
+
+
+@receiver(post_save, sender=Account)
+def invalidate_cached_user_on_save(sender, instance, **kwargs):
+    """Drop the cached auth user after profile, status or password changes."""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_delete, sender=Account)
+def invalidate_cached_user_on_delete(sender, instance, **kwargs):
+    """Drop the cached auth user when the account is removed."""
+    invalidate_cached_user(instance.pk)
@@ -1,81 +1,54 @@
 from celery import shared_task
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.conf import settings
+from apps.core.mail import MailTask, render_message
+from .last_login import flush_last_logins as flush_buffered_last_logins
 from .models import Account
 
 
-@shared_task
-def send_activation_email(user_id, activation_link):
+@shared_task(bind=True, base=MailTask)
+def send_activation_email(self, user_id, activation_link):
     try:
-        user = Account.objects.get(pk=user_id)
+        user = Account.objects.only("email", "full_name").get(pk=user_id)
+    except Account.DoesNotExist:
+        return f"User with id {user_id} not found"
 
-        subject = "Activate Your Bookstore Account"
-        html_content = render_to_string(
-            "accounts/emails/activation_email.html",
-            {
-                "user": user,
-                "activation_link": activation_link,
-            },
-        )
-        text_content = render_to_string(
-            "accounts/emails/activation_email.txt",
-            {
-                "user": user,
-                "activation_link": activation_link,
-            },
-        )
+    message = render_message(
+        "accounts/emails/activation_email",
+        {
+            "user": user,
+            "activation_link": activation_link,
+        },
+        subject="Activate Your Bookstore Account",
+        to=[user.email],
+    )
+    if not self.send(message):
+        return f"Activation email already sent to {user.email}"
 
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email],
-        )
-        email.attach_alternative(html_content, "text/html")
-        email.send()
+    return f"Activation email sent successfully to {user.email}"
 
-        return f"Activation email sent successfully to {user.email}"
 
+@shared_task(bind=True, base=MailTask)
+def send_password_reset_email(self, user_id, reset_link):
+    try:
+        user = Account.objects.only("email", "full_name").get(pk=user_id)
     except Account.DoesNotExist:
         return f"User with id {user_id} not found"
-    except Exception as e:
-        return f"Failed to send activation email: {str(e)}"
 
+    message = render_message(
+        "accounts/emails/password_reset_email",
+        {
+            "user": user,
+            "reset_link": reset_link,
+        },
+        subject="Reset Your Bookstore Password",
+        to=[user.email],
+    )
+    if not self.send(message):
+        return f"Password reset email already sent to {user.email}"
 
-@shared_task
-def send_password_reset_email(user_id, reset_link):
-    try:
-        user = Account.objects.get(pk=user_id)
+    return f"Password reset email sent successfully to {user.email}"
 
-        subject = "Reset Your Bookstore Password"
-        html_content = render_to_string(
-            "accounts/emails/password_reset_email.html",
-            {
-                "user": user,
-                "reset_link": reset_link,
-            },
-        )
-        text_content = render_to_string(
-            "accounts/emails/password_reset_email.txt",
-            {
-                "user": user,
-                "reset_link": reset_link,
-            },
-        )
 
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[user.email],
-        )
-        email.attach_alternative(html_content, "text/html")
-        email.send()
-
-        return f"Password reset email sent successfully to {user.email}"
-
-    except Account.DoesNotExist:
-        return f"User with id {user_id} not found"
-    except Exception as e:
-        return f"Failed to send password reset email: {str(e)}"
+@shared_task
+def flush_last_logins():
+    updated = flush_buffered_last_logins()
+    return f"Flushed last_login for {updated} accounts"
@@ -1,11 +1,29 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APIClient
 from apps.accounts.tests.factories import AccountFactory
+from apps.core.throttling import token_buckets
 
 Account = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Keep cached auth users and login counters from leaking between tests."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_throttles():
+    """Start every test with full in-process token buckets."""
+    token_buckets.local.reset()
+    yield
+    token_buckets.local.reset()
+
+
 @pytest.fixture
 def account_model(db):
     """Provide access to the Account model class."""
@@ -0,0 +1,128 @@
+import json
+
+import pytest
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.test import AsyncRequestFactory, override_settings
+
+from apps.accounts.async_views import (
+    AsyncAuthView,
+    AsyncGoogleSignInView,
+    AsyncLoginView,
+    AsyncSignupView,
+)
+from apps.core.models import OutboxMessage
+
+# Blocking work runs in pool threads with their own connections, so the data
+# they read must be committed
+pytestmark = [pytest.mark.unit, pytest.mark.django_db(transaction=True)]
+
+factory = AsyncRequestFactory()
+
+
+def post(path, data):
+    return factory.post(path, json.dumps(data), content_type="application/json")
+
+
+@pytest.fixture
+def active_account(account_factory):
+    return account_factory(
+        email="async@example.com", password="StrongPass123", active=True
+    )
+
+
+async def test_async_login_success(active_account):
+    request = post(
+        "/api/accounts/login/",
+        {"email": "async@example.com", "password": "StrongPass123"},
+    )
+
+    response = await AsyncLoginView.as_view()(request)
+
+    body = json.loads(response.content)
+    assert response.status_code == 200
+    assert body["message"] == "Login successful."
+    assert body["data"]["account"]["fullName"] == active_account.full_name
+    assert "refresh_token" in response.cookies
+    assert response["X-RateLimit-Remaining"]
+
+    await sync_to_async(active_account.refresh_from_db)()
+    assert active_account.last_login is not None
+
+
+async def test_async_login_invalid_credentials(active_account):
+    request = post(
+        "/api/accounts/login/",
+        {"email": "async@example.com", "password": "wrong"},
+    )
+
+    response = await AsyncLoginView.as_view()(request)
+
+    assert response.status_code == 400
+    assert json.loads(response.content) == {
+        "message": "Invalid credentials.",
+        "status": 400,
+    }
+
+
+async def test_async_login_is_throttled(active_account):
+    throttles = {"login": {"email": "1/hour"}}
+    payload = {"email": "async@example.com", "password": "wrong"}
+
+    with override_settings(TOKEN_BUCKET_THROTTLES=throttles):
+        await AsyncLoginView.as_view()(post("/api/accounts/login/", payload))
+        response = await AsyncLoginView.as_view()(post("/api/accounts/login/", payload))
+
+    assert response.status_code == 429
+    assert response["Retry-After"]
+    assert response["X-RateLimit-Remaining"] == "0"
+
+
+async def test_async_signup_creates_account(valid_account):
+    request = post("/api/accounts/signup/", valid_account)
+
+    response = await AsyncSignupView.as_view()(request)
+
+    assert response.status_code == 201
+    assert json.loads(response.content)["status"] == 201
+    assert await OutboxMessage.objects.acount() == 1
+
+
+async def test_async_signup_reports_field_errors(active_account, valid_account):
+    request = post(
+        "/api/accounts/signup/", {**valid_account, "email": "async@example.com"}
+    )
+
+    response = await AsyncSignupView.as_view()(request)
+
+    assert response.status_code == 400
+    assert "email" in json.loads(response.content)
+
+
+@patch("apps.accounts.serializers.id_token.verify_oauth2_token")
+async def test_async_google_signin(mock_verify):
+    mock_verify.return_value = {
+        "iss": "https://accounts.google.com",
+        "aud": "test-client-id",
+        "sub": "123456789",
+        "email": "google@gmail.com",
+        "email_verified": True,
+        "name": "Google User",
+    }
+    request = post("/api/accounts/google/", {"credential": "valid-google-token"})
+
+    with patch.object(settings, "GOOGLE_CLIENT_ID", "test-client-id"):
+        response = await AsyncGoogleSignInView.as_view()(request)
+
+    body = json.loads(response.content)
+    assert response.status_code == 200
+    assert body["data"]["account"]["isGoogleUser"] is True
+
+
+def test_views_must_implement_handle():
+    class Incomplete(AsyncAuthView):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
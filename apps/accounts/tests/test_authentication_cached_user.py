@@ -0,0 +1,107 @@
+import pytest
+import redis
+from unittest.mock import patch
+from django.core.cache import cache
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.accounts.authentication import CachedJWTAuthentication, user_cache_key
+from apps.accounts.models import Account
+
+
+def _validated_token(account):
+    auth = CachedJWTAuthentication()
+    return auth, auth.get_validated_token(str(AccessToken.for_user(account)))
+
+
+@pytest.mark.unit
+def test_get_user_is_served_from_cache(active_account, django_assert_num_queries):
+    """Only the first lookup hits the database."""
+    auth, token = _validated_token(active_account)
+
+    with django_assert_num_queries(1):
+        assert auth.get_user(token).pk == active_account.pk
+
+    with django_assert_num_queries(0):
+        assert auth.get_user(token).pk == active_account.pk
+
+
+@pytest.mark.unit
+def test_account_save_invalidates_cache(active_account):
+    """Profile updates are visible on the next request."""
+    auth, token = _validated_token(active_account)
+    auth.get_user(token)
+
+    active_account.full_name = "Renamed User"
+    active_account.save()
+
+    assert auth.get_user(token).full_name == "Renamed User"
+
+
+@pytest.mark.unit
+def test_password_change_invalidates_cache(active_account):
+    """A new password hash replaces the cached one."""
+    auth, token = _validated_token(active_account)
+    auth.get_user(token)
+
+    active_account.set_password("NewPassword456!")
+    active_account.save()
+
+    assert auth.get_user(token).check_password("NewPassword456!")
+
+
+@pytest.mark.unit
+def test_deactivated_user_is_rejected(active_account):
+    """The is_active check still applies to cached users."""
+    auth, token = _validated_token(active_account)
+    auth.get_user(token)
+
+    active_account.is_active = False
+    active_account.save()
+
+    with pytest.raises(AuthenticationFailed):
+        auth.get_user(token)
+
+
+@pytest.mark.unit
+def test_deleted_user_is_rejected(active_account):
+    """Deleting the account drops it from the cache."""
+    auth, token = _validated_token(active_account)
+    auth.get_user(token)
+
+    active_account.delete()
+
+    with pytest.raises(AuthenticationFailed):
+        auth.get_user(token)
+
+
+@pytest.mark.unit
+def test_cache_holds_no_password_hash(active_account):
+    auth, token = _validated_token(active_account)
+    auth.get_user(token)
+
+    cached = cache.get(user_cache_key(active_account.pk))
+
+    assert "password" not in cached
+    assert active_account.password not in cached.values()
+
+
+@pytest.mark.unit
+def test_cache_outage_falls_back_to_the_database(active_account):
+    auth, token = _validated_token(active_account)
+
+    with (
+        patch.object(cache, "get", side_effect=redis.ConnectionError()),
+        patch.object(cache, "set", side_effect=redis.ConnectionError()),
+    ):
+        assert auth.get_user(token).pk == active_account.pk
+
+
+@pytest.mark.unit
+def test_queryset_update_invalidates_cache(active_account):
+    auth, token = _validated_token(active_account)
+    auth.get_user(token)
+
+    Account.objects.filter(pk=active_account.pk).update(is_active=False)
+
+    with pytest.raises(AuthenticationFailed):
+        auth.get_user(token)
@@ -0,0 +1,253 @@
+import queue
+from contextlib import contextmanager
+import time
+import uuid
+import pytest
+from unittest.mock import patch
+from redis.exceptions import ConnectionError
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.accounts.blacklist import (
+    KEY_PREFIX,
+    BloomFilter,
+    RevocationError,
+    TokenBlacklist,
+    token_blacklist,
+)
+
+
+class FakePubSub:
+    def __init__(self, confirm=True):
+        self.messages = queue.Queue()
+        self.confirm = confirm
+
+    def subscribe(self, channel):
+        if self.confirm:
+            self.messages.put({"type": "subscribe", "data": 1})
+
+    def get_message(self, timeout):
+        try:
+            message = self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+    def close(self):
+        pass
+
+
+class FakeRedis:
+    """Just enough of the redis client for the blacklist."""
+
+    def __init__(self, keys=(), confirm=True):
+        self.keys = {key: 1 for key in keys}
+        self.calls = []
+        self.pubsub_instance = FakePubSub(confirm)
+
+    def pubsub(self, **kwargs):
+        return self.pubsub_instance
+
+    def scan_iter(self, match, count):
+        prefix = match.rstrip("*")
+        return [k.encode() for k in list(self.keys) if k.startswith(prefix)]
+
+    def set(self, key, value, ex, nx):
+        self.calls.append("set")
+        if key in self.keys:
+            return None
+        self.keys[key] = value
+        return True
+
+    def publish(self, channel, message):
+        self.pubsub_instance.messages.put({"type": "message", "data": message.encode()})
+
+    def exists(self, key):
+        self.calls.append("exists")
+        return int(key in self.keys)
+
+
+@contextmanager
+def use_redis(client):
+    with (
+        patch("apps.accounts.blacklist.get_redis_client", return_value=client),
+        patch("apps.accounts.blacklist.get_pubsub_client", return_value=client),
+    ):
+        yield
+
+
+@pytest.mark.unit
+def test_bloom_filter_membership():
+    """Added items always match and unrelated items rarely do."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    added = [uuid.uuid4().hex for _ in range(1000)]
+    for item in added:
+        bloom.add(item)
+
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+
+    assert all(item in bloom for item in added)
+    assert false_positives < 300
+
+
+@pytest.mark.unit
+def test_in_process_blacklist_without_redis():
+    """Without Redis revocations are tracked in-process."""
+    blacklist = TokenBlacklist()
+    exp = time.time() + 60
+
+    assert blacklist.is_revoked("jti-1") is False
+    assert blacklist.revoke("jti-1", exp) is True
+    assert blacklist.is_revoked("jti-1") is True
+    assert blacklist.revoke("jti-1", exp) is False
+
+
+@pytest.mark.unit
+def test_unrevoked_token_check_skips_redis():
+    """A Bloom filter miss answers without a network call."""
+    client = FakeRedis()
+    blacklist = TokenBlacklist()
+
+    with use_redis(client):
+        assert blacklist.is_revoked("never-revoked") is False
+
+    assert client.calls == []
+
+
+@pytest.mark.unit
+def test_revocations_are_loaded_from_redis():
+    """Existing Redis keys are loaded into a new process's Bloom filter."""
+    client = FakeRedis(keys=[f"{KEY_PREFIX}revoked-elsewhere"])
+    blacklist = TokenBlacklist()
+
+    with use_redis(client):
+        assert blacklist.is_revoked("revoked-elsewhere") is True
+        assert blacklist.revoke("fresh", time.time() + 60) is True
+        assert blacklist.is_revoked("fresh") is True
+
+    assert client.calls == ["exists", "set", "exists"]
+
+
+@pytest.mark.unit
+def test_idle_subscription_keeps_the_bloom_filter_trusted():
+    """Quiet periods on the channel are not treated as a disconnect."""
+    client = FakeRedis()
+    blacklist = TokenBlacklist()
+
+    with use_redis(client), patch("apps.accounts.blacklist.POLL_INTERVAL", 0.01):
+        blacklist.is_revoked("warm-up")
+        time.sleep(0.1)
+        assert blacklist.is_revoked("never-revoked") is False
+
+    assert client.calls == []
+
+
+@pytest.mark.unit
+def test_without_subscription_every_check_asks_redis():
+    """Until the subscription is confirmed the Bloom filter is not trusted."""
+    client = FakeRedis(confirm=False)
+    blacklist = TokenBlacklist()
+
+    with use_redis(client), patch("apps.accounts.blacklist.SUBSCRIBE_TIMEOUT", 0.05):
+        assert blacklist.is_revoked("never-revoked") is False
+
+    assert client.calls == ["exists"]
+
+
+@pytest.mark.unit
+def test_subscriber_disconnect_distrusts_the_bloom_filter():
+    client = FakeRedis()
+    blacklist = TokenBlacklist()
+
+    with use_redis(client), patch("apps.accounts.blacklist.time.sleep"):
+        blacklist.is_revoked("warm-up")
+        client.pubsub_instance.confirm = False
+        client.pubsub_instance.messages.put(ConnectionError("gone"))
+        deadline = time.monotonic() + 2
+        while blacklist._complete and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert blacklist.is_revoked("never-revoked") is False
+
+    assert client.calls == ["exists"]
+
+
+@pytest.mark.unit
+def test_failed_redis_write_is_reported():
+    """A revocation only this process knows about is not a success."""
+    client = FakeRedis()
+    blacklist = TokenBlacklist()
+
+    with (
+        use_redis(client),
+        patch.object(client, "set", side_effect=ConnectionError("down")),
+    ):
+        with pytest.raises(RevocationError):
+            blacklist.revoke("jti-1", time.time() + 60)
+
+
+@pytest.mark.unit
+def test_refresh_is_refused_when_the_old_token_cannot_be_revoked(
+    api_client, active_account
+):
+    refresh = RefreshToken.for_user(active_account)
+    api_client.cookies["refresh_token"] = str(refresh)
+
+    with patch.object(token_blacklist, "revoke", side_effect=RevocationError):
+        response = api_client.post(reverse("refresh-token"))
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert "refresh_token" not in response.cookies
+
+
+@pytest.mark.unit
+def test_logout_keeps_the_cookie_when_revocation_fails(api_client, active_account):
+    refresh = RefreshToken.for_user(active_account)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+    api_client.cookies["refresh_token"] = str(refresh)
+
+    with patch.object(token_blacklist, "revoke", side_effect=RevocationError):
+        response = api_client.post(reverse("logout"))
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert "refresh_token" not in response.cookies
+
+
+@pytest.mark.unit
+def test_refresh_rotates_and_revokes_old_token(api_client, active_account):
+    """A refresh hands out a new token and the old one stops working."""
+    refresh = RefreshToken.for_user(active_account)
+    api_client.cookies["refresh_token"] = str(refresh)
+    url = reverse("refresh-token")
+
+    response = api_client.post(url)
+    rotated = response.cookies["refresh_token"].value
+
+    assert response.status_code == status.HTTP_200_OK
+    assert rotated != str(refresh)
+
+    api_client.cookies["refresh_token"] = str(refresh)
+    replay = api_client.post(url)
+
+    assert replay.status_code == status.HTTP_401_UNAUTHORIZED
+    assert replay.data["message"] == "Token has been revoked."
+
+    api_client.cookies["refresh_token"] = rotated
+    assert api_client.post(url).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.unit
+def test_logout_revokes_refresh_token(api_client, active_account):
+    """The refresh token from the cookie cannot be used after logout."""
+    refresh = RefreshToken.for_user(active_account)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+    api_client.cookies["refresh_token"] = str(refresh)
+
+    assert api_client.post(reverse("logout")).status_code == status.HTTP_200_OK
+
+    api_client.cookies["refresh_token"] = str(refresh)
+    response = api_client.post(reverse("refresh-token"))
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.data["message"] == "Token has been revoked."
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from django.test import override_settings
+from google.oauth2 import id_token
+
+from apps.accounts.google import CachedCertsRequest, _max_age
+
+CERTS = {"key-1": "-----BEGIN CERTIFICATE-----\nstub\n-----END CERTIFICATE-----\n"}
+
+
+@pytest.fixture
+def cert_server():
+    """Local stand-in for Google's cert endpoint that counts its hits."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            server.hits += 1
+            body = json.dumps(CERTS).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", server.cache_control)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.hits = 0
+    server.cache_control = "public, max-age=3600, must-revalidate"
+    server.url = f"http://127.0.0.1:{server.server_port}/oauth2/v1/certs"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.unit
+def test_max_age_honours_cache_control_and_age():
+    assert _max_age({"Cache-Control": "public, max-age=600"}) == 600
+    assert _max_age({"Cache-Control": "max-age=600", "Age": "100"}) == 500
+    assert _max_age({"Cache-Control": "no-store"}) == 0
+    with override_settings(GOOGLE_CERTS_DEFAULT_MAX_AGE=42):
+        assert _max_age({}) == 42
+
+
+@pytest.mark.unit
+def test_certs_are_fetched_once_while_fresh(cert_server):
+    request = CachedCertsRequest()
+
+    first = id_token._fetch_certs(request, cert_server.url)
+    second = id_token._fetch_certs(request, cert_server.url)
+
+    assert first == second == CERTS
+    assert cert_server.hits == 1
+
+
+@pytest.mark.unit
+def test_no_store_responses_are_not_cached(cert_server):
+    cert_server.cache_control = "no-store"
+    request = CachedCertsRequest()
+
+    id_token._fetch_certs(request, cert_server.url)
+    id_token._fetch_certs(request, cert_server.url)
+
+    assert cert_server.hits == 2
+
+
+@pytest.mark.unit
+def test_expired_certs_are_refetched(cert_server):
+    request = CachedCertsRequest()
+
+    with patch("apps.accounts.google.time.monotonic", return_value=1000.0):
+        id_token._fetch_certs(request, cert_server.url)
+    with patch("apps.accounts.google.time.monotonic", return_value=1000.0 + 3601):
+        id_token._fetch_certs(request, cert_server.url)
+
+    assert cert_server.hits == 2
+
+
+@pytest.mark.unit
+@override_settings(GOOGLE_CERTS_REFRESH_MARGIN=300)
+def test_certs_refresh_in_background_before_expiry(cert_server):
+    request = CachedCertsRequest()
+
+    with patch("apps.accounts.google.time.monotonic", return_value=1000.0):
+        id_token._fetch_certs(request, cert_server.url)
+
+    # Inside the refresh margin: served from cache while a refresh runs
+    with patch("apps.accounts.google.time.monotonic", return_value=1000.0 + 3400):
+        assert id_token._fetch_certs(request, cert_server.url) == CERTS
+
+    deadline = time.time() + 5
+    while cert_server.hits < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert cert_server.hits == 2
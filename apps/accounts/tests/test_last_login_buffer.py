@@ -0,0 +1,172 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from apps.accounts.last_login import PENDING_KEY, flush_last_logins, record_login
+from apps.accounts.tokens import password_reset_token
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.commands.append((name, args))
+
+        return queue
+
+    def execute(self):
+        return [getattr(self.client, name)(*args) for name, args in self.commands]
+
+
+class FakeRedis:
+    """Just enough of the redis client for the last_login buffer."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.ttls = {}
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[str(field).encode()] = value.encode()
+
+    def hsetnx(self, key, field, value):
+        self.hashes.setdefault(key, {}).setdefault(field, value)
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(str(field).encode())
+
+    def hdel(self, key, field):
+        return int(self.hashes.get(key, {}).pop(str(field).encode(), None) is not None)
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def delete(self, key):
+        return int(self.hashes.pop(key, None) is not None)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def fake_redis():
+    client = FakeRedis()
+    with patch("apps.accounts.last_login.get_redis_client", return_value=client):
+        yield client
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_without_redis_the_row_is_updated_immediately(account_factory):
+    account = account_factory(active=True)
+
+    record_login(account)
+
+    account.refresh_from_db()
+    assert account.last_login is not None
+    assert flush_last_logins() == 0
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_logins_are_buffered_and_flushed_in_one_pass(fake_redis, account_factory):
+    first, second = account_factory.create_batch(2, active=True)
+    earlier = timezone.now() - timedelta(minutes=5)
+    later = timezone.now()
+
+    record_login(first, earlier)
+    record_login(first, later)
+    record_login(second, earlier)
+
+    first.refresh_from_db()
+    assert first.last_login is None
+    assert len(fake_redis.hashes[PENDING_KEY]) == 2
+    assert fake_redis.ttls[PENDING_KEY] == settings.LAST_LOGIN_BUFFER_TTL
+
+    assert flush_last_logins() == 2
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.last_login == later
+    assert second.last_login == earlier
+    assert PENDING_KEY not in fake_redis.hashes
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_flush_never_moves_last_login_back(fake_redis, account_factory):
+    account = account_factory(active=True)
+    newer = timezone.now()
+    account.last_login = newer
+    account.save()
+
+    record_login(account, newer - timedelta(hours=1))
+    flush_last_logins()
+
+    account.refresh_from_db()
+    assert account.last_login == newer
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_failed_flush_puts_entries_back(fake_redis, account_factory):
+    account = account_factory(active=True)
+    record_login(account)
+
+    with patch(
+        "apps.accounts.last_login._update_rows", side_effect=DatabaseError("down")
+    ):
+        with pytest.raises(DatabaseError):
+            flush_last_logins()
+
+    assert len(fake_redis.hashes[PENDING_KEY]) == 1
+    assert flush_last_logins() == 1
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_reset_token_survives_the_flush(fake_redis, account_factory):
+    """Issuing a reset token writes the buffered login first."""
+    account = account_factory(active=True)
+    record_login(account)
+    token = password_reset_token.make_token(account)
+
+    assert not fake_redis.hashes[PENDING_KEY]
+    flush_last_logins()
+    account.refresh_from_db()
+
+    assert password_reset_token.check_token(account, token)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_reset_token_is_checked_without_redis(fake_redis, account_factory):
+    account = account_factory(active=True)
+    record_login(account)
+    token = password_reset_token.make_token(account)
+    account.refresh_from_db()
+
+    with patch.object(FakeRedis, "hget", side_effect=AssertionError("Redis read")):
+        assert password_reset_token.check_token(account, token)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_reset_token_expires_after_a_later_login(fake_redis, account_factory):
+    account = account_factory(active=True)
+    token = password_reset_token.make_token(account)
+
+    record_login(account, timezone.now() + timedelta(seconds=1))
+    flush_last_logins()
+    account.refresh_from_db()
+
+    assert not password_reset_token.check_token(account, token)
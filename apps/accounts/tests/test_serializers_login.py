@@ -1,7 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock, Mock
 from django.core.cache import cache
-from apps.accounts.serializers import LoginSerializer
+from apps.accounts.serializers import LoginSerializer, login_failures
 
 
 @pytest.mark.unit
@@ -82,13 +82,13 @@ def test_login_serializer_failed_attempts_tracking(account_factory):
     request.META = {"REMOTE_ADDR": "127.0.0.1"}
 
     cache.clear()
-    cache_key = f"failed_attempts:{account.email}:127.0.0.1"
+    failure_key = f"{account.email}:127.0.0.1"
 
     data = {"email": account.email, "password": "WrongPass"}
     for i in range(3):
         serializer = LoginSerializer(data=data, context={"request": request})
         serializer.is_valid()
-        assert cache.get(cache_key) == i + 1
+        assert login_failures.count(failure_key) == i + 1
         if i == 2:
             assert (
                 "Captcha required for next attempt" in serializer.errors["message"][0]
@@ -111,16 +111,18 @@ def test_login_serializer_captcha_validation(account_factory):
     request.META = {"REMOTE_ADDR": "127.0.0.1"}
 
     cache.clear()
-    cache_key = f"failed_attempts:{account.email}:127.0.0.1"
-    cache.set(cache_key, 3, timeout=1800)
+    failure_key = f"{account.email}:127.0.0.1"
+    for _ in range(3):
+        login_failures.increment(failure_key)
 
     with patch.object(LoginSerializer, "verify_captcha", return_value=True):
         data = {"email": account.email, "password": password, "captcha": "valid-token"}
         serializer = LoginSerializer(data=data, context={"request": request})
         assert serializer.is_valid()
-        assert cache.get(cache_key) is None  # Failed attempts cleared
+        assert login_failures.count(failure_key) == 0  # Failed attempts cleared
 
-    cache.set(cache_key, 3, timeout=1800)
+    for _ in range(3):
+        login_failures.increment(failure_key)
 
     with patch.object(LoginSerializer, "verify_captcha", return_value=False):
         data = {
@@ -147,13 +149,13 @@ def test_verify_captcha_implementation():
         "apps.accounts.serializers.settings.RECAPTCHA_SECRET_KEY", "test-secret"
     ):
         with patch(
-            "apps.accounts.serializers.requests.post", return_value=mock_response
+            "apps.accounts.serializers.recaptcha_client.post",
+            return_value=mock_response,
         ) as mock_post:
             assert serializer.verify_captcha("valid-token") is True
             mock_post.assert_called_once_with(
                 "https://www.google.com/recaptcha/api/siteverify",
                 data={"secret": "test-secret", "response": "valid-token"},
-                timeout=5,
             )
 
     mock_response.json.return_value = {"success": False}
@@ -161,7 +163,8 @@ def test_verify_captcha_implementation():
         "apps.accounts.serializers.settings.RECAPTCHA_SECRET_KEY", "test-secret"
     ):
         with patch(
-            "apps.accounts.serializers.requests.post", return_value=mock_response
+            "apps.accounts.serializers.recaptcha_client.post",
+            return_value=mock_response,
         ):
             assert serializer.verify_captcha("invalid-token") is False
 
@@ -169,7 +172,7 @@ def test_verify_captcha_implementation():
         "apps.accounts.serializers.settings.RECAPTCHA_SECRET_KEY", "test-secret"
     ):
         with patch(
-            "apps.accounts.serializers.requests.post",
+            "apps.accounts.serializers.recaptcha_client.post",
             side_effect=Exception("Network error"),
         ):
             assert serializer.verify_captcha("any-token") is False
@@ -196,9 +199,8 @@ def test_login_serializer_progressive_error_messages(
 
     cache.clear()
 
-    if failed_attempts > 0:
-        cache_key = f"failed_attempts:{account.email}:127.0.0.1"
-        cache.set(cache_key, failed_attempts, timeout=1800)
+    for _ in range(failed_attempts):
+        login_failures.increment(f"{account.email}:127.0.0.1")
 
     data = {"email": account.email, "password": "WrongPass"}
     serializer = LoginSerializer(data=data, context={"request": request})
@@ -1,6 +1,11 @@
 import pytest
-from unittest.mock import patch, MagicMock
-from apps.accounts.tasks import send_activation_email
+from smtplib import SMTPRecipientsRefused
+from unittest.mock import MagicMock, patch
+from django.conf import settings
+from django.core import mail
+from apps.accounts.tasks import send_activation_email, send_password_reset_email
+from apps.core.models import DeadLetter
+from apps.core.tasks import send_mail_message
 
 
 @pytest.mark.unit
@@ -9,16 +14,12 @@ def test_send_activation_email_success(account_factory):
     user = account_factory(email="test@example.com")
     activation_link = "http://example.com/activate/abc123"
 
-    with patch("apps.accounts.tasks.EmailMultiAlternatives") as mock_email_class:
-        mock_email = MagicMock()
-        mock_email_class.return_value = mock_email
+    result = send_activation_email(user.id, activation_link)
 
-        result = send_activation_email(user.id, activation_link)
-
-        assert result == f"Activation email sent successfully to {user.email}"
-        mock_email_class.assert_called_once()
-        mock_email.attach_alternative.assert_called_once()
-        mock_email.send.assert_called_once()
+    assert result == f"Activation email sent successfully to {user.email}"
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].subject == "Activate Your Bookstore Account"
+    assert mail.outbox[0].alternatives[0][1] == "text/html"
 
 
 @pytest.mark.unit
@@ -34,47 +35,84 @@ def test_send_activation_email_user_not_found():
 
 
 @pytest.mark.unit
-def test_send_activation_email_send_failure(account_factory):
-    """Test handling of email send failure."""
+def test_send_activation_email_retries_then_dead_letters(account_factory):
+    """Transient SMTP failures are retried, then the task is dead-lettered."""
     user = account_factory(email="test@example.com")
     activation_link = "http://example.com/activate/abc123"
+    connection = MagicMock()
+    connection.send_messages.side_effect = OSError("SMTP connection failed")
+
+    with (
+        patch("apps.core.mail.get_connection", return_value=connection),
+        patch.object(send_activation_email, "max_retries", 2),
+    ):
+        result = send_activation_email.apply(args=[user.id, activation_link])
 
-    with patch("apps.accounts.tasks.EmailMultiAlternatives") as mock_email_class:
-        mock_email = MagicMock()
-        mock_email.send.side_effect = Exception("SMTP connection failed")
-        mock_email_class.return_value = mock_email
+    assert result.failed()
+    assert connection.send_messages.call_count == 3
+    letter = DeadLetter.objects.get()
+    assert letter.task == send_activation_email.name
+    assert letter.args == [user.id, activation_link]
+    assert "SMTP connection failed" in letter.error
 
-        result = send_activation_email(user.id, activation_link)
 
-        assert "Failed to send activation email: SMTP connection failed" in result
+@pytest.mark.unit
+def test_send_activation_email_retry_after_failure_sends_once(account_factory):
+    user = account_factory(email="test@example.com")
+    activation_link = "http://example.com/activate/abc123"
+    connection = MagicMock()
+    connection.send_messages.side_effect = [OSError("SMTP connection failed"), 1]
+
+    with patch("apps.core.mail.get_connection", return_value=connection):
+        result = send_activation_email.apply(args=[user.id, activation_link])
+
+    assert result.successful()
+    assert connection.send_messages.call_count == 2
+    assert not DeadLetter.objects.exists()
 
 
 @pytest.mark.unit
-def test_send_activation_email_template_rendering(account_factory):
-    """Test that email templates are rendered with correct context."""
-    user = account_factory(email="test@example.com", full_name="Test User")
+def test_send_activation_email_is_idempotent(account_factory):
+    """A duplicate publish of the same task does not send the email again."""
+    user = account_factory(email="test@example.com")
     activation_link = "http://example.com/activate/abc123"
 
-    with (
-        patch("apps.accounts.tasks.render_to_string") as mock_render,
-        patch("apps.accounts.tasks.EmailMultiAlternatives"),
-    ):
+    send_activation_email(user.id, activation_link)
+    result = send_activation_email(user.id, activation_link)
 
-        mock_render.return_value = "Rendered content"
+    assert result == f"Activation email already sent to {user.email}"
+    assert len(mail.outbox) == 1
 
-        send_activation_email(user.id, activation_link)
 
-        assert mock_render.call_count == 2
+@pytest.mark.unit
+def test_send_activation_email_refused_recipient_is_not_retried(account_factory):
+    user = account_factory(email="test@example.com")
+    connection = MagicMock()
+    connection.send_messages.side_effect = SMTPRecipientsRefused(
+        {user.email: (550, b"No such user")}
+    )
 
-        html_call = mock_render.call_args_list[0]
-        assert html_call[0][0] == "accounts/emails/activation_email.html"
-        assert html_call[0][1]["user"].id == user.id
-        assert html_call[0][1]["activation_link"] == activation_link
+    with patch("apps.core.mail.get_connection", return_value=connection):
+        result = send_activation_email.apply(args=[user.id, "http://example.com/a"])
 
-        text_call = mock_render.call_args_list[1]
-        assert text_call[0][0] == "accounts/emails/activation_email.txt"
-        assert text_call[0][1]["user"].id == user.id
-        assert text_call[0][1]["activation_link"] == activation_link
+    assert result.successful()
+    connection.send_messages.assert_called_once()
+    assert DeadLetter.objects.get().task == send_mail_message.name
+
+
+@pytest.mark.unit
+def test_send_activation_email_template_rendering(account_factory):
+    """Test that email templates are rendered with correct context."""
+    user = account_factory(email="test@example.com", full_name="Test User")
+    activation_link = "http://example.com/activate/abc123"
+
+    send_activation_email(user.id, activation_link)
+
+    message = mail.outbox[0]
+    html, _ = message.alternatives[0]
+    assert "Test User" in message.body
+    assert activation_link in message.body
+    assert activation_link in html
 
 
 @pytest.mark.unit
@@ -83,26 +121,20 @@ def test_send_activation_email_correct_email_params(account_factory):
     user = account_factory(email="recipient@example.com")
     activation_link = "http://example.com/activate/abc123"
 
-    with (
-        patch("apps.accounts.tasks.render_to_string") as mock_render,
-        patch("apps.accounts.tasks.EmailMultiAlternatives") as mock_email_class,
-        patch("apps.accounts.tasks.settings") as mock_settings,
-    ):
+    send_activation_email(user.id, activation_link)
+
+    message = mail.outbox[0]
+    assert message.from_email == settings.DEFAULT_FROM_EMAIL
+    assert message.to == [user.email]
 
-        mock_render.side_effect = ["<html>HTML content</html>", "Text content"]
-        mock_settings.DEFAULT_FROM_EMAIL = "noreply@bookstore.com"
-        mock_email = MagicMock()
-        mock_email_class.return_value = mock_email
 
-        send_activation_email(user.id, activation_link)
+@pytest.mark.unit
+def test_send_password_reset_email_success(account_factory):
+    user = account_factory(email="reset@example.com", full_name="Reset User")
+    reset_link = "http://example.com/reset-password/abc/123"
 
-        mock_email_class.assert_called_once_with(
-            subject="Activate Your Bookstore Account",
-            body="Text content",
-            from_email="noreply@bookstore.com",
-            to=[user.email],
-        )
+    result = send_password_reset_email(user.id, reset_link)
 
-        mock_email.attach_alternative.assert_called_once_with(
-            "<html>HTML content</html>", "text/html"
-        )
+    assert result == f"Password reset email sent successfully to {user.email}"
+    assert mail.outbox[0].subject == "Reset Your Bookstore Password"
+    assert reset_link in mail.outbox[0].body
@@ -320,23 +320,24 @@ def test_verify_captcha_with_google_api(api_client):
         mock_response.json.return_value = {"success": True}
 
         with patch(
-            "apps.accounts.serializers.requests.post", return_value=mock_response
+            "apps.accounts.serializers.recaptcha_client.post",
+            return_value=mock_response,
         ) as mock_post:
             assert serializer.verify_captcha("valid-token") is True
             mock_post.assert_called_once_with(
                 "https://www.google.com/recaptcha/api/siteverify",
                 data={"secret": "test-secret", "response": "valid-token"},
-                timeout=5,
             )
 
         mock_response.json.return_value = {"success": False}
         with patch(
-            "apps.accounts.serializers.requests.post", return_value=mock_response
+            "apps.accounts.serializers.recaptcha_client.post",
+            return_value=mock_response,
         ):
             assert serializer.verify_captcha("invalid-token") is False
 
         with patch(
-            "apps.accounts.serializers.requests.post",
+            "apps.accounts.serializers.recaptcha_client.post",
             side_effect=Exception("Network error"),
         ):
             assert serializer.verify_captcha("any-token") is False
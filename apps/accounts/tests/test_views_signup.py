@@ -3,6 +3,8 @@ from unittest.mock import patch
 from django.urls import reverse
 from rest_framework import status
 from apps.accounts.models import Account
+from apps.accounts.tasks import send_activation_email
+from apps.core.models import OutboxMessage
 
 
 @pytest.mark.unit
@@ -10,8 +12,7 @@ def test_signup_view_success(api_client, valid_account):
     """Test successful user registration with valid data."""
     url = reverse("signup")
 
-    with patch("apps.accounts.views.send_activation_email.delay") as mock_send_email:
-        response = api_client.post(url, valid_account, format="json")
+    response = api_client.post(url, valid_account, format="json")
 
     assert response.status_code == status.HTTP_201_CREATED
     assert (
@@ -26,7 +27,7 @@ def test_signup_view_success(api_client, valid_account):
     assert user.full_name == valid_account["full_name"]
     assert user.is_active is False
 
-    mock_send_email.assert_called_once()
+    assert OutboxMessage.objects.get().task == send_activation_email.name
 
 
 @pytest.mark.unit
@@ -105,20 +106,15 @@ def test_signup_view_activation_email_sent(api_client, valid_account):
     """Test that activation email is sent with correct parameters."""
     url = reverse("signup")
 
-    with (
-        patch("apps.accounts.views.send_activation_email.delay") as mock_send_email,
-        patch(
-            "apps.accounts.views.account_activation_token.make_token"
-        ) as mock_make_token,
-    ):
-
+    with patch(
+        "apps.accounts.views.account_activation_token.make_token"
+    ) as mock_make_token:
         mock_make_token.return_value = "test-token"
         response = api_client.post(url, valid_account, format="json")
 
     assert response.status_code == status.HTTP_201_CREATED
 
-    mock_send_email.assert_called_once()
-    call_args = mock_send_email.call_args[0]
+    call_args = OutboxMessage.objects.get().args
     user = Account.objects.get(email=valid_account["email"])
     assert call_args[0] == user.id
     assert "/activate/" in call_args[1]
@@ -1,5 +1,7 @@
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 
+from .last_login import flush_login
+
 
 class AccountActivationTokenGenerator(PasswordResetTokenGenerator):
     def _make_hash_value(self, user, timestamp):
@@ -7,6 +9,11 @@ class AccountActivationTokenGenerator(PasswordResetTokenGenerator):
 
 
 class CustomPasswordResetTokenGenerator(PasswordResetTokenGenerator):
+    def make_token(self, user):
+        # Write a buffered login first, so the flush can't change the hash later
+        flush_login(user)
+        return super().make_token(user)
+
     def _make_hash_value(self, user, timestamp):
         return f"{user.pk}{timestamp}{user.password}{user.last_login}"
 
@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.urls import path
+from .async_views import AsyncGoogleSignInView, AsyncLoginView, AsyncSignupView
 from .views import (
     SignupView,
     AccountActivateView,
@@ -11,6 +13,12 @@ from .views import (
     EditUserInfoView,
 )
 
+if settings.ASYNC_AUTH_VIEWS:
+    # Served under ASGI; see "ASGI deployment" in the README
+    SignupView = AsyncSignupView  # noqa: F811
+    LoginView = AsyncLoginView  # noqa: F811
+    GoogleSignInView = AsyncGoogleSignInView  # noqa: F811
+
 urlpatterns = [
     path("signup/", SignupView.as_view(), name="signup"),
     path(
@@ -1,14 +1,19 @@
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.utils import timezone
 from django.conf import settings
+from django.db import transaction
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from urllib.parse import urlparse
 
+from apps.core import outbox
+from apps.core.queries import query_budget
+from apps.core.throttling import ThrottleHeadersMixin, TokenBucketThrottle
 from config.settings.base import FRONTEND_DOMAIN
 from .models import Account
 from .serializers import (
@@ -20,33 +25,108 @@ from .serializers import (
     PasswordResetConfirmSerializer,
     EditUserInfoSerializer,
 )
+from .blacklist import RevocationError, token_blacklist
+from .last_login import record_login
 from .tokens import account_activation_token, password_reset_token
 from .tasks import send_activation_email, send_password_reset_email
 
 
-class SignupView(generics.CreateAPIView):
-    queryset = Account.objects.all()
-    serializer_class = SignupSerializer
-
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+def register(serializer):
+    """Create the account and queue its activation email in one transaction."""
+    with transaction.atomic():
         user = serializer.save()
 
         uid = urlsafe_base64_encode(force_bytes(user.pk))
         token = account_activation_token.make_token(user)
         activation_link = f"{FRONTEND_DOMAIN}/activate/{uid}/{token}"
 
-        send_activation_email.delay(user.id, activation_link)
+        outbox.enqueue(send_activation_email, user.id, activation_link)
 
-        response_data = {
-            "message": "Registration successful. Please check your email to activate your account.",
-            "status": 201,
-        }
+    response_data = {
+        "message": "Registration successful. Please check your email to activate your account.",
+        "status": 201,
+    }
+
+    return Response(response_data, status=status.HTTP_201_CREATED)
+
+
+def signed_in_response(user, message, **account_fields):
+    """Record the login and return the access token plus refresh cookie."""
+    refresh = RefreshToken.for_user(user)
+    access_token = refresh.access_token
+
+    record_login(user)
 
-        return Response(response_data, status=status.HTTP_201_CREATED)
+    response_data = {
+        "message": message,
+        "status": 200,
+        "data": {
+            "access": str(access_token),
+            "account": {
+                "id": user.id,
+                "email": user.email,
+                "full_name": user.full_name,
+                "phone": user.phone,
+                "birthday": user.birthday,
+                **account_fields,
+            },
+        },
+    }
 
+    response = Response(response_data, status=status.HTTP_200_OK)
 
+    parsed_url = urlparse(FRONTEND_DOMAIN)
+    cookie_domain = parsed_url.hostname if parsed_url.hostname else None
+
+    response.set_cookie(
+        key="refresh_token",
+        value=str(refresh),
+        max_age=60 * 60 * 24 * 7,
+        httponly=True,
+        samesite="Lax",
+        secure=not settings.DEBUG,
+        domain=cookie_domain if not settings.DEBUG else None,
+    )
+    return response
+
+
+def login_error_response(errors):
+    error_message = errors.get("message", ["Invalid credentials."])[0]
+    captcha_error = errors.get("captcha", None)
+
+    response_data = {
+        "message": error_message,
+        "status": 400,
+    }
+
+    if captcha_error or "captcha" in error_message.lower():
+        response_data["captcha_required"] = True
+
+    return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+
+def google_error_response(errors):
+    error_message = errors.get("message", ["Google Sign-In failed."])[0]
+    return Response(
+        {"message": error_message, "status": 400},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+@query_budget(5)
+class SignupView(ThrottleHeadersMixin, generics.CreateAPIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "signup"
+    queryset = Account.objects.all()
+    serializer_class = SignupSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return register(serializer)
+
+
+@query_budget(2)
 class AccountActivateView(APIView):
     def get(self, request, uidb64, token):
         try:
@@ -82,64 +162,23 @@ class AccountActivateView(APIView):
             )
 
 
-class LoginView(APIView):
+@query_budget(2)
+class LoginView(ThrottleHeadersMixin, APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "login"
+
     def post(self, request):
         serializer = LoginSerializer(data=request.data, context={"request": request})
 
         if serializer.is_valid():
-            user = serializer.validated_data["user"]
-
-            refresh = RefreshToken.for_user(user)
-            access_token = refresh.access_token
-
-            user.last_login = timezone.now()
-            user.save(update_fields=["last_login"])
-
-            response_data = {
-                "message": "Login successful.",
-                "status": 200,
-                "data": {
-                    "access": str(access_token),
-                    "account": {
-                        "id": user.id,
-                        "email": user.email,
-                        "full_name": user.full_name,
-                        "phone": user.phone,
-                        "birthday": user.birthday,
-                    },
-                },
-            }
-
-            response = Response(response_data, status=status.HTTP_200_OK)
-
-            parsed_url = urlparse(FRONTEND_DOMAIN)
-            cookie_domain = parsed_url.hostname if parsed_url.hostname else None
-
-            response.set_cookie(
-                key="refresh_token",
-                value=str(refresh),
-                max_age=60 * 60 * 24 * 7,
-                httponly=True,
-                samesite="Lax",
-                secure=not settings.DEBUG,
-                domain=cookie_domain if not settings.DEBUG else None,
+            return signed_in_response(
+                serializer.validated_data["user"], "Login successful."
             )
-            return response
-
-        error_message = serializer.errors.get("message", ["Invalid credentials."])[0]
-        captcha_error = serializer.errors.get("captcha", None)
-
-        response_data = {
-            "message": error_message,
-            "status": 400,
-        }
-
-        if captcha_error or "captcha" in error_message.lower():
-            response_data["captcha_required"] = True
 
-        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+        return login_error_response(serializer.errors)
 
 
+@query_budget(1)
 class RefreshTokenView(APIView):
     def post(self, request):
         refresh_token = request.COOKIES.get("refresh_token")
@@ -152,7 +191,17 @@ class RefreshTokenView(APIView):
 
         serializer = RefreshTokenSerializer(data={"refresh": refresh_token})
 
-        if serializer.is_valid():
+        try:
+            valid = serializer.is_valid()
+        except RevocationError:
+            # Rotating without revoking the old token everywhere would let it
+            # be replayed on other hosts
+            return Response(
+                {"message": "Could not refresh the token. Try again.", "status": 503},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        if valid:
             access_token = serializer.validated_data["access"]
             refresh = serializer.validated_data["refresh"]
 
@@ -205,63 +254,45 @@ class RefreshTokenView(APIView):
         )
 
 
-class GoogleSignInView(APIView):
+@query_budget(3)
+class GoogleSignInView(ThrottleHeadersMixin, APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "google_signin"
+
     def post(self, request):
         serializer = GoogleSignInSerializer(data=request.data)
 
         if serializer.is_valid():
             user = serializer.validated_data["user"]
-
-            refresh = RefreshToken.for_user(user)
-            access_token = refresh.access_token
-
-            user.last_login = timezone.now()
-            user.save(update_fields=["last_login"])
-
-            response_data = {
-                "message": "Google Sign-In successful.",
-                "status": 200,
-                "data": {
-                    "access": str(access_token),
-                    "account": {
-                        "id": user.id,
-                        "email": user.email,
-                        "full_name": user.full_name,
-                        "phone": user.phone,
-                        "birthday": user.birthday,
-                        "is_google_user": user.is_google_user,
-                    },
-                },
-            }
-
-            response = Response(response_data, status=status.HTTP_200_OK)
-
-            parsed_url = urlparse(FRONTEND_DOMAIN)
-            cookie_domain = parsed_url.hostname if parsed_url.hostname else None
-
-            response.set_cookie(
-                key="refresh_token",
-                value=str(refresh),
-                max_age=60 * 60 * 24 * 7,
-                httponly=True,
-                samesite="Lax",
-                secure=not settings.DEBUG,
-                domain=cookie_domain if not settings.DEBUG else None,
+            return signed_in_response(
+                user,
+                "Google Sign-In successful.",
+                is_google_user=user.is_google_user,
             )
 
-            return response
-
-        error_message = serializer.errors.get("message", ["Google Sign-In failed."])[0]
-        return Response(
-            {"message": error_message, "status": 400},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
+        return google_error_response(serializer.errors)
 
 
+@query_budget(1)
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        refresh_token = request.COOKIES.get("refresh_token")
+
+        if refresh_token:
+            try:
+                refresh = RefreshToken(refresh_token)
+                token_blacklist.revoke(refresh[jwt_settings.JTI_CLAIM], refresh["exp"])
+            except TokenError:
+                pass
+            except RevocationError:
+                # Keep the cookie so the client can retry the logout
+                return Response(
+                    {"message": "Could not log out. Try again.", "status": 503},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+
         response_data = {
             "message": "Logout successful.",
             "status": 200,
@@ -281,7 +312,11 @@ class LogoutView(APIView):
         return response
 
 
-class PasswordResetRequestView(APIView):
+@query_budget(2)
+class PasswordResetRequestView(ThrottleHeadersMixin, APIView):
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "password_reset"
+
     def post(self, request):
         serializer = PasswordResetRequestSerializer(data=request.data)
 
@@ -295,7 +330,7 @@ class PasswordResetRequestView(APIView):
                     uid = urlsafe_base64_encode(force_bytes(user.pk))
                     token = password_reset_token.make_token(user)
                     reset_link = f"{FRONTEND_DOMAIN}/reset-password/{uid}/{token}"
-                    send_password_reset_email.delay(user.id, reset_link)
+                    outbox.enqueue(send_password_reset_email, user.id, reset_link)
             except Account.DoesNotExist:
                 pass
 
@@ -316,6 +351,7 @@ class PasswordResetRequestView(APIView):
         )
 
 
+@query_budget(2)
 class PasswordResetConfirmView(APIView):
     def post(self, request):
         serializer = PasswordResetConfirmSerializer(data=request.data)
@@ -347,6 +383,7 @@ class PasswordResetConfirmView(APIView):
         )
 
 
+@query_budget(2)
 class EditUserInfoView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -0,0 +1,149 @@
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Book, BookRatingShard, RatingPrior
+from .ranking import score_for
+
+
+def sharded_counters_enabled():
+    return settings.BOOK_RATING_SHARDS > 0
+
+
+def add_rating_delta(book_id, value_delta, count_delta):
+    """
+    Add a rating delta to a random counter shard of the book.
+
+    Concurrent reviews of the same book land on different rows, so writers
+    no longer queue behind a single row lock on ``books``.
+    """
+    if not value_delta and not count_delta:
+        return
+
+    shard = random.randrange(settings.BOOK_RATING_SHARDS)
+    shards = BookRatingShard.objects.filter(book_id=book_id, shard=shard)
+    increment = {
+        "total_rating_value": F("total_rating_value") + value_delta,
+        "total_rating_count": F("total_rating_count") + count_delta,
+    }
+
+    if shards.update(**increment):
+        return
+
+    try:
+        with transaction.atomic():
+            BookRatingShard.objects.create(
+                book_id=book_id,
+                shard=shard,
+                total_rating_value=value_delta,
+                total_rating_count=count_delta,
+            )
+    except IntegrityError:
+        # Another writer created the shard first
+        shards.update(**increment)
+
+
+def _pending(field):
+    return Coalesce(
+        Subquery(
+            BookRatingShard.objects.filter(book=OuterRef("pk"))
+            .values("book")
+            .annotate(total=Sum(field))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def with_live_ratings(queryset):
+    """Annotate books with ``live_rating_value``/``live_rating_count``."""
+    return queryset.annotate(
+        live_rating_value=F("total_rating_value") + _pending("total_rating_value"),
+        live_rating_count=F("total_rating_count") + _pending("total_rating_count"),
+    )
+
+
+def live_rating_totals(book):
+    """Return ``(total_value, total_count)`` including deltas not yet folded."""
+    if hasattr(book, "live_rating_value"):
+        return book.live_rating_value, book.live_rating_count
+    pending = book.rating_shards.aggregate(
+        total_value=Sum("total_rating_value"), total_count=Sum("total_rating_count")
+    )
+    return (
+        book.total_rating_value + (pending["total_value"] or 0),
+        book.total_rating_count + (pending["total_count"] or 0),
+    )
+
+
+def recompute_book_ratings(book):
+    """
+    Set the book's totals from its comments and drop its pending deltas.
+
+    The comments already include whatever the shards hold, so the shards
+    are emptied in the same transaction; a fold scheduled before sharding
+    was switched off then has nothing left to add on top.
+    """
+    with transaction.atomic():
+        pending = list(
+            BookRatingShard.objects.select_for_update()
+            .filter(book=book)
+            .exclude(total_rating_value=0, total_rating_count=0)
+            .values_list("pk", flat=True)
+        )
+        ratings = book.comments.aggregate(
+            total_value=Sum("rating"), total_count=Count("rating")
+        )
+        book.total_rating_value = ratings["total_value"] or 0
+        book.total_rating_count = ratings["total_count"] or 0
+        book.rating_score = score_for(book)
+        book.save(
+            update_fields=["total_rating_value", "total_rating_count", "rating_score"]
+        )
+        if pending:
+            BookRatingShard.objects.filter(pk__in=pending).update(
+                total_rating_value=0, total_rating_count=0
+            )
+
+
+def fold_book_shards(book_id, prior=None):
+    """
+    Move one book's pending shard deltas into its ``Book`` row.
+
+    Returns ``True`` when anything was folded.
+    """
+    with transaction.atomic():
+        shards = list(
+            BookRatingShard.objects.select_for_update()
+            .filter(book_id=book_id)
+            .exclude(total_rating_value=0, total_rating_count=0)
+        )
+        if not shards:
+            return False
+
+        book = Book.objects.select_for_update().get(pk=book_id)
+        book.total_rating_value += sum(s.total_rating_value for s in shards)
+        book.total_rating_count += sum(s.total_rating_count for s in shards)
+        book.rating_score = score_for(book, prior)
+        book.save(
+            update_fields=["total_rating_value", "total_rating_count", "rating_score"]
+        )
+
+        BookRatingShard.objects.filter(pk__in=[s.pk for s in shards]).update(
+            total_rating_value=0, total_rating_count=0
+        )
+    return True
+
+
+def fold_rating_shards():
+    """Fold pending deltas for every book that has any. Returns books folded."""
+    book_ids = list(
+        BookRatingShard.objects.exclude(total_rating_value=0, total_rating_count=0)
+        .values_list("book_id", flat=True)
+        .distinct()
+    )
+    prior = RatingPrior.load()
+    return sum(fold_book_shards(book_id, prior) for book_id in book_ids)
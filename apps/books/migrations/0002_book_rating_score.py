@@ -0,0 +1,62 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_rating_score(apps, schema_editor):
+    Book = apps.get_model("books", "Book")
+    mean = settings.BOOK_RATING_PRIOR_DEFAULT_MEAN
+    weight = settings.BOOK_RATING_PRIOR_WEIGHT
+
+    books = Book.objects.filter(total_rating_count__gt=0).only(
+        "total_rating_value", "total_rating_count"
+    )
+    for book in books.iterator():
+        book.rating_score = (weight * mean + book.total_rating_value) / (
+            weight + book.total_rating_count
+        )
+        book.save(update_fields=["rating_score"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0001_initial"),
+        ("categories", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RatingPrior",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("mean", models.FloatField(default=3.0)),
+                ("weight", models.PositiveIntegerField(default=10)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "book_rating_prior",
+            },
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="rating_score",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(
+                fields=["-rating_score", "-id"], name="books_rating_score_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_rating_score, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0002_book_rating_score"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookRatingShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("shard", models.PositiveSmallIntegerField()),
+                ("total_rating_value", models.IntegerField(default=0)),
+                ("total_rating_count", models.IntegerField(default=0)),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rating_shards",
+                        to="books.book",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "book_rating_shards",
+                "unique_together": {("book", "shard")},
+            },
+        ),
+    ]
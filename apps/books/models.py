@@ -1,4 +1,8 @@
+import copy
+from time import monotonic
+
 from django.db import models
+from django.conf import settings
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from apps.categories.models import Category
@@ -17,6 +21,8 @@ class Book(models.Model):
 
     total_rating_value = models.IntegerField(default=0)
     total_rating_count = models.IntegerField(default=0)
+    # Bayesian average against RatingPrior, kept in sync by the comment signals
+    rating_score = models.FloatField(default=0)
 
     # One-to-Many: One category can have many books
     category = models.ForeignKey(
@@ -32,6 +38,9 @@ class Book(models.Model):
         indexes = [
             models.Index(fields=["title"]),
             models.Index(fields=["author_name"]),
+            models.Index(
+                fields=["-rating_score", "-id"], name="books_rating_score_idx"
+            ),
         ]
 
     def __str__(self):
@@ -55,3 +64,76 @@ class Book(models.Model):
 
         if errors:
             raise ValidationError(errors)
+
+
+class RatingPrior(models.Model):
+    """Global prior used to compute every book's ``rating_score``."""
+
+    # Literal defaults keep the migration stable; ``load`` applies the settings
+    mean = models.FloatField(default=3.0)
+    weight = models.PositiveIntegerField(default=10)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # (loaded at, prior) shared by ``load`` calls in this process
+    _cached = None
+
+    class Meta:
+        db_table = "book_rating_prior"
+
+    def __str__(self):
+        return f"{self.mean:.3f} (weight {self.weight})"
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        RatingPrior._cached = (monotonic(), copy.copy(self))
+
+    @classmethod
+    def load(cls, cached=True):
+        """
+        Return the single prior row, creating it from the settings if missing.
+
+        The row is reused for ``BOOK_RATING_PRIOR_CACHE_SECONDS`` within a
+        process, so review writes don't query it each time; ``refresh_prior``
+        changes it at most every few minutes. Callers get their own copy.
+        """
+        if cached and cls._cached is not None:
+            loaded_at, prior = cls._cached
+            if monotonic() - loaded_at < settings.BOOK_RATING_PRIOR_CACHE_SECONDS:
+                return copy.copy(prior)
+        prior, _ = cls.objects.get_or_create(
+            pk=1,
+            defaults={
+                "mean": settings.BOOK_RATING_PRIOR_DEFAULT_MEAN,
+                "weight": settings.BOOK_RATING_PRIOR_WEIGHT,
+            },
+        )
+        RatingPrior._cached = (monotonic(), copy.copy(prior))
+        return prior
+
+    @classmethod
+    def forget(cls):
+        """Drop the cached row, so the next ``load`` reads the database."""
+        RatingPrior._cached = None
+
+
+class BookRatingShard(models.Model):
+    """
+    One of ``BOOK_RATING_SHARDS`` pending rating deltas for a book.
+
+    Review writes add to a random shard instead of locking the ``books`` row;
+    ``fold_rating_shards`` periodically moves the sums back into ``Book``.
+    """
+
+    book = models.ForeignKey(
+        Book, on_delete=models.CASCADE, related_name="rating_shards"
+    )
+    shard = models.PositiveSmallIntegerField()
+    total_rating_value = models.IntegerField(default=0)
+    total_rating_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "book_rating_shards"
+        unique_together = ["book", "shard"]
+
+    def __str__(self):
+        return f"{self.book_id}#{self.shard}"
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+from django.db.models.lookups import GreaterThan
+
+from .models import Book, RatingPrior
+
+
+def bayesian_score(total_value, total_count, mean, weight):
+    """
+    Weighted average of a book's ratings pulled towards the global mean.
+
+    Books without ratings score 0 so they always sort after rated titles.
+    """
+    if not total_count:
+        return 0.0
+    return (weight * mean + total_value) / (weight + total_count)
+
+
+def score_for(book, prior=None):
+    """Compute ``rating_score`` for a book from its stored rating totals."""
+    prior = prior or RatingPrior.load()
+    return bayesian_score(
+        book.total_rating_value, book.total_rating_count, prior.mean, prior.weight
+    )
+
+
+def score_expression(
+    prior, total_value=F("total_rating_value"), total_count=F("total_rating_count")
+):
+    """SQL equivalent of ``bayesian_score`` for use in UPDATE statements."""
+    weight = float(prior.weight)
+    return Case(
+        When(
+            GreaterThan(total_count, 0),
+            then=(Value(weight * prior.mean) + Cast(total_value, FloatField()))
+            / (Value(weight) + Cast(total_count, FloatField())),
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def compute_global_mean():
+    """Average rating across every comment, or the configured default if none."""
+    totals = Book.objects.aggregate(
+        total_value=Sum("total_rating_value"), total_count=Sum("total_rating_count")
+    )
+    if not totals["total_count"]:
+        return settings.BOOK_RATING_PRIOR_DEFAULT_MEAN
+    return totals["total_value"] / totals["total_count"]
+
+
+def rescore_books(prior, batch_size=None):
+    """
+    Recompute ``rating_score`` for every book in primary-key batches.
+
+    Each batch is a single UPDATE so long rescores never hold locks on the
+    whole table. Returns the number of rows updated.
+    """
+    batch_size = batch_size or settings.BOOK_RATING_RESCORE_BATCH_SIZE
+    score = score_expression(prior)
+
+    updated = 0
+    last_pk = 0
+    while True:
+        pks = list(
+            Book.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            break
+
+        batch = Book.objects.filter(pk__gt=last_pk, pk__lte=pks[-1])
+        updated += batch.filter(total_rating_count__gt=0).update(rating_score=score)
+        updated += (
+            batch.filter(total_rating_count=0)
+            .exclude(rating_score=0)
+            .update(rating_score=0)
+        )
+        last_pk = pks[-1]
+
+    return updated
+
+
+def refresh_prior(threshold=None):
+    """
+    Refresh the global prior and rescore all books when it has shifted.
+
+    Returns ``(prior, rescored)`` where ``rescored`` is the number of books
+    updated, or ``None`` when the shift was below the threshold.
+    """
+    if threshold is None:
+        threshold = settings.BOOK_RATING_PRIOR_RESCORE_THRESHOLD
+
+    prior = RatingPrior.load(cached=False)
+    mean = compute_global_mean()
+    weight = settings.BOOK_RATING_PRIOR_WEIGHT
+
+    if abs(prior.mean - mean) < threshold and prior.weight == weight:
+        return prior, None
+
+    prior.mean = mean
+    prior.weight = weight
+    prior.save(update_fields=["mean", "weight", "updated_at"])
+
+    return prior, rescore_books(prior)
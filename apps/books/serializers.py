@@ -14,3 +14,11 @@ class BookSerializer(serializers.ModelSerializer):
             "total_rating_value",
             "total_rating_count",
         ]
+
+    def to_representation(self, book):
+        data = super().to_representation(book)
+        # Pending sharded deltas, when the view annotated them
+        if hasattr(book, "live_rating_value"):
+            data["total_rating_value"] = book.live_rating_value
+            data["total_rating_count"] = book.live_rating_count
+        return data
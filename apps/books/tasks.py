@@ -0,0 +1,21 @@
+from celery import shared_task
+
+from . import counters
+from .ranking import refresh_prior
+
+
+# Safe to run twice, so a worker crash redelivers rather than drops them
+@shared_task(acks_late=True)
+def refresh_rating_prior():
+    prior, rescored = refresh_prior()
+
+    if rescored is None:
+        return f"Rating prior unchanged at {prior.mean:.3f}"
+
+    return f"Rating prior updated to {prior.mean:.3f}, rescored {rescored} books"
+
+
+@shared_task(acks_late=True)
+def fold_rating_shards():
+    folded = counters.fold_rating_shards()
+    return f"Folded rating shards for {folded} books"
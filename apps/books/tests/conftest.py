@@ -1,5 +1,5 @@
 import pytest
-from apps.books.models import Book
+from apps.books.models import Book, RatingPrior
 from apps.books.tests.factories import BookFactory
 from apps.categories.tests.factories import CategoryFactory
 
@@ -20,3 +20,11 @@ def book_factory(db):
 def category_factory(db):
     """Get the BookFactory model class for testing model configuration."""
     return CategoryFactory
+
+
+@pytest.fixture(autouse=True)
+def forget_rating_prior():
+    """The prior row is cached per process; don't carry it across tests."""
+    RatingPrior.forget()
+    yield
+    RatingPrior.forget()
@@ -0,0 +1,100 @@
+import pytest
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.books.counters import (
+    fold_rating_shards,
+    live_rating_totals,
+    with_live_ratings,
+)
+from apps.books.models import Book, BookRatingShard
+from apps.books.ranking import score_for
+from apps.comments.tests.factories import CommentFactory
+
+
+@pytest.mark.unit
+@override_settings(BOOK_RATING_SHARDS=4)
+def test_sharded_comment_write_leaves_book_row_untouched(book_factory):
+    """In sharded mode reviews go to shard rows, not the book."""
+    book = book_factory.create()
+
+    CommentFactory.create(book=book, rating=5)
+    CommentFactory.create(book=book, rating=3)
+    book.refresh_from_db()
+
+    assert book.total_rating_count == 0
+    assert 1 <= BookRatingShard.objects.filter(book=book).count() <= 2
+    assert live_rating_totals(book) == (8, 2)
+
+
+@pytest.mark.unit
+@override_settings(BOOK_RATING_SHARDS=4)
+def test_sharded_comment_update_and_delete_apply_deltas(book_factory):
+    """Rating changes and deletions are tracked as deltas."""
+    book = book_factory.create()
+    kept = CommentFactory.create(book=book, rating=2)
+    removed = CommentFactory.create(book=book, rating=4)
+
+    kept.rating = 5
+    kept.save()
+    removed.delete()
+
+    assert live_rating_totals(book) == (5, 1)
+
+
+@pytest.mark.unit
+@override_settings(BOOK_RATING_SHARDS=8)
+def test_fold_rating_shards_moves_totals_into_book(book_factory):
+    """Folding sums the shards into the book and resets them."""
+    book = book_factory.create()
+    for rating in (5, 4, 4, 3):
+        CommentFactory.create(book=book, rating=rating)
+
+    folded = fold_rating_shards()
+    book.refresh_from_db()
+
+    assert folded == 1
+    assert (book.total_rating_value, book.total_rating_count) == (16, 4)
+    assert book.rating_score == pytest.approx(score_for(book))
+    assert live_rating_totals(book) == (16, 4)
+    assert fold_rating_shards() == 0
+
+
+@pytest.mark.unit
+def test_unsharded_mode_updates_book_row(book_factory):
+    """With sharding disabled the book row is updated on every write."""
+    book = book_factory.create()
+
+    CommentFactory.create(book=book, rating=4)
+    book.refresh_from_db()
+
+    assert book.total_rating_count == 1
+    assert not BookRatingShard.objects.exists()
+
+
+@pytest.mark.unit
+def test_switching_sharding_off_does_not_double_count(book_factory):
+    """A recompute absorbs pending deltas, so a later fold adds nothing."""
+    book = book_factory.create()
+    with override_settings(BOOK_RATING_SHARDS=4):
+        CommentFactory.create(book=book, rating=5)
+
+    CommentFactory.create(book=book, rating=3)
+    fold_rating_shards()
+    book.refresh_from_db()
+
+    assert (book.total_rating_value, book.total_rating_count) == (8, 2)
+    assert live_rating_totals(book) == (8, 2)
+
+
+@pytest.mark.unit
+@override_settings(BOOK_RATING_SHARDS=4)
+def test_book_list_serves_live_totals(book_factory):
+    book = book_factory.create()
+    CommentFactory.create(book=book, rating=4)
+
+    response = APIClient().get(reverse("book-list"))
+
+    [data] = response.json()["data"]
+    assert (data["totalRatingValue"], data["totalRatingCount"]) == (4, 1)
+    assert with_live_ratings(Book.objects.all()).get().live_rating_count == 1
@@ -0,0 +1,124 @@
+import pytest
+from django.test.utils import override_settings
+from apps.books.models import Book, RatingPrior
+from apps.books.ranking import bayesian_score, refresh_prior, rescore_books
+from apps.books.tasks import refresh_rating_prior
+from apps.comments.tests.factories import CommentFactory
+
+
+@pytest.mark.unit
+def test_bayesian_score_without_ratings_is_zero():
+    """Unrated books score 0 so they sort after every rated title."""
+    assert bayesian_score(0, 0, mean=3.5, weight=10) == 0.0
+
+
+@pytest.mark.unit
+def test_bayesian_score_pulls_few_ratings_towards_mean():
+    """A single 5-star review ranks below many 4.8-star reviews."""
+    single_review = bayesian_score(5, 1, mean=3.0, weight=10)
+    many_reviews = bayesian_score(480, 100, mean=3.0, weight=10)
+
+    assert single_review == pytest.approx((30 + 5) / 11)
+    assert single_review < many_reviews
+
+
+@pytest.mark.unit
+def test_comment_save_updates_rating_score(book_factory):
+    """Creating a comment recomputes the book's stored rating score."""
+    book = book_factory.create()
+    prior = RatingPrior.load()
+
+    CommentFactory.create(book=book, rating=5)
+    book.refresh_from_db()
+
+    assert book.total_rating_count == 1
+    assert book.rating_score == pytest.approx(
+        bayesian_score(5, 1, prior.mean, prior.weight)
+    )
+
+
+@pytest.mark.unit
+def test_comment_delete_resets_rating_score(book_factory):
+    """Deleting the last comment drops the score back to 0."""
+    book = book_factory.create()
+    comment = CommentFactory.create(book=book, rating=4)
+
+    comment.delete()
+    book.refresh_from_db()
+
+    assert book.total_rating_count == 0
+    assert book.rating_score == 0
+
+
+@pytest.mark.unit
+def test_rescore_books_in_batches(book_factory, category_factory):
+    """Rescoring touches every rated book even across several batches."""
+    category = category_factory()
+    books = [
+        book_factory.create(
+            category=category, total_rating_value=4 * n, total_rating_count=n
+        )
+        for n in range(1, 6)
+    ]
+    prior = RatingPrior.load()
+    prior.mean = 2.0
+    prior.weight = 4
+
+    updated = rescore_books(prior, batch_size=2)
+
+    assert updated == 5
+    for book in books:
+        book.refresh_from_db()
+        assert book.rating_score == pytest.approx(
+            bayesian_score(book.total_rating_value, book.total_rating_count, 2.0, 4)
+        )
+
+
+@pytest.mark.unit
+def test_refresh_prior_skips_rescore_below_threshold(book_factory):
+    """A prior that barely moved is left alone."""
+    book_factory.create(total_rating_value=30, total_rating_count=10)
+    RatingPrior.objects.create(pk=1, mean=3.0)
+
+    prior, rescored = refresh_prior(threshold=0.5)
+
+    assert rescored is None
+    assert prior.mean == 3.0
+
+
+@pytest.mark.unit
+@override_settings(BOOK_RATING_PRIOR_WEIGHT=2)
+def test_refresh_prior_rescores_when_mean_shifts(book_factory):
+    """A shifted global mean is stored and all books are rescored."""
+    book = book_factory.create(total_rating_value=45, total_rating_count=10)
+    RatingPrior.objects.create(pk=1, mean=3.0, weight=2)
+
+    prior, rescored = refresh_prior(threshold=0.01)
+    book.refresh_from_db()
+
+    assert prior.mean == pytest.approx(4.5)
+    assert rescored == 1
+    assert book.rating_score == pytest.approx(bayesian_score(45, 10, 4.5, 2))
+
+
+@pytest.mark.unit
+def test_refresh_rating_prior_task(book_factory):
+    """The periodic task reports the refreshed prior."""
+    book_factory.create(total_rating_value=40, total_rating_count=10)
+
+    result = refresh_rating_prior()
+
+    assert result == "Rating prior updated to 4.000, rescored 1 books"
+    assert Book.objects.get().rating_score > 0
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(BOOK_RATING_PRIOR_WEIGHT=25)
+def test_prior_is_created_from_settings_and_cached(django_assert_num_queries):
+    """The row takes the configured weight and is reused by later loads."""
+    prior = RatingPrior.load()
+    prior.weight = 1
+
+    with django_assert_num_queries(0):
+        assert RatingPrior.load().weight == 25
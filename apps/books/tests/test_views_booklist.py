@@ -558,3 +558,40 @@ def test_large_dataset_pagination(book_factory, category_factory):
     assert len(data["data"]) == 20
     assert data["pagination"]["totalItems"] == 100
     assert data["pagination"]["totalPages"] == 5
+
+
+@pytest.mark.unit
+def test_sort_top_rated(book_factory, category_factory):
+    """Orders books by stored rating score, highest first"""
+    category = category_factory()
+    book_factory.create(title="Unrated", category=category)
+    book_factory.create(title="Good", rating_score=4.2, category=category)
+    book_factory.create(title="Best", rating_score=4.7, category=category)
+
+    factory = APIRequestFactory()
+    request = factory.get("/books/?sort=top_rated")
+    view = BookListView.as_view()
+
+    response = view(request)
+    response.render()
+    data = json.loads(response.content)
+
+    assert response.status_code == 200
+    assert [book["title"] for book in data["data"]] == ["Best", "Good", "Unrated"]
+
+
+@pytest.mark.unit
+def test_invalid_sort_parameter(db):
+    """Rejects unknown sort values"""
+    factory = APIRequestFactory()
+    request = factory.get("/books/?sort=cheapest")
+    view = BookListView.as_view()
+
+    response = view(request)
+    response.render()
+    data = json.loads(response.content)
+
+    assert response.status_code == 400
+    assert data["error"] == "Invalid sort parameter. Allowed values: top_rated"
+    assert data["data"] == []
+    assert data["pagination"] is None
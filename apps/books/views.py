@@ -4,6 +4,8 @@ from rest_framework.response import Response
 from rest_framework.exceptions import NotFound
 from django_filters.rest_framework import DjangoFilterBackend
 import django_filters
+from apps.core.queries import query_budget
+from .counters import sharded_counters_enabled, with_live_ratings
 from .models import Book
 from .serializers import BookSerializer
 
@@ -40,6 +42,7 @@ class BookFilter(django_filters.FilterSet):
         fields = ["category"]
 
 
+@query_budget(2)
 class BookListView(generics.ListAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
@@ -47,6 +50,35 @@ class BookListView(generics.ListAPIView):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_class = BookFilter
     search_fields = ["author_name", "title"]
+    # Each ordering must be covered by an index on ``books``
+    sort_orderings = {
+        "top_rated": ("-rating_score", "-id"),
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        sort = self.request.query_params.get("sort")
+        if sort:
+            queryset = queryset.order_by(*self.sort_orderings[sort])
+        if sharded_counters_enabled():
+            queryset = with_live_ratings(queryset)
+        return queryset
+
+    def _validate_sort_param(self, request):
+        sort = request.query_params.get("sort")
+
+        if sort is not None and sort not in self.sort_orderings:
+            return Response(
+                {
+                    "data": [],
+                    "pagination": None,
+                    "status": 400,
+                    "error": "Invalid sort parameter. Allowed values: "
+                    + ", ".join(self.sort_orderings),
+                },
+                status=400,
+            )
+        return None
 
     def _validate_pagination_params(self, request):
         page = request.query_params.get("page")
@@ -102,7 +134,9 @@ class BookListView(generics.ListAPIView):
         return None
 
     def list(self, request, *args, **kwargs):
-        validation_response = self._validate_pagination_params(request)
+        validation_response = self._validate_pagination_params(
+            request
+        ) or self._validate_sort_param(request)
         if validation_response:
             return validation_response
 
@@ -1,8 +1,10 @@
 from rest_framework import generics
+from apps.core.queries import query_budget
 from .models import Category
 from .serializers import CategorySerializer
 
 
+@query_budget(1)
 class CategoryListView(generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -0,0 +1,102 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from apps.accounts.models import Account
+from apps.books.models import Book, RatingPrior
+from apps.books.ranking import score_expression
+from .models import Comment
+
+# Accounts or books handled per transaction; also bounds the IN (...) list size
+OWNER_BATCH_SIZE = 500
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        stop = start + size
+        yield items[start:stop]
+
+
+def _delete_comment_chunks(column, owner_ids, chunk_size):
+    """
+    Delete comments whose ``column`` is in ``owner_ids`` without model signals.
+
+    Each statement removes at most ``chunk_size`` rows and reports them back
+    through ``RETURNING``. Returns ``{book_id: [rating_sum, rating_count]}``.
+    """
+    table = connection.ops.quote_name(Comment._meta.db_table)
+    column = connection.ops.quote_name(column)
+    placeholders = ", ".join(["%s"] * len(owner_ids))
+    sql = (
+        f"DELETE FROM {table} WHERE id IN ("
+        f"SELECT id FROM {table} WHERE {column} IN ({placeholders}) LIMIT %s"
+        f") RETURNING book_id, rating"
+    )
+
+    deltas = defaultdict(lambda: [0, 0])
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(sql, [*owner_ids, chunk_size])
+            rows = cursor.fetchall()
+            for book_id, rating in rows:
+                deltas[book_id][0] += rating
+                deltas[book_id][1] += 1
+            if len(rows) < chunk_size:
+                return deltas
+
+
+def _apply_rating_deltas(deltas, prior):
+    """Subtract deleted ratings from each affected book in a single UPDATE."""
+    for book_id, (value, count) in deltas.items():
+        new_value = F("total_rating_value") - value
+        new_count = F("total_rating_count") - count
+        Book.objects.filter(pk=book_id).update(
+            total_rating_value=new_value,
+            total_rating_count=new_count,
+            rating_score=score_expression(prior, new_value, new_count),
+        )
+
+
+def delete_accounts(account_ids, chunk_size=None):
+    """
+    Delete accounts and their comments without a per-comment signal storm.
+
+    Comments go first in chunks, and each affected book gets one rating
+    update per batch of accounts. The cascade from ``Account`` then finds no
+    comments left. Returns the number of comments deleted.
+    """
+    chunk_size = chunk_size or settings.COMMENT_DELETE_CHUNK_SIZE
+    account_ids = list(account_ids)
+    prior = RatingPrior.load()
+    deleted = 0
+
+    for batch in _chunks(account_ids, OWNER_BATCH_SIZE):
+        with transaction.atomic():
+            deltas = _delete_comment_chunks("account_id", batch, chunk_size)
+            _apply_rating_deltas(deltas, prior)
+            Account.objects.filter(pk__in=batch).delete()
+        deleted += sum(count for _, count in deltas.values())
+
+    return deleted
+
+
+def delete_books(book_ids, chunk_size=None):
+    """
+    Delete books and their comments in chunks.
+
+    The books themselves disappear, so the returned ratings are discarded
+    instead of being applied. Returns the number of comments deleted.
+    """
+    chunk_size = chunk_size or settings.COMMENT_DELETE_CHUNK_SIZE
+    book_ids = list(book_ids)
+    deleted = 0
+
+    for batch in _chunks(book_ids, OWNER_BATCH_SIZE):
+        with transaction.atomic():
+            deltas = _delete_comment_chunks("book_id", batch, chunk_size)
+            Book.objects.filter(pk__in=batch).delete()
+        deleted += sum(count for _, count in deltas.values())
+
+    return deleted
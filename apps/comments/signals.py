@@ -1,34 +1,40 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.db.models import Sum, Count
+from apps.books.counters import (
+    add_rating_delta,
+    recompute_book_ratings,
+    sharded_counters_enabled,
+)
 from .models import Comment
 
 
-@receiver(post_save, sender=Comment)
-def update_book_ratings_on_save(sender, instance, created, **kwargs):
-    """Update book ratings when a comment is added or updated."""
-    book = instance.book
+@receiver(pre_save, sender=Comment)
+def remember_previous_rating(sender, instance, **kwargs):
+    """Keep the stored rating so sharded counters can apply the difference."""
+    if not sharded_counters_enabled() or instance._state.adding:
+        return
 
-    # Aggregate all ratings for this book
-    ratings = book.comments.aggregate(
-        total_value=Sum("rating"), total_count=Count("rating")
+    instance._previous_rating = (
+        Comment.objects.filter(pk=instance.pk).values_list("rating", flat=True).first()
     )
 
-    book.total_rating_value = ratings["total_value"] or 0
-    book.total_rating_count = ratings["total_count"] or 0
-    book.save(update_fields=["total_rating_value", "total_rating_count"])
+
+@receiver(post_save, sender=Comment)
+def update_book_ratings_on_save(sender, instance, created, **kwargs):
+    """Update book ratings when a comment is added or updated."""
+    if not sharded_counters_enabled():
+        recompute_book_ratings(instance.book)
+    elif created:
+        add_rating_delta(instance.book_id, instance.rating, 1)
+    else:
+        previous = getattr(instance, "_previous_rating", None) or instance.rating
+        add_rating_delta(instance.book_id, instance.rating - previous, 0)
 
 
 @receiver(post_delete, sender=Comment)
 def update_book_ratings_on_delete(sender, instance, **kwargs):
     """Update book ratings when a comment is deleted."""
-    book = instance.book
-
-    # Recalculate ratings after deletion
-    ratings = book.comments.aggregate(
-        total_value=Sum("rating"), total_count=Count("rating")
-    )
-
-    book.total_rating_value = ratings["total_value"] or 0
-    book.total_rating_count = ratings["total_count"] or 0
-    book.save(update_fields=["total_rating_value", "total_rating_count"])
+    if sharded_counters_enabled():
+        add_rating_delta(instance.book_id, -instance.rating, -1)
+    else:
+        recompute_book_ratings(instance.book)
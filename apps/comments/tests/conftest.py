@@ -4,6 +4,7 @@ from apps.categories.tests.factories import CategoryFactory
 from apps.comments.models import Comment
 from apps.comments.tests.factories import CommentFactory
 from apps.accounts.tests.factories import AccountFactory
+from apps.books.models import RatingPrior
 from apps.books.tests.factories import BookFactory
 
 
@@ -35,3 +36,11 @@ def account_factory(db):
 def category_factory(db):
     """Get the CategoryFactory model class for testing model configuration."""
     return CategoryFactory
+
+
+@pytest.fixture(autouse=True)
+def forget_rating_prior():
+    """The prior row is cached per process; don't carry it across tests."""
+    RatingPrior.forget()
+    yield
+    RatingPrior.forget()
@@ -0,0 +1,78 @@
+import pytest
+from django.db.models.signals import post_delete
+from apps.books.models import RatingPrior
+from apps.books.ranking import bayesian_score
+from apps.comments.models import Comment
+from apps.comments.services import delete_accounts, delete_books
+
+
+@pytest.mark.unit
+def test_delete_accounts_applies_rating_deltas(
+    comment_factory, account_factory, book_factory
+):
+    """Deleting accounts removes their ratings from each affected book."""
+    prolific = account_factory.create(active=True)
+    other = account_factory.create(active=True)
+    first = book_factory.create()
+    second = book_factory.create(category=first.category)
+
+    comment_factory.create(account=prolific, book=first, rating=5)
+    comment_factory.create(account=prolific, book=second, rating=1)
+    comment_factory.create(account=other, book=first, rating=3)
+
+    deleted = delete_accounts([prolific.pk], chunk_size=1)
+    first.refresh_from_db()
+    second.refresh_from_db()
+    prior = RatingPrior.load()
+
+    assert deleted == 2
+    assert not type(prolific).objects.filter(pk=prolific.pk).exists()
+    assert (first.total_rating_value, first.total_rating_count) == (3, 1)
+    assert first.rating_score == pytest.approx(
+        bayesian_score(3, 1, prior.mean, prior.weight)
+    )
+    assert (second.total_rating_value, second.total_rating_count) == (0, 0)
+    assert second.rating_score == 0
+
+
+@pytest.mark.unit
+def test_delete_accounts_does_not_fire_comment_signals(
+    comment_factory, account_factory, book_factory
+):
+    """The per-comment post_delete receivers never run."""
+    account = account_factory.create(active=True)
+    category = book_factory.create().category
+    for _ in range(3):
+        comment_factory.create(
+            account=account, book=book_factory.create(category=category)
+        )
+
+    fired = []
+
+    def receiver(sender, **kwargs):
+        fired.append(kwargs["instance"])
+
+    post_delete.connect(receiver, sender=Comment)
+    try:
+        delete_accounts([account.pk])
+    finally:
+        post_delete.disconnect(receiver, sender=Comment)
+
+    assert fired == []
+    assert not Comment.objects.exists()
+
+
+@pytest.mark.unit
+def test_delete_books_removes_comments(comment_factory, book_factory):
+    """Deleting books clears their comments in chunks."""
+    book = book_factory.create()
+    kept = book_factory.create(category=book.category)
+    for _ in range(3):
+        comment_factory.create(book=book)
+    comment_factory.create(book=kept)
+
+    deleted = delete_books([book.pk], chunk_size=2)
+
+    assert deleted == 3
+    assert list(Comment.objects.values_list("book_id", flat=True)) == [kept.pk]
+    assert not type(book).objects.filter(pk=book.pk).exists()
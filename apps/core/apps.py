@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.core"
+
+    def ready(self):
+        from celery.signals import task_postrun, task_prerun, worker_process_shutdown
+        from . import metrics
+
+        task_prerun.connect(metrics.task_started)
+        task_postrun.connect(metrics.task_finished)
+        worker_process_shutdown.connect(metrics.process_shutdown)
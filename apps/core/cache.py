@@ -0,0 +1,63 @@
+from time import perf_counter
+
+from django.core.cache.backends.locmem import LocMemCache as BaseLocMemCache
+from django.core.cache.backends.redis import RedisCache as BaseRedisCache
+
+from . import metrics
+from .timing import current
+
+_missing = object()
+
+
+def _record(timings, hits, misses, seconds):
+    if timings is not None:
+        timings.record_cache(hits, misses, seconds)
+    if metrics.enabled():
+        if hits:
+            metrics.CACHE_HITS.inc(hits)
+        if misses:
+            metrics.CACHE_MISSES.inc(misses)
+
+
+class InstrumentedCacheMixin:
+    """
+    Count hits, misses and time of reads for the request's ``RequestTimings``
+    and the process-wide metrics.
+
+    With both off the only cost is a context variable and a setting lookup.
+    """
+
+    # Backends without their own get_many read through get(), already counted
+    native_get_many = False
+
+    def get(self, key, default=None, version=None):
+        timings = current()
+        if timings is None and not metrics.enabled():
+            return super().get(key, default, version)
+
+        started = perf_counter()
+        value = super().get(key, _missing, version)
+        hit = value is not _missing
+        _record(timings, int(hit), int(not hit), perf_counter() - started)
+        return value if hit else default
+
+    def get_many(self, keys, version=None):
+        if not self.native_get_many:
+            return super().get_many(keys, version)
+        timings = current()
+        if timings is None and not metrics.enabled():
+            return super().get_many(keys, version)
+
+        keys = list(keys)
+        started = perf_counter()
+        values = super().get_many(keys, version)
+        _record(timings, len(values), len(keys) - len(values), perf_counter() - started)
+        return values
+
+
+class RedisCache(InstrumentedCacheMixin, BaseRedisCache):
+    native_get_many = True
+
+
+class LocMemCache(InstrumentedCacheMixin, BaseLocMemCache):
+    pass
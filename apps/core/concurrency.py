@@ -0,0 +1,48 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def get_executor(name):
+    """
+    Return the bounded thread pool ``name`` from ``settings.ASYNC_EXECUTORS``.
+
+    Pools are created lazily in each process so forked workers never inherit
+    the parent's threads.
+    """
+    key = (name, os.getpid())
+    executor = _executors.get(key)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(key)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_EXECUTORS[name],
+                    thread_name_prefix=name,
+                )
+                _executors[key] = executor
+    return executor
+
+
+def _run(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Pool threads outlive requests, so apply the usual end-of-request
+        # connection handling (honours CONN_MAX_AGE) after every job
+        close_old_connections()
+
+
+async def run_in_executor(name, func, *args, **kwargs):
+    """Run blocking ``func`` in the pool ``name`` without blocking the loop."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(_run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(name), call)
@@ -0,0 +1,35 @@
+import logging
+
+from django.db import DatabaseError, transaction
+
+from .models import DeadLetter, OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def record(task_name, args, kwargs, error):
+    """Keep a task that failed for good. Never raises: it runs in failure paths."""
+    try:
+        return DeadLetter.objects.create(
+            task=task_name, args=list(args), kwargs=dict(kwargs), error=repr(error)
+        )
+    except DatabaseError:
+        logger.exception("Could not dead-letter %s%r", task_name, tuple(args))
+
+
+def replay(queryset=None):
+    """
+    Move dead letters back into the outbox and return how many were moved.
+
+    The relay publishes them like any other outbox message, so a replay
+    that races a broker outage is not lost.
+    """
+    queryset = DeadLetter.objects.all() if queryset is None else queryset
+    with transaction.atomic():
+        letters = list(queryset.select_for_update(skip_locked=True))
+        OutboxMessage.objects.bulk_create(
+            OutboxMessage(task=letter.task, args=letter.args, kwargs=letter.kwargs)
+            for letter in letters
+        )
+        DeadLetter.objects.filter(pk__in=[letter.pk for letter in letters]).delete()
+    return len(letters)
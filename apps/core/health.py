@@ -0,0 +1,183 @@
+import logging
+import math
+import os
+import threading
+from concurrent.futures import wait
+from time import monotonic, perf_counter
+
+from celery import current_app
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .concurrency import _run, get_executor
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+
+_probe_connections = {}
+
+
+def _probe_settings(settings_dict, vendor):
+    """
+    ``settings_dict`` with driver-level limits from ``HEALTH_CHECK["TIMEOUT"]``.
+
+    On PostgreSQL: ``connect_timeout``, a ``statement_timeout`` and
+    ``tcp_user_timeout``, so an unreachable server fails the probe instead of
+    pinning a pool thread until the kernel gives up on the TCP connection.
+    """
+    settings_dict = dict(settings_dict)
+    if vendor == "postgresql":
+        timeout = settings.HEALTH_CHECK["TIMEOUT"]
+        timeout_ms = int(timeout * 1000)
+        options = dict(settings_dict.get("OPTIONS", {}))
+        # libpq takes whole seconds here
+        options["connect_timeout"] = max(1, math.ceil(timeout))
+        options["tcp_user_timeout"] = timeout_ms
+        options["options"] = (
+            f"{options.get('options', '')} -c statement_timeout={timeout_ms}"
+        ).strip()
+        settings_dict["OPTIONS"] = options
+    return settings_dict
+
+
+def _probe_connection():
+    """This process's own connection for the database probe."""
+    conn = _probe_connections.get(os.getpid())
+    if conn is None:
+        wrapper = connections[DEFAULT_DB_ALIAS].__class__
+        settings_dict = _probe_settings(
+            connections.settings[DEFAULT_DB_ALIAS], wrapper.vendor
+        )
+        conn = wrapper(settings_dict, DEFAULT_DB_ALIAS)
+        # Used from whichever pool thread runs the probe, one probe at a time
+        conn.inc_thread_sharing()
+        _probe_connections[os.getpid()] = conn
+    return conn
+
+
+def probe_database():
+    conn = _probe_connection()
+    # A connection kept from an earlier probe may have been dropped by the
+    # server while idle; that alone must not make the worker unready
+    attempts = 2 if conn.connection is not None else 1
+    for attempt in range(attempts):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            return
+        except Exception:
+            conn.close()
+            if attempt == attempts - 1:
+                raise
+
+
+def probe_cache():
+    key = f"health:probe:{os.getpid()}"
+    token = str(perf_counter())
+    cache.set(key, token, 10)
+    if cache.get(key) != token:
+        raise RuntimeError("cache did not return the value just written")
+
+
+def probe_broker():
+    timeout = settings.HEALTH_CHECK["TIMEOUT"]
+    with current_app.connection_for_read(connect_timeout=timeout) as broker:
+        broker.ensure_connection(max_retries=1)
+
+
+PROBES = {
+    "database": probe_database,
+    "cache": probe_cache,
+    "broker": probe_broker,
+}
+
+
+def _timed(name, probe):
+    started = perf_counter()
+    try:
+        probe()
+    except Exception as e:
+        logger.warning("Readiness probe %s failed", name, exc_info=True)
+        result = {"status": ERROR, "error": type(e).__name__}
+    else:
+        result = {"status": OK}
+    result["latency_ms"] = round((perf_counter() - started) * 1000, 2)
+    return result
+
+
+# Probes past their deadline, still holding an ``io`` thread: name -> (future,
+# started). No new probe is submitted for that dependency until it returns.
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def check():
+    """
+    Run every probe in the ``io`` pool and wait at most ``HEALTH_CHECK["TIMEOUT"]``.
+
+    A probe still running at the deadline is reported as ``timeout``; it is
+    left to finish in the background rather than holding the request, and
+    the dependency keeps reporting ``timeout`` without a new probe until it
+    does, so a hung dependency ties up at most one thread per process.
+    """
+    timeout = settings.HEALTH_CHECK["TIMEOUT"]
+    executor = get_executor("io")
+    futures = {}
+    with _in_flight_lock:
+        for name, probe in PROBES.items():
+            pending = _in_flight.get(name)
+            if pending is not None and not pending[0].done():
+                futures[name] = pending
+            else:
+                future = executor.submit(_run, _timed, name, probe)
+                futures[name] = _in_flight[name] = (future, perf_counter())
+    wait([future for future, _ in futures.values()], timeout=timeout)
+
+    checks = {}
+    for name, (future, started) in futures.items():
+        if future.done():
+            checks[name] = future.result()
+        else:
+            logger.warning("Readiness probe %s timed out after %ss", name, timeout)
+            waited = max(timeout, perf_counter() - started)
+            checks[name] = {"status": TIMEOUT, "latency_ms": round(waited * 1000, 2)}
+    ready = all(result["status"] == OK for result in checks.values())
+    return {"status": OK if ready else "unavailable", "checks": checks}
+
+
+_lock = threading.Lock()
+_last = None
+
+
+def readiness():
+    """
+    ``check()``, reused for ``HEALTH_CHECK["CACHE_SECONDS"]`` within a process.
+
+    Load balancers poll every worker, so probes run at most once per interval
+    per process however often they ask; concurrent callers wait for the
+    probe in flight instead of starting their own.
+    """
+    global _last
+    with _lock:
+        if _last is not None:
+            checked_at, report = _last
+            if monotonic() - checked_at < settings.HEALTH_CHECK["CACHE_SECONDS"]:
+                return report
+        report = check()
+        _last = (monotonic(), report)
+        return report
+
+
+def reset():
+    """Forget the cached report, so the next ``readiness()`` probes again."""
+    global _last
+    with _lock:
+        _last = None
+    with _in_flight_lock:
+        _in_flight.clear()
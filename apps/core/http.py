@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+import urllib3
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Seconds allowed for connecting, and for the whole call unless overridden
+    "connect_timeout": 1.0,
+    "deadline": 3.0,
+    "pool_maxsize": 10,
+    # Consecutive failures that open the circuit, and how long it stays open
+    "failure_threshold": 5,
+    "reset_timeout": 30.0,
+}
+
+# Response bodies are read in chunks this size, checking the deadline between
+CHUNK_SIZE = 16 * 1024
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without calling the provider while its circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failures in a row the circuit opens and calls
+    fail immediately. Once ``reset_timeout`` has passed a single trial call is
+    let through; its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running:
+                return False
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning("Circuit opened after %s failures", self._failures)
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class HttpClient:
+    """
+    Outbound HTTP client for one provider.
+
+    Calls share a pooled ``requests.Session`` (recreated after fork), are
+    bounded by a per-call deadline and go through a circuit breaker so a
+    degraded provider fails fast instead of tying up workers. Timings and
+    short-circuited calls are published through ``apps.core.metrics``.
+    Options come from ``settings.OUTBOUND_HTTP[name]`` on top of
+    ``DEFAULTS``.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._pid = None
+        self._session = None
+        self._breaker = None
+
+    @property
+    def options(self):
+        return {**DEFAULTS, **settings.OUTBOUND_HTTP.get(self.name, {})}
+
+    @property
+    def breaker(self):
+        if self._breaker is None:
+            options = self.options
+            self._breaker = CircuitBreaker(
+                options["failure_threshold"], options["reset_timeout"]
+            )
+        return self._breaker
+
+    @property
+    def session(self):
+        # Pooled connections must not be shared with a forked parent
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_maxsize=self.options["pool_maxsize"])
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+                    self._pid = os.getpid()
+        return self._session
+
+    def request(self, method, url, deadline=None, **kwargs):
+        """
+        Send a request, failing with ``requests.Timeout`` past ``deadline``.
+
+        The deadline covers the whole call: the body is streamed and every
+        read gets only the time that is left, so a provider trickling bytes
+        cannot hold the worker. Server errors (5xx) count as failures for the
+        circuit breaker but the response is still returned to the caller.
+        """
+        if not self.breaker.allow():
+            if metrics.enabled():
+                metrics.OUTBOUND_SHORT_CIRCUITED.inc(provider=self.name)
+            raise CircuitOpenError(f"Circuit open for {self.name}")
+
+        options = self.options
+        deadline = deadline or options["deadline"]
+        timeout = (min(options["connect_timeout"], deadline), deadline)
+        started = time.monotonic()
+        outcome = "error"
+        try:
+            response = self.session.request(
+                method, url, timeout=timeout, stream=True, **kwargs
+            )
+            self._read_body(response, started, deadline)
+            outcome = "server_error" if response.status_code >= 500 else "ok"
+        finally:
+            # Also on unexpected errors, so a failed trial never leaves the
+            # circuit waiting for an outcome
+            if outcome == "ok":
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            if metrics.enabled():
+                metrics.OUTBOUND_DURATION.observe(
+                    time.monotonic() - started, provider=self.name, outcome=outcome
+                )
+        return response
+
+    def _read_body(self, response, started, deadline):
+        def remaining():
+            left = deadline - (time.monotonic() - started)
+            if left <= 0:
+                response.close()
+                raise requests.Timeout(
+                    f"{self.name} took over its {deadline}s deadline"
+                )
+            return left
+
+        # read1 returns whatever has arrived, so the clock is checked between
+        # reads, and each read may only block for the time that is left
+        sock = getattr(getattr(response.raw, "_connection", None), "sock", None)
+        chunks = []
+        try:
+            while True:
+                left = remaining()
+                if sock is not None:
+                    sock.settimeout(left)
+                chunk = response.raw.read1(CHUNK_SIZE, decode_content=True)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        except (OSError, urllib3.exceptions.HTTPError) as e:
+            remaining()
+            raise requests.ConnectionError(e) from e
+        remaining()
+        response._content = b"".join(chunks)
+        response._content_consumed = True
+        # Read to the end: the connection can go back to the pool
+        response.raw.release_conn()
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name):
+    """Return the shared ``HttpClient`` for ``name``."""
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.setdefault(name, HttpClient(name))
+    return client
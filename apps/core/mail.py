@@ -0,0 +1,324 @@
+import hashlib
+import json
+import logging
+import random
+import smtplib
+from functools import lru_cache
+
+import redis
+from celery import Task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import DatabaseError
+from django.template.loader import get_template
+
+from . import dead_letters
+from .redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "mail:outgoing"
+# Messages taken from the queue and not yet acknowledged
+PROCESSING_KEY = "mail:processing"
+LOCK_KEY = "mail:dispatch"
+BACKOFF_KEY = "mail:backoff"
+FAILURES_KEY = "mail:failures"
+IDEMPOTENCY_PREFIX = "mail:sent:"
+
+# Dead-lettered messages are replayed through this task
+SEND_MESSAGE_TASK = "apps.core.tasks.send_mail_message"
+
+_PENDING = "pending"
+_SENT = "sent"
+
+
+class MailInFlight(Exception):
+    """Another worker is queueing the same message right now."""
+
+
+class MailBackoff(Exception):
+    """Dispatch is paused after SMTP failures; queued mail is waiting."""
+
+
+# Failures that may clear up on their own: the SMTP relay, Redis or the
+# database being briefly unavailable (smtplib errors are OSErrors)
+TRANSIENT_ERRORS = (
+    OSError,
+    redis.RedisError,
+    DatabaseError,
+    MailInFlight,
+    MailBackoff,
+)
+
+
+@lru_cache(maxsize=None)
+def _template(name):
+    # Compiled once per worker process
+    return get_template(name)
+
+
+def render_message(template, context, subject, to):
+    """Build an email from ``<template>.txt`` with ``<template>.html`` attached."""
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=_template(f"{template}.txt").render(context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=to,
+    )
+    message.attach_alternative(
+        _template(f"{template}.html").render(context), "text/html"
+    )
+    return message
+
+
+def serialize(message):
+    return json.dumps(
+        {
+            "subject": message.subject,
+            "body": message.body,
+            "from_email": message.from_email,
+            "to": message.to,
+            "alternatives": [list(alt) for alt in message.alternatives],
+        }
+    )
+
+
+def deserialize(raw):
+    data = json.loads(raw)
+    alternatives = data.pop("alternatives")
+    message = EmailMultiAlternatives(**data)
+    for content, mimetype in alternatives:
+        message.attach_alternative(content, mimetype)
+    return message
+
+
+def message_key(message):
+    """Idempotency key of a rendered message: the same email is queued once."""
+    return hashlib.sha256(serialize(message).encode()).hexdigest()
+
+
+def is_permanent(error):
+    """True for SMTP errors about the message itself, which retrying cannot fix."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return (
+        isinstance(error, (smtplib.SMTPSenderRefused, smtplib.SMTPDataError))
+        and error.smtp_code >= 500
+    )
+
+
+def backoff(attempt, base, maximum):
+    """Exponential backoff with jitter: half the delay fixed, half random."""
+    delay = min(maximum, base * 2**attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def reject(raw, error):
+    """Dead-letter a serialized message the SMTP server refused."""
+    logger.warning("Dead-lettering undeliverable email: %s", error)
+    dead_letters.record(SEND_MESSAGE_TASK, [raw], {}, error)
+
+
+def deliver(messages, connection):
+    """
+    Send ``messages`` one by one over an open ``connection``.
+
+    Returns how many went out before the first failure, and that failure
+    (or ``None``) so callers can requeue exactly the unsent remainder.
+    """
+    for sent, message in enumerate(messages):
+        try:
+            connection.send_messages([message])
+        except Exception as e:
+            return sent, e
+    return len(messages), None
+
+
+class MailQueue:
+    """
+    Outgoing mail buffered in a Redis list and sent in batches.
+
+    Tasks ``enqueue`` rendered messages and then try to ``drain`` the queue.
+    One worker at a time holds the dispatch lock and sends everything queued,
+    ``MAIL_BATCH_SIZE`` messages at a time, over a single SMTP session. A
+    batch is moved to a processing list rather than popped, and each message
+    leaves it only once the server accepted or refused it; anything else puts
+    it back at the head of the queue. Without Redis messages are sent
+    immediately.
+
+    When the SMTP server fails, dispatch pauses for an exponentially growing,
+    jittered ``MAIL_BACKOFF``: tasks keep queueing at full speed instead of
+    each waiting on a dead connection, and get ``MailBackoff`` to retry on.
+    Messages the server refuses outright are dead-lettered so they cannot
+    block the queue.
+    """
+
+    def enqueue(self, message, idempotency_key=None):
+        """
+        Queue ``message`` and try to send the queue.
+
+        With an ``idempotency_key``, a message already queued under that key
+        within ``MAIL_IDEMPOTENCY_TTL`` is not queued again and ``False`` is
+        returned; if the same key is being queued elsewhere ``MailInFlight``
+        is raised so the caller retries later.
+
+        Sending failures are raised even though the message stays queued, so
+        tasks retry (and eventually dead-letter) while SMTP is down.
+        """
+        queued = idempotency_key is None or self._claim(idempotency_key)
+        if queued:
+            try:
+                self._enqueue(message)
+            except Exception:
+                if idempotency_key is not None:
+                    cache.delete(IDEMPOTENCY_PREFIX + idempotency_key)
+                raise
+            if idempotency_key is not None:
+                cache.set(
+                    IDEMPOTENCY_PREFIX + idempotency_key,
+                    _SENT,
+                    settings.MAIL_IDEMPOTENCY_TTL,
+                )
+        self.flush()
+        return queued
+
+    def _claim(self, key):
+        key = IDEMPOTENCY_PREFIX + key
+        if cache.add(key, _PENDING, settings.MAIL_DISPATCH_LOCK_TIMEOUT):
+            return True
+        if cache.get(key) == _PENDING:
+            raise MailInFlight(key)
+        return False
+
+    def _enqueue(self, message):
+        client = get_redis_client()
+        if client is None:
+            sent, error = deliver([message], get_connection())
+            if error and is_permanent(error):
+                reject(serialize(message), error)
+            elif error:
+                raise error
+            return
+        client.rpush(QUEUE_KEY, serialize(message))
+
+    def flush(self):
+        """``drain``, raising ``MailBackoff`` instead of skipping while paused."""
+        client = get_redis_client()
+        if client is None:
+            return
+        if client.exists(BACKOFF_KEY):
+            raise MailBackoff("Mail dispatch is paused after SMTP failures")
+        self.drain()
+
+    def drain(self, batch_size=None):
+        """Send queued mail unless another worker is already at it. Returns sent."""
+        client = get_redis_client()
+        if client is None or client.exists(BACKOFF_KEY):
+            return 0
+
+        batch_size = batch_size or settings.MAIL_BATCH_SIZE
+        lock = client.lock(LOCK_KEY, timeout=settings.MAIL_DISPATCH_LOCK_TIMEOUT)
+        sent = 0
+        # Mail queued while the previous holder was releasing the lock would
+        # otherwise wait for the periodic dispatch
+        while client.llen(QUEUE_KEY) and lock.acquire(blocking=False):
+            try:
+                sent += self._drain_locked(client, lock, batch_size)
+            except Exception:
+                self._back_off(client)
+                raise
+            finally:
+                lock.release()
+        if sent:
+            client.delete(FAILURES_KEY)
+        return sent
+
+    def _back_off(self, client):
+        failures = client.incr(FAILURES_KEY)
+        delay = backoff(failures - 1, settings.MAIL_BACKOFF, settings.MAIL_BACKOFF_MAX)
+        client.set(BACKOFF_KEY, failures, px=int(delay * 1000))
+
+    def _drain_locked(self, client, lock, batch_size):
+        # A batch left in the processing list belongs to a holder that died
+        # before acknowledging it: send it again rather than lose it
+        self._requeue(client)
+        # Opened before anything is taken from the queue, so an unreachable
+        # server leaves every message where it was
+        connection = get_connection()
+        connection.open()
+        sent = 0
+        try:
+            while True:
+                batch = self._take(client, batch_size)
+                if not batch:
+                    return sent
+                sent += self._send_batch(client, batch, connection)
+                lock.reacquire()
+        finally:
+            connection.close()
+
+    def _take(self, client, batch_size):
+        """Move up to ``batch_size`` messages to the processing list."""
+        pipe = client.pipeline(transaction=False)
+        for _ in range(batch_size):
+            pipe.lmove(QUEUE_KEY, PROCESSING_KEY, "LEFT", "RIGHT")
+        return [raw for raw in pipe.execute() if raw is not None]
+
+    def _requeue(self, client):
+        """Put unacknowledged messages back at the head of the queue, in order."""
+        while client.lmove(PROCESSING_KEY, QUEUE_KEY, "RIGHT", "LEFT") is not None:
+            pass
+
+    def _send_batch(self, client, batch, connection):
+        sent = 0
+        for raw in batch:
+            try:
+                connection.send_messages([deserialize(raw)])
+            except Exception as error:
+                if not is_permanent(error):
+                    self._requeue(client)
+                    raise
+                reject(raw, error)
+            else:
+                sent += 1
+            # Acknowledged once the server has accepted or refused it
+            client.lpop(PROCESSING_KEY)
+        return sent
+
+
+mail_queue = MailQueue()
+
+
+class MailTask(Task):
+    """
+    Base class for tasks that send one email.
+
+    Transient failures, including an SMTP outage met while draining the
+    queue, are retried with exponential backoff and full jitter; ``send``
+    queues each rendered message at most once, so neither retries nor a
+    duplicate publish send it twice. Tasks that still fail end up in the
+    dead-letter table. Results are not stored, and task messages are acked
+    only after the task ran, so a worker crash redelivers rather than drops.
+
+    Once queued in Redis an email stays there until the server takes it
+    (see ``MailQueue``): a task dead-lettered during a long outage has not
+    lost it, and replaying the task within ``MAIL_IDEMPOTENCY_TTL`` only
+    tries to send the queue again.
+    """
+
+    ignore_result = True
+    acks_late = True
+    reject_on_worker_lost = True
+    autoretry_for = TRANSIENT_ERRORS
+    max_retries = settings.MAIL_TASK_MAX_RETRIES
+    retry_backoff = settings.MAIL_TASK_RETRY_BACKOFF
+    retry_backoff_max = settings.MAIL_TASK_RETRY_BACKOFF_MAX
+    retry_jitter = True
+
+    def send(self, message):
+        """Queue ``message`` unless it was already queued. Returns ``False`` if so."""
+        return mail_queue.enqueue(message, idempotency_key=message_key(message))
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        dead_letters.record(self.name, args, kwargs, exc)
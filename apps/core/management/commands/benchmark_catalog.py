@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks import catalog
+
+
+class Command(BaseCommand):
+    help = "Benchmark the catalog endpoints at growing catalog sizes"
+
+    def add_arguments(self, parser):
+        catalog.add_arguments(parser)
+
+    def handle(self, *args, **options):
+        catalog.run(options, write=self.stdout.write)
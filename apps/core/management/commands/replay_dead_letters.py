@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from apps.core import dead_letters
+from apps.core.models import DeadLetter
+
+
+class Command(BaseCommand):
+    help = "List dead-lettered tasks or move them back into the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "ids",
+            nargs="*",
+            type=int,
+            help="Dead letters to replay (default: all)",
+        )
+        parser.add_argument(
+            "--task",
+            help="Only replay dead letters of this task name",
+        )
+        parser.add_argument(
+            "--list",
+            action="store_true",
+            help="Show matching dead letters without replaying them",
+        )
+
+    def handle(self, *args, **options):
+        queryset = DeadLetter.objects.all()
+        if options["ids"]:
+            queryset = queryset.filter(pk__in=options["ids"])
+        if options["task"]:
+            queryset = queryset.filter(task=options["task"])
+
+        if options["list"]:
+            for letter in queryset:
+                self.stdout.write(
+                    f"{letter.pk}\t{letter.failed_at:%Y-%m-%d %H:%M:%S}\t"
+                    f"{letter.task}\t{letter.error}"
+                )
+            return
+
+        replayed = dead_letters.replay(queryset)
+        self.stdout.write(
+            self.style.SUCCESS(f"Replayed {replayed} dead letters through the outbox")
+        )
@@ -1,18 +1,157 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
+import csv
+import io
+import multiprocessing
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from faker import Faker
+
 from apps.categories.tests.factories import CATEGORY_NAMES
-from apps.books.tests.factories import BookFactory
-from apps.accounts.tests.factories import AccountFactory
-from apps.comments.tests.factories import CommentFactory
 from apps.categories.models import Category
-from apps.books.models import Book
+from apps.books.models import Book, BookRatingShard, RatingPrior
+from apps.books.ranking import bayesian_score
 from apps.accounts.models import Account
 from apps.comments.models import Comment
-import random
+
+# Text is drawn from pools generated once per run: Faker per row would
+# dominate the run time at millions of rows
+POOL_SIZE = 2000
+PUBLISHED_FROM = date(2015, 1, 1)
+PUBLISHED_DAYS = 3650
+COMMENT_COLUMNS = ["rating", "content", "account_id", "book_id", "comment_date"]
+
+
+class SeedPlan:
+    """
+    Everything needed to generate any slice of the catalog on its own.
+
+    Each book draws from its own generator seeded with ``(seed, position)``,
+    so the data depends only on ``--seed`` and the counts, not on the batch
+    size or the number of worker processes.
+    """
+
+    def __init__(self, seed, books, comments, category_ids, account_ids):
+        self.seed = seed
+        self.books = books
+        self.comments = comments
+        self.category_ids = category_ids
+        self.account_ids = account_ids
+        self.prior = RatingPrior.load()
+
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.titles = [fake.sentence(nb_words=4) for _ in range(POOL_SIZE)]
+        self.descriptions = [fake.text(max_nb_chars=500) for _ in range(POOL_SIZE)]
+        self.authors = [fake.name() for _ in range(POOL_SIZE)]
+        self.publishers = [fake.company() for _ in range(POOL_SIZE)]
+        self.contents = [fake.paragraph(nb_sentences=3) for _ in range(POOL_SIZE)]
+
+    def comments_for(self, position):
+        """Comments of the book at ``position``: an even spread of the total."""
+        return (position + 1) * self.comments // self.books - (
+            position * self.comments // self.books
+        )
+
+    def generate(self, start, end):
+        """Unsaved books ``start:end`` with their totals, and their comments."""
+        books = []
+        comments = []
+        for position in range(start, end):
+            rng = random.Random((self.seed << 40) + position)
+            # Distinct readers per book keep (account, book) unique without
+            # asking the database
+            readers = rng.sample(self.account_ids, self.comments_for(position))
+            ratings = [rng.randint(1, 5) for _ in readers]
+            total = sum(ratings)
+            books.append(
+                Book(
+                    title=rng.choice(self.titles),
+                    description=rng.choice(self.descriptions),
+                    author_name=rng.choice(self.authors),
+                    publisher_name=rng.choice(self.publishers),
+                    published_date=PUBLISHED_FROM
+                    + timedelta(days=rng.randrange(PUBLISHED_DAYS)),
+                    unit_price=Decimal(rng.randrange(999, 10000)).scaleb(-2),
+                    photo_path=(
+                        f"https://picsum.photos/id/{rng.randint(1, 1000)}/200/300"
+                    ),
+                    total_rating_value=total,
+                    total_rating_count=len(ratings),
+                    rating_score=bayesian_score(
+                        total, len(ratings), self.prior.mean, self.prior.weight
+                    ),
+                    category_id=rng.choice(self.category_ids),
+                )
+            )
+            comments.append(
+                [
+                    (rating, rng.choice(self.contents), account_id)
+                    for rating, account_id in zip(ratings, readers)
+                ]
+            )
+        return books, comments
+
+
+def insert_comments(books, comments):
+    """
+    Insert comments for saved ``books``.
+
+    ``COPY`` on PostgreSQL, a raw ``executemany`` elsewhere: building model
+    instances and compiling ``bulk_create`` SQL costs more than the insert.
+    """
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    rows = [
+        (rating, content, account_id, book.pk, now)
+        for book, book_comments in zip(books, comments)
+        for rating, content, account_id in book_comments
+    ]
+    table = connection.ops.quote_name(Comment._meta.db_table)
+    columns = ", ".join(COMMENT_COLUMNS)
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        else:
+            placeholders = ", ".join(["%s"] * len(COMMENT_COLUMNS))
+            cursor.executemany(
+                f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", rows
+            )
+
+
+def seed_batch(plan, start, end, batch_size):
+    """Generate and insert books ``start:end``. Returns books and comments made."""
+    books, comments = plan.generate(start, end)
+    with transaction.atomic():
+        books = Book.objects.bulk_create(books, batch_size=batch_size)
+        insert_comments(books, comments)
+    return len(books), sum(len(book_comments) for book_comments in comments)
+
+
+_worker_plan = None
+
+
+def _init_worker(plan):
+    global _worker_plan
+    _worker_plan = plan
+
+
+def _seed_batch_in_worker(args):
+    return seed_batch(_worker_plan, *args)
 
 
 class Command(BaseCommand):
-    help = "Seed the database with initial data using factories"
+    help = "Seed the database with generated categories, books, accounts and comments"
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -38,41 +177,87 @@ class Command(BaseCommand):
             default=100,
             help="Number of comments to create (default: 100)",
         )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            help="Random seed; the same seed and counts give the same data",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Books generated and inserted per transaction (default: 5000)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes inserting batches in parallel; use with PostgreSQL "
+            "(default: 1)",
+        )
 
     def handle(self, *args, **options):
+        seed = options["seed"]
+        if seed is None:
+            seed = random.randrange(2**32)
+        if seed < 0:
+            raise CommandError("--seed must not be negative")
+        self.stdout.write(f"Seeding with --seed {seed}")
+
         if options["clear"]:
             self.stdout.write("Clearing existing data...")
-            Comment.objects.all().delete()
-            Book.objects.all().delete()
-            Category.objects.all().delete()
-            Account.objects.all().delete()
+            self._clear_data()
             self.stdout.write(self.style.SUCCESS("Data cleared successfully"))
 
-        with transaction.atomic():
-            self.stdout.write("Creating categories...")
-            categories = self._create_categories()
-
-            self.stdout.write("Creating books...")
-            books = self._create_books(options["books"], categories)
+        self.stdout.write("Creating categories...")
+        categories = self._create_categories()
 
-            self.stdout.write("Creating accounts...")
-            accounts = self._create_accounts(options["accounts"])
-
-            self.stdout.write("Creating comments...")
-            comments_created = self._create_comments(
-                options["comments"], accounts, books
-            )
+        self.stdout.write("Creating accounts...")
+        account_ids = self._create_accounts(options["accounts"], seed)
 
+        books = options["books"]
+        comments = options["comments"]
+        if comments > books * len(account_ids):
+            comments = books * len(account_ids)
             self.stdout.write(
-                self.style.SUCCESS(
-                    f"Successfully seeded database with:\n"
-                    f"  - {len(categories)} categories\n"
-                    f"  - {len(books)} books\n"
-                    f"  - {len(accounts)} accounts\n"
-                    f"  - {comments_created} comments"
+                self.style.WARNING(
+                    f"  Note: Only {comments} comments fit the unique constraint "
+                    f"(one comment per account-book pair)"
                 )
             )
 
+        self.stdout.write("Creating books and comments...")
+        plan = SeedPlan(seed, books, comments, [c.pk for c in categories], account_ids)
+        books_created, comments_created = self._seed_books(
+            plan, options["batch_size"], options["workers"]
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully seeded database with:\n"
+                f"  - {len(categories)} categories\n"
+                f"  - {books_created} books\n"
+                f"  - {len(account_ids)} accounts\n"
+                f"  - {comments_created} comments"
+            )
+        )
+
+    def _clear_data(self):
+        """
+        Empty the seeded tables without loading their rows into memory.
+
+        ``TRUNCATE ... CASCADE`` on PostgreSQL, plain ``DELETE`` statements
+        for the tables and everything referencing them elsewhere.
+        """
+        tables = [
+            model._meta.db_table
+            for model in (Comment, BookRatingShard, Book, Category, Account)
+        ]
+        statements = connection.ops.sql_flush(
+            no_style(), tables, reset_sequences=True, allow_cascade=True
+        )
+        connection.ops.execute_sql_flush(statements)
+
     def _create_categories(self):
         """Create one category for each name in CATEGORY_NAMES"""
         categories = []
@@ -89,19 +274,8 @@ class Command(BaseCommand):
 
         return categories
 
-    def _create_books(self, count, categories):
-        """Create books with random categories"""
-        books = []
-        for i in range(count):
-            category = random.choice(categories)
-            book = BookFactory.create(category=category)
-            books.append(book)
-
-        self.stdout.write(f"  Created {count} books")
-        return books
-
-    def _create_accounts(self, count):
-        """Create test accounts"""
+    def _create_accounts(self, count, seed):
+        """Create the admin, the regular user and generated accounts; return ids"""
         accounts = []
 
         # Create admin account
@@ -121,7 +295,7 @@ class Command(BaseCommand):
             self.stdout.write(
                 "  Created admin account: admin@bookstore.com (password: admin123)"
             )
-        accounts.append(admin)
+        accounts.append(admin.pk)
 
         # Create regular user
         user, created = Account.objects.get_or_create(
@@ -139,45 +313,63 @@ class Command(BaseCommand):
             self.stdout.write(
                 "  Created regular account: user@bookstore.com (password: user123)"
             )
-        accounts.append(user)
+        accounts.append(user.pk)
 
-        # Create additional accounts using factory
         additional_count = max(0, count - 2)
         if additional_count > 0:
-            additional_accounts = AccountFactory.create_batch(
-                additional_count, active=True, password="password123"
+            # One hash for every generated account: hashing per row would take
+            # longer than the rest of the seed
+            password = make_password("password123")
+            fake = Faker()
+            fake.seed_instance(seed)
+            names = [fake.name() for _ in range(min(additional_count, POOL_SIZE))]
+            rng = random.Random(seed)
+            # Numbered after the existing accounts so reruns do not collide
+            first = Account.objects.count()
+            created = Account.objects.bulk_create(
+                (
+                    Account(
+                        email=f"user{first + i}@example.com",
+                        phone=f"+1{rng.randrange(10**10):010d}",
+                        full_name=names[i % len(names)],
+                        birthday=date(1945, 1, 1)
+                        + timedelta(days=rng.randrange(365 * 60)),
+                        password=password,
+                        is_active=True,
+                    )
+                    for i in range(additional_count)
+                ),
+                batch_size=5000,
             )
-            accounts.extend(additional_accounts)
+            accounts.extend(account.pk for account in created)
             self.stdout.write(
                 f"  Created {additional_count} additional accounts (password: password123)"
             )
 
         return accounts
 
-    def _create_comments(self, count, accounts, books):
-        """Create comments ensuring unique account-book combinations"""
-        created_comments = 0
-        attempts = 0
-        max_attempts = count * 3  # Allow more attempts since we have unique constraint
+    def _seed_books(self, plan, batch_size, workers):
+        """Insert books and comments in batches, in parallel with ``workers``"""
+        batches = [
+            (start, min(plan.books, start + batch_size), batch_size)
+            for start in range(0, plan.books, batch_size)
+        ]
+        books_created = comments_created = 0
 
-        while created_comments < count and attempts < max_attempts:
-            attempts += 1
-            account = random.choice(accounts)
-            book = random.choice(books)
-
-            # Check if this combination already exists
-            if not Comment.objects.filter(account=account, book=book).exists():
-                CommentFactory.create(account=account, book=book)
-                created_comments += 1
-
-        self.stdout.write(f"  Created {created_comments} comments")
-
-        if created_comments < count:
-            self.stdout.write(
-                self.style.WARNING(
-                    f"  Note: Could only create {created_comments} comments due to "
-                    f"unique constraint (one comment per account-book pair)"
-                )
-            )
+        if workers <= 1:
+            results = (seed_batch(plan, *batch) for batch in batches)
+            for books, comments in results:
+                books_created += books
+                comments_created += comments
+                self.stdout.write(f"  Created {books_created}/{plan.books} books")
+            return books_created, comments_created
 
-        return created_comments
+        # Forked workers must open their own connections
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with context.Pool(workers, _init_worker, (plan,)) as pool:
+            for books, comments in pool.imap_unordered(_seed_batch_in_worker, batches):
+                books_created += books
+                comments_created += comments
+                self.stdout.write(f"  Created {books_created}/{plan.books} books")
+        return books_created, comments_created
@@ -0,0 +1,77 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from apps.core.models import SlowQuery
+
+ORDERINGS = {
+    "total": F("total_ms").desc(),
+    "max": F("max_ms").desc(),
+    "calls": F("calls").desc(),
+    "mean": (F("total_ms") / F("calls")).desc(),
+}
+
+
+class Command(BaseCommand):
+    help = "Show recorded slow queries aggregated by fingerprint and view"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Number of entries to show (default: 20)",
+        )
+        parser.add_argument(
+            "--order",
+            choices=ORDERINGS,
+            default="total",
+            help="Sort by total, max or mean time, or by calls (default: total)",
+        )
+        parser.add_argument(
+            "--view",
+            help="Only show queries run by views whose path contains this",
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Print the latest sampled EXPLAIN of each entry",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete every recorded entry instead of reporting",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} entries"))
+            return
+
+        queryset = SlowQuery.objects.filter(calls__gt=0)
+        if options["view"]:
+            queryset = queryset.filter(view__contains=options["view"])
+        entries = queryset.order_by(ORDERINGS[options["order"]])[: options["limit"]]
+
+        if not entries:
+            self.stdout.write("No slow queries recorded")
+            return
+
+        for entry in entries:
+            self.stdout.write(
+                f"{entry.calls:>6} calls  total {entry.total_ms:10.1f} ms  "
+                f"mean {entry.mean_ms:8.1f} ms  max {entry.max_ms:8.1f} ms  "
+                f"last {entry.last_seen:%Y-%m-%d %H:%M:%S}"
+            )
+            self.stdout.write(f"  view: {entry.view}")
+            self.stdout.write(f"  {entry.fingerprint}")
+            if options["plans"]:
+                if entry.plan is None:
+                    self.stdout.write("  plan: not sampled yet")
+                else:
+                    self.stdout.write(
+                        f"  plan ({entry.plan_captured_at:%Y-%m-%d %H:%M:%S}):"
+                    )
+                    self.stdout.write(json.dumps(entry.plan, indent=2))
+            self.stdout.write("")
@@ -0,0 +1,403 @@
+import fcntl
+import glob
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from time import monotonic, perf_counter
+
+from django.conf import settings
+from kombu.exceptions import ChannelError
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# File layout: 4-byte used length, 4 bytes padding, then entries of a 4-byte
+# key length, the UTF-8 key padded to 8 bytes, and a float64 value
+_HEADER = 8
+_INITIAL_SIZE = 64 * 1024
+
+
+def _padded(length):
+    return length + (-length % 8)
+
+
+def _entries(data, used):
+    position = _HEADER
+    while position < used:
+        (length,) = struct.unpack_from("i", data, position)
+        start = position + 4
+        end = start + length
+        key = bytes(data[start:end]).decode()
+        position = start + _padded(length)
+        (value,) = struct.unpack_from("d", data, position)
+        yield key, value, position
+        position += 8
+
+
+class ValueFile:
+    """
+    Float values by key in a memory-mapped file written by one process.
+
+    An entry is written in full before the used length in the header covers
+    it, so other processes can read the file at any time without locks.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._file = open(path, "a+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            size = _INITIAL_SIZE
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+        (self._used,) = struct.unpack_from("i", self._map, 0)
+        if self._used == 0:
+            self._used = _HEADER
+            struct.pack_into("i", self._map, 0, self._used)
+        self._positions = {
+            key: position for key, _, position in _entries(self._map, self._used)
+        }
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def add(self, key, amount):
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = self._append(key)
+            (value,) = struct.unpack_from("d", self._map, position)
+            struct.pack_into("d", self._map, position, value + amount)
+
+    def _append(self, key):
+        encoded = key.encode()
+        size = 4 + _padded(len(encoded)) + 8
+        while self._used + size > len(self._map):
+            capacity = len(self._map) * 2
+            self._map.close()
+            self._file.truncate(capacity)
+            self._map = mmap.mmap(self._file.fileno(), capacity)
+
+        struct.pack_into(
+            f"i{_padded(len(encoded))}sd",
+            self._map,
+            self._used,
+            len(encoded),
+            encoded,
+            0,
+        )
+        position = self._used + 4 + _padded(len(encoded))
+        self._used += size
+        struct.pack_into("i", self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+
+_files = {}
+_files_lock = threading.Lock()
+
+
+def enabled():
+    return settings.METRICS["ENABLED"]
+
+
+def _value_file():
+    """This process's file in ``METRICS["DIR"]``; a new one after ``fork()``."""
+    directory = settings.METRICS["DIR"]
+    key = (directory, os.getpid())
+    value_file = _files.get(key)
+    if value_file is None:
+        with _files_lock:
+            value_file = _files.get(key)
+            if value_file is None:
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"{os.getpid()}.db")
+                value_file = _files[key] = ValueFile(path)
+    return value_file
+
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())], separators=(",", ":"))
+
+
+def _read(path):
+    """``[(key, value)]`` stored in the file at ``path``."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER:
+        return []
+    (used,) = struct.unpack_from("i", data, 0)
+    return [(key, value) for key, value, _ in _entries(data, min(used, len(data)))]
+
+
+def collect():
+    """Values summed by key over every process's file, dead workers included."""
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(settings.METRICS["DIR"], "*.db")):
+        try:
+            values = _read(path)
+        except OSError:
+            continue
+        for key, value in values:
+            totals[key] += value
+    return totals
+
+
+def mark_process_dead(pid):
+    """
+    Fold the values of process ``pid`` into ``dead.db`` and delete its file.
+
+    Called when a gunicorn worker or Celery child exits, so recycled workers
+    don't leave a file each behind for every scrape to read. A lock file
+    serialises processes exiting at the same time.
+    """
+    directory = settings.METRICS["DIR"]
+    path = os.path.join(directory, f"{pid}.db")
+    if not os.path.exists(path):
+        return
+    with open(os.path.join(directory, "dead.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead = ValueFile(os.path.join(directory, "dead.db"))
+        try:
+            for key, value in _read(path):
+                dead.add(key, value)
+        finally:
+            dead.close()
+        os.remove(path)
+        _files.pop((directory, pid), None)
+
+
+def process_shutdown(pid=None, **kwargs):
+    """Celery's ``worker_process_shutdown``: fold the exiting child's values."""
+    if enabled():
+        mark_process_dead(pid or os.getpid())
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+
+    def inc(self, amount=1, **labels):
+        _value_file().add(_key(self.name, labels), amount)
+
+    def samples(self, totals):
+        for (name, labels), value in sorted(totals.items()):
+            if name == self.name:
+                yield name, labels, value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        values = _value_file()
+        index = bisect_left(self.buckets, value)
+        le = str(self.buckets[index]) if index < len(self.buckets) else "+Inf"
+        values.add(_key(f"{self.name}_bucket", {**labels, "le": le}), 1)
+        values.add(_key(f"{self.name}_sum", labels), value)
+        values.add(_key(f"{self.name}_count", labels), 1)
+
+    def samples(self, totals):
+        # Buckets are stored per interval and exposed cumulatively
+        series = defaultdict(dict)
+        for (name, labels), value in totals.items():
+            if name == f"{self.name}_bucket":
+                labels = dict(labels)
+                le = labels.pop("le")
+                series[tuple(sorted(labels.items()))][le] = value
+
+        for labels, counts in sorted(series.items()):
+            cumulative = 0
+            for bound in [*map(str, self.buckets), "+Inf"]:
+                cumulative += counts.get(bound, 0)
+                yield f"{self.name}_bucket", (*labels, ("le", bound)), cumulative
+            yield f"{self.name}_sum", labels, totals.get((f"{self.name}_sum", labels))
+            yield f"{self.name}_count", labels, cumulative
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route name, method and status",
+    LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter("db_queries_total", "Database queries by route name")
+CACHE_HITS = Counter("cache_hits_total", "Cache reads that found a value")
+CACHE_MISSES = Counter("cache_misses_total", "Cache reads that found nothing")
+THROTTLE_REJECTIONS = Counter(
+    "throttle_rejections_total", "Requests rejected by a token bucket, by scope"
+)
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time by task name and final state",
+    TASK_BUCKETS,
+)
+OUTBOUND_DURATION = Histogram(
+    "outbound_request_duration_seconds",
+    "Outbound HTTP call time by provider and outcome (ok, server_error, error)",
+    LATENCY_BUCKETS,
+)
+OUTBOUND_SHORT_CIRCUITED = Counter(
+    "outbound_short_circuited_total",
+    "Outbound HTTP calls refused by an open circuit, by provider",
+)
+
+REGISTRY = [
+    REQUEST_LATENCY,
+    DB_QUERIES,
+    CACHE_HITS,
+    CACHE_MISSES,
+    THROTTLE_REJECTIONS,
+    TASK_DURATION,
+    OUTBOUND_DURATION,
+    OUTBOUND_SHORT_CIRCUITED,
+]
+
+
+_task_started = {}
+
+
+def task_started(task_id=None, **kwargs):
+    _task_started[task_id] = perf_counter()
+
+
+def task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None and enabled():
+        TASK_DURATION.observe(
+            perf_counter() - started, task=task.name, state=state or "UNKNOWN"
+        )
+
+
+_queue_lock = threading.Lock()
+_queue_lengths = None
+
+
+def queue_lengths():
+    """
+    ``_read_queue_lengths()``, reused for ``METRICS["QUEUE_CACHE_SECONDS"]``.
+
+    Each probe opens a broker connection; concurrent scrapes wait for the one
+    in flight instead of starting their own.
+    """
+    global _queue_lengths
+    with _queue_lock:
+        if _queue_lengths is not None:
+            checked_at, lengths = _queue_lengths
+            if monotonic() - checked_at < settings.METRICS["QUEUE_CACHE_SECONDS"]:
+                return lengths
+        lengths = _read_queue_lengths()
+        _queue_lengths = (monotonic(), lengths)
+        return lengths
+
+
+def reset_queue_lengths():
+    """Forget the cached queue lengths, so the next scrape probes the broker."""
+    global _queue_lengths
+    with _queue_lock:
+        _queue_lengths = None
+
+
+def _read_queue_lengths():
+    """Messages waiting in each of ``METRICS["QUEUES"]``, or ``None`` if unreachable."""
+    from celery import current_app
+
+    lengths = {}
+    try:
+        with current_app.connection_for_read() as connection:
+            connection.ensure_connection(max_retries=1)
+            channel = connection.default_channel
+            for queue in settings.METRICS["QUEUES"]:
+                try:
+                    declared = channel.queue_declare(queue=queue, passive=True)
+                    lengths[queue] = declared.message_count
+                except ChannelError:
+                    # Never declared, or emptied and removed (Redis): nothing waits
+                    lengths[queue] = 0
+    except Exception:
+        logger.warning("Could not read queue lengths from the broker", exc_info=True)
+        return None
+    return lengths
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _family(lines, name, kind, documentation, samples):
+    lines.append(f"# HELP {name} {documentation}")
+    lines.append(f"# TYPE {name} {kind}")
+    for sample, labels, value in samples:
+        lines.append(f"{sample}{_format_labels(labels)} {float(value or 0)!r}")
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    totals = {}
+    for key, value in collect().items():
+        name, labels = json.loads(key)
+        totals[(name, tuple(tuple(label) for label in labels))] = value
+
+    lines = []
+    for metric in REGISTRY:
+        _family(
+            lines,
+            metric.name,
+            metric.kind,
+            metric.documentation,
+            metric.samples(totals),
+        )
+
+    hits = sum(v for (name, _), v in totals.items() if name == CACHE_HITS.name)
+    misses = sum(v for (name, _), v in totals.items() if name == CACHE_MISSES.name)
+    ratio = hits / (hits + misses) if hits + misses else 0
+    _family(
+        lines,
+        "cache_hit_ratio",
+        "gauge",
+        "Share of cache reads that were hits",
+        [("cache_hit_ratio", (), ratio)],
+    )
+
+    lengths = queue_lengths()
+    _family(
+        lines,
+        "celery_broker_up",
+        "gauge",
+        "Whether the broker answered the queue length probe",
+        [("celery_broker_up", (), int(lengths is not None))],
+    )
+    _family(
+        lines,
+        "celery_queue_length",
+        "gauge",
+        "Messages waiting in each Celery queue",
+        [
+            ("celery_queue_length", (("queue", queue),), length)
+            for queue, length in (lengths or {}).items()
+        ],
+    )
+    return "\n".join(lines) + "\n"
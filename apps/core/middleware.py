@@ -0,0 +1,377 @@
+import logging
+import random
+from contextlib import ExitStack
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.module_loading import import_string
+from djangorestframework_camel_case.settings import api_settings
+from djangorestframework_camel_case.util import underscoreize
+
+from . import metrics, profiling
+from .queries import NPlusOneError, QueryLog
+from .slow_queries import SlowQueryLog
+from .timing import RequestTimings, current
+
+logger = logging.getLogger(__name__)
+
+
+class CamelCaseQueryMiddleware:
+    """
+    Snake-case query parameter names, like ``CamelCaseMiddleWare``.
+
+    The upstream middleware is sync-only, which makes Django run everything
+    beneath it, async views included, through a thread under ASGI. This one
+    runs natively in either mode.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.underscoreize_query(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.underscoreize_query(request)
+        return await self.get_response(request)
+
+    def underscoreize_query(self, request):
+        request.GET = underscoreize(request.GET, **api_settings.JSON_UNDERSCOREIZE)
+
+
+class BrowserMiddleware:
+    """
+    Run ``BROWSER_MIDDLEWARE`` only for requests outside ``API_PATH_PREFIXES``.
+
+    Sessions, CSRF cookies, ``request.user`` and messages serve the admin;
+    JWT-authenticated API calls skip the whole chain with one prefix check.
+    The nested middleware's ``process_view`` and ``process_exception`` hooks
+    are forwarded, since Django only calls those of ``MIDDLEWARE`` entries.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefixes = tuple(settings.API_PATH_PREFIXES)
+        self.view_hooks = []
+        self.exception_hooks = []
+
+        handler = get_response
+        for path in reversed(settings.BROWSER_MIDDLEWARE):
+            middleware = import_string(path)(handler)
+            if hasattr(middleware, "process_view"):
+                self.view_hooks.insert(0, middleware.process_view)
+            if hasattr(middleware, "process_exception"):
+                self.exception_hooks.append(middleware.process_exception)
+            handler = middleware
+        self.browser_handler = handler
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def is_api(self, request):
+        return request.path_info.startswith(self.prefixes)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if self.is_api(request):
+            return self.get_response(request)
+        return self.browser_handler(request)
+
+    async def __acall__(self, request):
+        if self.is_api(request):
+            return await self.get_response(request)
+        return await self.browser_handler(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_api(request):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_exception(self, request, exception):
+        if self.is_api(request):
+            return None
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+class ServerTimingMiddleware:
+    """
+    Time sampled requests: DB, cache, view and render time.
+
+    Each sampled request gets a JSON log line on ``apps.core.timing``, and a
+    ``Server-Timing`` header if the caller is staff (anyone with ``PUBLIC``),
+    since it tells outsiders how close a request comes to the DB and cache.
+    ``SERVER_TIMING["SAMPLE_RATE"]`` is the fraction of requests timed; with
+    ``ENABLED`` off the middleware is not loaded at all. Under ASGI, queries
+    run in worker threads and are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = settings.SERVER_TIMING
+        if not options["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.sample_rate = options["SAMPLE_RATE"]
+        self.public = options["PUBLIC"]
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = timings.activate()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            timings.deactivate(token)
+        return self.report(request, response, timings)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = timings.activate()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timings.deactivate(token)
+        return self.report(request, response, timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = current()
+        if timings is not None:
+            timings.start_view()
+
+    def process_template_response(self, request, response):
+        timings = current()
+        if timings is not None:
+            timings.start_render()
+            response.add_post_render_callback(lambda _: timings.finish_render())
+        return response
+
+    def report(self, request, response, timings):
+        timings.finish()
+        # DRF copies the user it authenticated onto the Django request
+        user = getattr(request, "user", None)
+        if self.public or getattr(user, "is_staff", False):
+            response["Server-Timing"] = timings.header()
+        timings.log(request, response)
+        return response
+
+
+class QueryCounter:
+    """``execute_wrapper`` that only counts queries."""
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Record request latency and DB queries per route name for ``/api/metrics/``.
+
+    Routes are labelled by URL name so the series stay bounded; unresolved
+    paths share the ``unmatched`` label. Not loaded when ``METRICS["ENABLED"]``
+    is off. Under ASGI, queries run in worker threads and are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics.enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = perf_counter()
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        self.record(request, response, perf_counter() - started, counter.queries)
+        return response
+
+    async def __acall__(self, request):
+        started = perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, perf_counter() - started, 0)
+        return response
+
+    def record(self, request, response, seconds, queries):
+        match = request.resolver_match
+        route = (match.url_name if match else None) or "unmatched"
+        metrics.REQUEST_LATENCY.observe(
+            seconds, route=route, method=request.method, status=response.status_code
+        )
+        if queries:
+            metrics.DB_QUERIES.inc(queries, route=route)
+
+
+class QueryInspectionMiddleware:
+    """
+    Flag requests that repeat one query shape, the signature of N+1 access.
+
+    A fingerprint run ``QUERY_INSPECTION["REPEAT_THRESHOLD"]`` times in one
+    request is logged, or raised as ``NPlusOneError`` with ``RAISE`` (the
+    test settings). Meant for development and tests; not loaded unless
+    ``ENABLED``. Under ASGI, queries run in worker threads and are not seen.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = settings.QUERY_INSPECTION
+        if not options["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.threshold = options["REPEAT_THRESHOLD"]
+        self.raise_errors = options["RAISE"]
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        log = QueryLog()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            response = self.get_response(request)
+        self.inspect(request, log)
+        return response
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def inspect(self, request, log):
+        repeated = log.repeated(self.threshold)
+        if not repeated:
+            return
+        shape, count = repeated[0]
+        message = (
+            f"{request.method} {request.path} ran {count} queries shaped like: "
+            f"{log.examples[shape]}"
+        )
+        if self.raise_errors:
+            raise NPlusOneError(message)
+        logger.warning("Possible N+1: %s", message)
+
+
+class SlowQueryMiddleware:
+    """
+    Log and record statements slower than ``SLOW_QUERIES["THRESHOLD_MS"]``.
+
+    Each slow statement is logged with the view that ran it. After the
+    response, one Celery task per request aggregates them by fingerprint
+    and captures an ``EXPLAIN`` for ``EXPLAIN_SAMPLE_RATE`` of them. Not
+    loaded unless ``ENABLED``. Under ASGI, queries run in worker threads and
+    are not seen.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERIES["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        log = SlowQueryLog(request)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(log))
+                return self.get_response(request)
+        finally:
+            log.flush()
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+
+class ProfilingMiddleware:
+    """
+    Profile requests that carry a valid ``X-Profile`` token from an admin.
+
+    Tokens come from ``/api/profiles/token/``; the profile of a request is
+    stored under the id in its ``X-Profile-Id`` response header. Requests
+    without the header pay one dictionary lookup. Under ASGI, requests are
+    never profiled.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = request.META.get(profiling.META_KEY)
+        if token is None or profiling.admin_for(token) is None:
+            return self.get_response(request)
+        return profiling.profile(request, self.get_response)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
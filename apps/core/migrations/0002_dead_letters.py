@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeadLetter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task", models.CharField(max_length=255)),
+                ("args", models.JSONField(default=list)),
+                ("kwargs", models.JSONField(default=dict)),
+                ("error", models.TextField(blank=True)),
+                ("failed_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "dead_letters",
+                "ordering": ["id"],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_dead_letters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("digest", models.CharField(max_length=64)),
+                ("fingerprint", models.TextField()),
+                ("view", models.CharField(max_length=255)),
+                ("example", models.TextField()),
+                ("calls", models.PositiveIntegerField(default=0)),
+                ("total_ms", models.FloatField(default=0)),
+                ("max_ms", models.FloatField(default=0)),
+                ("plan", models.JSONField(null=True)),
+                ("plan_captured_at", models.DateTimeField(null=True)),
+                ("first_seen", models.DateTimeField(auto_now_add=True)),
+                ("last_seen", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "db_table": "slow_queries",
+                "unique_together": {("digest", "view")},
+            },
+        ),
+    ]
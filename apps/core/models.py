@@ -1 +1,80 @@
-# Create your models here.
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """
+    A Celery task to publish once the transaction that wrote it commits.
+
+    Rows are written alongside the business change and published by the
+    ``relay_outbox`` task, so request handlers never talk to the broker.
+    """
+
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "outbox_messages"
+        indexes = [models.Index(fields=["available_at", "id"])]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk}"
+
+
+class DeadLetter(models.Model):
+    """
+    A task that failed for good, kept for inspection and replay.
+
+    ``replay_dead_letters`` moves rows back into the outbox once the cause
+    (a bad relay setting, a template error, ...) is fixed.
+    """
+
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    failed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "dead_letters"
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk}"
+
+
+class SlowQuery(models.Model):
+    """
+    Slow statements of one shape from one view, aggregated.
+
+    Rows are upserted by the ``record_slow_queries`` task; ``plan`` holds the
+    latest sampled ``EXPLAIN``. See ``slow_query_report``.
+    """
+
+    digest = models.CharField(max_length=64)
+    fingerprint = models.TextField()
+    view = models.CharField(max_length=255)
+    example = models.TextField()
+    calls = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    plan = models.JSONField(null=True)
+    plan_captured_at = models.DateTimeField(null=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "slow_queries"
+        unique_together = ["digest", "view"]
+
+    def __str__(self):
+        return f"{self.view}: {self.fingerprint[:60]}"
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.calls if self.calls else 0
@@ -0,0 +1,63 @@
+import logging
+from datetime import timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(task, *args, **kwargs):
+    """
+    Record ``task.delay(*args, **kwargs)`` in the outbox.
+
+    Call it inside the transaction that makes the change the task reacts to:
+    the task is published only if that transaction commits, and publishing
+    happens later in ``relay``, never in the request.
+    """
+    return OutboxMessage.objects.create(task=task.name, args=args, kwargs=kwargs)
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(2**attempts, settings.OUTBOX_MAX_BACKOFF))
+
+
+def relay(batch_size=None):
+    """
+    Publish due outbox messages in id order and delete them.
+
+    Rows are locked with ``SKIP LOCKED`` so several relays can run at once.
+    A message that fails to publish is retried with exponential backoff.
+    Delivery is at-least-once: a crash between publishing and committing
+    publishes the batch again. Returns the number published.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    published = []
+
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(available_at__lte=timezone.now())
+            .order_by("id")[:batch_size]
+        )
+        for message in messages:
+            try:
+                current_app.send_task(
+                    message.task, args=message.args, kwargs=message.kwargs
+                )
+            except Exception as e:
+                logger.warning("Could not publish %s", message, exc_info=True)
+                message.attempts += 1
+                message.last_error = str(e)
+                message.available_at = timezone.now() + _backoff(message.attempts)
+                message.save(update_fields=["attempts", "last_error", "available_at"])
+            else:
+                published.append(message.pk)
+
+        OutboxMessage.objects.filter(pk__in=published).delete()
+
+    return len(published)
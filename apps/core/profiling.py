@@ -0,0 +1,156 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+
+logger = logging.getLogger(__name__)
+
+# Request header carrying a token from ``make_token``
+HEADER = "X-Profile"
+META_KEY = "HTTP_X_PROFILE"
+# Response header naming the stored profile
+ID_HEADER = "X-Profile-Id"
+
+_SALT = "apps.core.profiling"
+_ID = re.compile(r"^[\w-]+$")
+
+# tracemalloc is process-wide, so one profiled request at a time per process
+_lock = threading.Lock()
+
+
+def make_token(account):
+    """A signed token that lets ``account`` profile requests for ``TOKEN_MAX_AGE``."""
+    return signing.dumps({"account": account.pk}, salt=_SALT)
+
+
+def admin_for(token):
+    """The active admin a valid, unexpired ``token`` was issued to, or ``None``."""
+    try:
+        payload = signing.loads(
+            token, salt=_SALT, max_age=settings.PROFILING["TOKEN_MAX_AGE"]
+        )
+    except signing.BadSignature:
+        return None
+    return (
+        get_user_model()
+        .objects.filter(pk=payload.get("account"), is_admin=True, is_active=True)
+        .first()
+    )
+
+
+def profile(request, get_response):
+    """
+    Run ``get_response(request)`` under cProfile and tracemalloc.
+
+    The pstats dump and a text summary are written to ``PROFILING["DIR"]``
+    and the response names them in ``X-Profile-Id``. If another request is
+    being profiled in this process, this one runs unprofiled.
+    """
+    if not _lock.acquire(blocking=False):
+        return get_response(request)
+    try:
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start(settings.PROFILING["TRACEMALLOC_FRAMES"])
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        started = perf_counter()
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+            elapsed = perf_counter() - started
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+    finally:
+        _lock.release()
+
+    profile_id = _save(request, response, profiler, snapshot, elapsed, peak)
+    response[ID_HEADER] = profile_id
+    return response
+
+
+def _save(request, response, profiler, snapshot, elapsed, peak):
+    directory = settings.PROFILING["DIR"]
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    top = settings.PROFILING["TOP"]
+
+    summary = io.StringIO()
+    summary.write(
+        f"{request.method} {request.get_full_path()} -> {response.status_code}\n"
+        f"wall {elapsed * 1000:.1f} ms, peak traced memory {peak / 1024:.1f} KiB\n\n"
+    )
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(top)
+    summary.write(f"Top {top} allocation sites:\n")
+    for stat in snapshot.statistics("lineno")[:top]:
+        summary.write(f"{stat}\n")
+
+    profiler.dump_stats(os.path.join(directory, f"{profile_id}.prof"))
+    with open(os.path.join(directory, f"{profile_id}.txt"), "w") as f:
+        f.write(summary.getvalue())
+    logger.info("Profiled %s %s as %s", request.method, request.path, profile_id)
+    _prune()
+    return profile_id
+
+
+def _prune():
+    """Delete profiles beyond the newest ``KEEP`` or older than ``MAX_AGE``."""
+    cutoff = time.time() - settings.PROFILING["MAX_AGE"]
+    for index, stored in enumerate(list_profiles()):
+        if index < settings.PROFILING["KEEP"] and stored["created_at"] >= cutoff:
+            continue
+        for extension in ("prof", "txt"):
+            path = os.path.join(
+                settings.PROFILING["DIR"], f"{stored['id']}.{extension}"
+            )
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Pruned concurrently by another worker
+                pass
+
+
+def list_profiles():
+    """
+    ``[{"id", "created_at", "size"}]`` of stored profiles, newest first.
+
+    Only profiles in this host's ``PROFILING["DIR"]`` are seen, unless it is
+    a shared volume.
+    """
+    directory = settings.PROFILING["DIR"]
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for name in names:
+        profile_id, extension = os.path.splitext(name)
+        if extension == ".txt":
+            stat = os.stat(os.path.join(directory, name))
+            profiles.append(
+                {"id": profile_id, "created_at": stat.st_mtime, "size": stat.st_size}
+            )
+    return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+
+def profile_path(profile_id, extension):
+    """Path of a stored profile file, or ``None`` if there is no such profile."""
+    if not _ID.match(profile_id):
+        return None
+    path = os.path.join(settings.PROFILING["DIR"], f"{profile_id}.{extension}")
+    return path if os.path.exists(path) else None
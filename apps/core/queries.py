@@ -0,0 +1,74 @@
+import re
+from collections import Counter
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+# IN lists and multi-row VALUES vary in length with the data, not the code
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+
+
+class NPlusOneError(Exception):
+    """A request ran the same query shape often enough to look like N+1."""
+
+
+def fingerprint(sql):
+    """
+    The shape of a statement: literals, placeholders and lists collapsed.
+
+    Queries that differ only in the row they fetch share a fingerprint, so
+    one fingerprint repeated within a request is the N+1 signature.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _LIST.sub("(?)", sql)
+    sql = _ROWS.sub("(?)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryLog:
+    """``execute_wrapper`` that counts statements per fingerprint."""
+
+    def __init__(self):
+        self.fingerprints = Counter()
+        self.examples = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = fingerprint(sql)
+        self.fingerprints[shape] += 1
+        self.examples.setdefault(shape, sql)
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        """``[(fingerprint, count)]`` run at least ``threshold`` times, most first."""
+        return [
+            (shape, count)
+            for shape, count in self.fingerprints.most_common()
+            if count >= threshold and not shape.startswith(("SAVEPOINT", "RELEASE"))
+        ]
+
+
+def query_budget(queries):
+    """
+    Declare the most queries a view may run per request.
+
+    Works on view classes and function views alike. Every routed view must
+    declare one; ``apps/core/tests/test_query_budgets.py`` enforces them.
+    """
+
+    def declare(view):
+        view.query_budget = queries
+        return view
+
+    return declare
+
+
+def budget_of(view):
+    """The ``query_budget`` of a resolved view function, or ``None``."""
+    budget = getattr(view, "query_budget", None)
+    if budget is None:
+        budget = getattr(getattr(view, "view_class", None), "query_budget", None)
+    return budget
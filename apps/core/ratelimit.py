@@ -0,0 +1,138 @@
+import logging
+import math
+import threading
+import time
+
+import redis
+from django.core.cache import cache
+
+from .redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+# Expired keys are dropped from LocalCounts once it holds this many
+LOCAL_PRUNE_SIZE = 10000
+
+
+class LocalCounts:
+    """In-process counters used while Redis is unreachable."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._values) >= LOCAL_PRUNE_SIZE:
+                self._values = {
+                    k: item for k, item in self._values.items() if item[1] > now
+                }
+            value, expires = self._values.get(key, (0, now))
+            value = value + 1 if expires > now else 1
+            self._values[key] = (value, now + timeout)
+        return value
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            items = [self._values.get(key, (0, now)) for key in keys]
+        return [value if expires > now else 0 for value, expires in items]
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class SlidingWindowCounter:
+    """
+    Approximate number of events per identifier over the last ``window`` seconds.
+
+    Two fixed windows are stored per identifier and the previous one is
+    weighted by how much of it still overlaps the sliding window. With Redis
+    every update is one INCR/EXPIRE pipeline, so concurrent workers never
+    lose increments. Without Redis the Django cache is used instead.
+
+    When Redis is configured but fails, events are counted in process (per
+    worker, so limits are looser but still enforced) unless ``fail_open`` is
+    set, in which case every count reads 0. Guards that protect accounts must
+    keep the default.
+    """
+
+    def __init__(self, name, window, fail_open=False):
+        self.name = name
+        self.window = window
+        self.fail_open = fail_open
+        self.local = LocalCounts()
+
+    def _keys(self, identifier, now):
+        index, offset = divmod(now, self.window)
+        prefix = f"ratelimit:{self.name}:{identifier}"
+        return f"{prefix}:{int(index)}", f"{prefix}:{int(index) - 1}", offset
+
+    def _estimate(self, current, previous, offset):
+        overlap = 1 - offset / self.window
+        return math.ceil(int(current or 0) + int(previous or 0) * overlap)
+
+    def increment(self, identifier):
+        """Record one event and return the updated count."""
+        current_key, previous_key, offset = self._keys(identifier, time.time())
+        client = get_redis_client()
+
+        if client is None:
+            cache.add(current_key, 0, timeout=self.window * 2)
+            current = cache.incr(current_key)
+            return self._estimate(current, cache.get(previous_key), offset)
+
+        try:
+            pipe = client.pipeline()
+            pipe.incr(current_key)
+            pipe.expire(current_key, self.window * 2)
+            pipe.get(previous_key)
+            current, _, previous = pipe.execute()
+        except redis.RedisError:
+            logger.error("Could not record %s event", self.name, exc_info=True)
+            if self.fail_open:
+                return 0
+            current = self.local.incr(current_key, self.window * 2)
+            (previous,) = self.local.get_many([previous_key])
+        return self._estimate(current, previous, offset)
+
+    def count(self, identifier):
+        current_key, previous_key, offset = self._keys(identifier, time.time())
+        client = get_redis_client()
+
+        if client is None:
+            values = cache.get_many([current_key, previous_key])
+            return self._estimate(
+                values.get(current_key), values.get(previous_key), offset
+            )
+
+        try:
+            current, previous = client.mget(current_key, previous_key)
+        except redis.RedisError:
+            logger.error("Could not read %s count", self.name, exc_info=True)
+            if self.fail_open:
+                return 0
+            current, previous = self.local.get_many([current_key, previous_key])
+        return self._estimate(current, previous, offset)
+
+    def reset(self, identifier):
+        keys = self._keys(identifier, time.time())[:2]
+        client = get_redis_client()
+
+        if client is None:
+            cache.delete_many(keys)
+            return
+
+        self.local.delete_many(keys)
+        try:
+            client.delete(*keys)
+        except redis.RedisError:
+            logger.error("Could not reset %s count", self.name, exc_info=True)
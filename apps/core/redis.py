@@ -0,0 +1,53 @@
+import os
+import ssl
+
+import redis
+from django.conf import settings
+
+_clients = {}
+
+
+def _client(kind, **options):
+    url = settings.REDIS_URL
+    if not url:
+        return None
+
+    key = (url, kind, os.getpid())
+    client = _clients.get(key)
+    if client is None:
+        if url.startswith("rediss://"):
+            options["ssl_cert_reqs"] = ssl.CERT_NONE
+        client = _clients[key] = redis.Redis.from_url(url, **options)
+    return client
+
+
+def get_redis_client():
+    """
+    Return a shared Redis client for ``settings.REDIS_URL``.
+
+    Returns ``None`` when no URL is configured so callers can fall back to
+    in-process behaviour. A new client is created after ``fork()`` so
+    workers never share a connection pool with their parent.
+    """
+    return _client(
+        "commands",
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
+
+
+def get_pubsub_client():
+    """
+    Return a Redis client for long-lived pub/sub subscriptions.
+
+    Reads on it never time out, so an idle subscription is not mistaken for
+    a dead one; instead the server is pinged every
+    ``REDIS_HEALTH_CHECK_INTERVAL`` seconds to notice connections that
+    really are gone. Poll with ``get_message(timeout=...)`` so the pings run.
+    """
+    return _client(
+        "pubsub",
+        socket_timeout=None,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    )
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import random
+from time import perf_counter
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+from .queries import fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Statements EXPLAIN accepts; plain EXPLAIN plans them without running them
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+def view_path(request):
+    """Dotted path of the view that handled ``request``, or ``unmatched``."""
+    match = request.resolver_match
+    if match is None:
+        return "unmatched"
+    view = getattr(match.func, "view_class", match.func)
+    return f"{view.__module__}.{getattr(view, '__qualname__', repr(view))}"
+
+
+def _jsonable(params):
+    # Datetimes, decimals and UUIDs become strings; the database casts them
+    # back when the plan is requested
+    if params is None:
+        return None
+    if not isinstance(params, dict):
+        params = list(params)
+    return json.loads(json.dumps(params, cls=DjangoJSONEncoder))
+
+
+class SlowQueryLog:
+    """
+    ``execute_wrapper`` that reports statements slower than ``THRESHOLD_MS``.
+
+    Slow statements are logged with the view at once, and ``flush`` sends the
+    first ``MAX_PER_REQUEST`` of them to one ``record_slow_queries`` task,
+    which records them and runs the sampled ``EXPLAIN``. Parameters are only
+    sent along when a plan is wanted.
+    """
+
+    def __init__(self, request):
+        options = settings.SLOW_QUERIES
+        self.request = request
+        self.threshold_ms = options["THRESHOLD_MS"]
+        self.sample_rate = options["EXPLAIN_SAMPLE_RATE"]
+        self.max_queries = options["MAX_PER_REQUEST"]
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (perf_counter() - started) * 1000
+            if elapsed_ms >= self.threshold_ms:
+                self.report(sql, params, many, elapsed_ms)
+
+    def report(self, sql, params, many, elapsed_ms):
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s", elapsed_ms, view_path(self.request), sql
+        )
+        if len(self.queries) < self.max_queries:
+            explain = not many and random.random() < self.sample_rate
+            self.queries.append(
+                (sql, _jsonable(params) if explain else None, elapsed_ms, explain)
+            )
+
+    def flush(self):
+        """Queue this request's slow statements for recording, if any."""
+        from .tasks import record_slow_queries
+
+        if not self.queries:
+            return
+        queries, self.queries = self.queries, []
+        try:
+            record_slow_queries.delay(view_path(self.request), queries)
+        except Exception:
+            logger.warning("Could not queue slow queries for recording", exc_info=True)
+
+
+def explain(sql, params):
+    """The planner's plan for ``sql``: JSON on PostgreSQL, rows elsewhere."""
+    if not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+
+    postgresql = connection.vendor == "postgresql"
+    prefix = (
+        "EXPLAIN (FORMAT JSON)" if postgresql else connection.ops.explain_query_prefix()
+    )
+    try:
+        # A failed EXPLAIN must not abort the transaction that records it
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            rows = cursor.fetchall()
+    except DatabaseError:
+        logger.warning("Could not explain slow query: %s", sql, exc_info=True)
+        return None
+
+    if postgresql:
+        plan = rows[0][0]
+        return json.loads(plan) if isinstance(plan, str) else plan
+    return [list(row) for row in rows]
+
+
+def record(sql, params, duration_ms, view, with_plan=False):
+    """Add one slow execution to its ``(fingerprint, view)`` row."""
+    shape = fingerprint(sql)
+    digest = hashlib.sha256(shape.encode()).hexdigest()
+    now = timezone.now()
+
+    updates = {
+        "calls": F("calls") + 1,
+        "total_ms": F("total_ms") + duration_ms,
+        "max_ms": Greatest("max_ms", Value(duration_ms)),
+        "example": sql,
+        "last_seen": now,
+    }
+    if with_plan:
+        plan = explain(sql, params)
+        if plan is not None:
+            updates.update(plan=plan, plan_captured_at=now)
+
+    rows = SlowQuery.objects.filter(digest=digest, view=view)
+    if rows.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            SlowQuery.objects.create(
+                digest=digest, fingerprint=shape, view=view, example=sql
+            )
+    except IntegrityError:
+        # Created by a concurrent worker; the update below counts this call
+        pass
+    rows.update(**updates)
@@ -0,0 +1,36 @@
+from celery import shared_task
+from django.conf import settings
+from . import outbox, slow_queries
+from .mail import MailTask, deserialize, mail_queue
+
+
+@shared_task(ignore_result=True)
+def dispatch_mail():
+    sent = mail_queue.drain()
+    return f"Dispatched {sent} queued emails"
+
+
+@shared_task(bind=True, base=MailTask)
+def send_mail_message(self, raw):
+    """Queue a serialized message again, e.g. one replayed from dead letters."""
+    if not self.send(deserialize(raw)):
+        return "Email already queued"
+    return "Queued email"
+
+
+@shared_task
+def relay_outbox():
+    batch_size = settings.OUTBOX_BATCH_SIZE
+    total = 0
+    while True:
+        published = outbox.relay(batch_size)
+        total += published
+        if published < batch_size:
+            return f"Relayed {total} outbox messages"
+
+
+@shared_task(ignore_result=True)
+def record_slow_queries(view, queries):
+    """Aggregate a request's slow statements, with their plans when sampled."""
+    for sql, params, duration_ms, explain in queries:
+        slow_queries.record(sql, params, duration_ms, view, with_plan=explain)
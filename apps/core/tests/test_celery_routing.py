@@ -0,0 +1,43 @@
+import pytest
+
+from apps.accounts.tasks import send_activation_email
+from apps.books.tasks import refresh_rating_prior
+from config.celery import app
+
+
+def queue_of(task_name):
+    return app.amqp.router.route({}, task_name)["queue"].name
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "task_name, queue",
+    [
+        ("apps.accounts.tasks.send_activation_email", "email"),
+        ("apps.accounts.tasks.send_password_reset_email", "email"),
+        ("apps.core.tasks.send_mail_message", "email"),
+        ("apps.core.tasks.dispatch_mail", "email"),
+        ("apps.core.tasks.relay_outbox", "default"),
+        ("apps.accounts.tasks.flush_last_logins", "default"),
+        ("apps.core.tasks.record_slow_queries", "maintenance"),
+        ("apps.books.tasks.refresh_rating_prior", "maintenance"),
+        ("apps.books.tasks.fold_rating_shards", "maintenance"),
+    ],
+)
+def test_tasks_are_routed_to_their_queue(task_name, queue):
+    assert queue_of(task_name) == queue
+
+
+@pytest.mark.unit
+def test_beat_schedules_registered_tasks():
+    app.loader.import_default_modules()
+    schedule = app.conf.beat_schedule
+
+    assert schedule["relay-outbox"]["task"] == "apps.core.tasks.relay_outbox"
+    assert {entry["task"] for entry in schedule.values()} <= set(app.tasks)
+
+
+@pytest.mark.unit
+def test_long_and_email_tasks_ack_late():
+    assert send_activation_email.acks_late
+    assert refresh_rating_prior.acks_late
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from django.test import override_settings
+
+from apps.core.concurrency import run_in_executor
+
+
+@pytest.mark.unit
+@override_settings(ASYNC_EXECUTORS={"bounded": 2})
+async def test_pool_bounds_concurrent_jobs():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def job():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return threading.current_thread().name
+
+    names = await asyncio.gather(*(run_in_executor("bounded", job) for _ in range(6)))
+
+    assert peak == 2
+    assert all(name.startswith("bounded") for name in names)
+
+
+@pytest.mark.unit
+@override_settings(ASYNC_EXECUTORS={"failing": 1})
+async def test_exceptions_propagate_to_the_caller():
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        await run_in_executor("failing", fail)
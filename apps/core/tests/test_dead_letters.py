@@ -0,0 +1,51 @@
+import pytest
+from django.core.management import call_command
+
+from apps.core import dead_letters
+from apps.core.models import DeadLetter, OutboxMessage
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_record_keeps_task_and_error():
+    dead_letters.record("apps.core.tasks.dispatch_mail", (1, "a"), {}, OSError("down"))
+
+    letter = DeadLetter.objects.get()
+    assert letter.args == [1, "a"]
+    assert letter.error == "OSError('down')"
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_replay_moves_dead_letters_into_the_outbox():
+    DeadLetter.objects.create(task="apps.core.tasks.dispatch_mail", args=[1])
+
+    assert dead_letters.replay() == 1
+
+    assert not DeadLetter.objects.exists()
+    message = OutboxMessage.objects.get()
+    assert message.task == "apps.core.tasks.dispatch_mail"
+    assert message.args == [1]
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_replay_command_filters_by_id_and_task(capsys):
+    first = DeadLetter.objects.create(task="apps.core.tasks.dispatch_mail")
+    DeadLetter.objects.create(task="apps.core.tasks.dispatch_mail")
+    DeadLetter.objects.create(task="apps.core.tasks.relay_outbox")
+
+    call_command(
+        "replay_dead_letters", "--list", "--task", "apps.core.tasks.relay_outbox"
+    )
+    assert "relay_outbox" in capsys.readouterr().out
+    assert DeadLetter.objects.count() == 3
+
+    call_command("replay_dead_letters", str(first.pk))
+    assert "Replayed 1 dead letters" in capsys.readouterr().out
+
+    call_command("replay_dead_letters", "--task", "apps.core.tasks.relay_outbox")
+    assert list(DeadLetter.objects.values_list("task", flat=True)) == [
+        "apps.core.tasks.dispatch_mail"
+    ]
+    assert OutboxMessage.objects.count() == 2
@@ -1,7 +1,16 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
 import pytest
+from django.db import OperationalError
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 
+from apps.core import health
+
 
 @pytest.mark.unit
 def test_health_endpoint_returns_200(client):
@@ -9,3 +18,145 @@ def test_health_endpoint_returns_200(client):
     url = reverse("health-check")
     response = client.get(url)
     assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    """Replace the real probes; the cached report is dropped around each test."""
+    calls = []
+
+    def fake(name, error=None, delay=0):
+        def probe():
+            calls.append(name)
+            time.sleep(delay)
+            if error:
+                raise error
+
+        return probe
+
+    health.reset()
+    monkeypatch.setattr(
+        health,
+        "PROBES",
+        {
+            "database": fake("database"),
+            "cache": fake("cache"),
+            "broker": fake("broker"),
+        },
+    )
+    yield SimpleNamespace(calls=calls, fake=fake)
+    health.reset()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_readiness_probes_the_real_dependencies(client):
+    health.reset()
+
+    response = client.get(reverse("health-ready"))
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["status"] == "ok"
+    assert set(body["checks"]) == {"database", "cache", "broker"}
+    for check in body["checks"].values():
+        assert check["status"] == "ok"
+        assert check["latencyMs"] >= 0
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_a_failing_dependency_makes_the_worker_unready(client, probes, monkeypatch):
+    monkeypatch.setitem(
+        health.PROBES, "broker", probes.fake("broker", error=ConnectionError("down"))
+    )
+
+    response = client.get(reverse("health-ready"))
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    checks = response.json()["checks"]
+    assert checks["broker"] == {
+        "status": "error",
+        "error": "ConnectionError",
+        "latencyMs": checks["broker"]["latencyMs"],
+    }
+    assert checks["database"]["status"] == "ok"
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(HEALTH_CHECK={"TIMEOUT": 0.05, "CACHE_SECONDS": 2})
+def test_slow_probes_time_out(probes, monkeypatch):
+    monkeypatch.setitem(health.PROBES, "cache", probes.fake("cache", delay=0.5))
+
+    started = time.perf_counter()
+    report = health.readiness()
+
+    assert time.perf_counter() - started < 0.4
+    assert report["status"] == "unavailable"
+    assert report["checks"]["cache"]["status"] == "timeout"
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(HEALTH_CHECK={"TIMEOUT": 1, "CACHE_SECONDS": 60})
+def test_reports_are_reused_within_the_cache_interval(probes):
+    first = health.readiness()
+    second = health.readiness()
+
+    assert second is first
+    assert sorted(probes.calls) == ["broker", "cache", "database"]
+
+    health.reset()
+    health.readiness()
+    assert len(probes.calls) == 6
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(HEALTH_CHECK={"TIMEOUT": 0.05, "CACHE_SECONDS": 0})
+def test_hung_probe_is_not_submitted_again(probes, monkeypatch):
+    release = threading.Event()
+
+    def hung():
+        probes.calls.append("cache")
+        release.wait(5)
+
+    monkeypatch.setitem(health.PROBES, "cache", hung)
+    try:
+        for _ in range(3):
+            assert health.readiness()["checks"]["cache"]["status"] == "timeout"
+        assert probes.calls.count("cache") == 1
+    finally:
+        release.set()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_database_probe_reconnects_after_a_dropped_connection():
+    health.probe_database()
+    conn = health._probe_connection()
+    dropped = OperationalError("server closed the connection unexpectedly")
+
+    with (
+        patch.object(conn, "cursor", side_effect=[dropped, conn.cursor()]),
+        patch.object(conn, "close") as close,
+    ):
+        health.probe_database()
+
+    close.assert_called_once()
+
+
+@pytest.mark.unit
+@override_settings(HEALTH_CHECK={"TIMEOUT": 1.5, "CACHE_SECONDS": 2})
+def test_database_probe_gets_driver_level_timeouts():
+    original = {"NAME": "bookstore", "OPTIONS": {"options": "-c search_path=app"}}
+
+    probe = health._probe_settings(original, "postgresql")
+
+    assert probe["OPTIONS"] == {
+        "connect_timeout": 2,
+        "tcp_user_timeout": 1500,
+        "options": "-c search_path=app -c statement_timeout=1500",
+    }
+    assert original["OPTIONS"] == {"options": "-c search_path=app"}
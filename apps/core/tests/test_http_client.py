@@ -0,0 +1,163 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+import requests
+from django.test import override_settings
+
+from apps.core import metrics
+from apps.core.http import CircuitBreaker, CircuitOpenError, HttpClient
+
+OPTIONS = {"test": {"deadline": 0.5, "failure_threshold": 2, "reset_timeout": 60}}
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(settings, tmp_path):
+    settings.METRICS = {**settings.METRICS, "ENABLED": True, "DIR": str(tmp_path)}
+
+
+def metric(name, **labels):
+    return metrics.collect().get(metrics._key(name, labels), 0)
+
+
+@pytest.fixture
+def server():
+    """Local provider whose status and latency tests can change."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            server.hits += 1
+            server.peers.add(self.client_address)
+            time.sleep(server.delay)
+            self.send_response(server.status)
+            self.send_header("Content-Length", str(len(server.body)))
+            self.end_headers()
+            for byte in server.body:
+                self.wfile.write(bytes([byte]))
+                self.wfile.flush()
+                time.sleep(server.trickle)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.hits = 0
+    server.peers = set()
+    server.status = 200
+    server.delay = 0
+    server.trickle = 0
+    server.body = b"{}"
+    server.url = f"http://127.0.0.1:{server.server_port}/verify"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.unit
+def test_breaker_opens_and_lets_one_trial_through_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+    with patch("apps.core.http.time.monotonic", return_value=100.0):
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.is_open
+        assert not breaker.allow()
+
+    with patch("apps.core.http.time.monotonic", return_value=111.0):
+        assert breaker.allow()
+        assert not breaker.allow()  # trial already running
+        breaker.record_success()
+        assert not breaker.is_open
+        assert breaker.allow()
+
+
+@pytest.mark.unit
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+
+    with patch("apps.core.http.time.monotonic", return_value=100.0):
+        breaker.record_failure()
+    with patch("apps.core.http.time.monotonic", return_value=111.0):
+        assert breaker.allow()
+        breaker.record_failure()
+        assert not breaker.allow()
+
+
+@pytest.mark.unit
+@override_settings(OUTBOUND_HTTP=OPTIONS)
+def test_connections_are_pooled(server):
+    client = HttpClient("test")
+
+    for _ in range(3):
+        assert client.post(server.url).status_code == 200
+
+    assert client.session is client.session
+    assert len(server.peers) == 1
+    ok = "outbound_request_duration_seconds_count"
+    assert metric(ok, provider="test", outcome="ok") == 3
+
+
+@pytest.mark.unit
+@override_settings(OUTBOUND_HTTP=OPTIONS)
+def test_server_errors_open_the_circuit(server):
+    server.status = 503
+    client = HttpClient("test")
+
+    assert client.post(server.url).status_code == 503
+    assert client.post(server.url).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        client.post(server.url)
+
+    assert server.hits == 2
+    assert metric("outbound_short_circuited_total", provider="test") == 1
+
+
+@pytest.mark.unit
+@override_settings(OUTBOUND_HTTP=OPTIONS)
+def test_slow_provider_hits_the_deadline(server):
+    server.delay = 0.3
+    client = HttpClient("test")
+
+    with pytest.raises(requests.Timeout):
+        client.post(server.url, deadline=0.1)
+
+    count = "outbound_request_duration_seconds_count"
+    assert metric(count, provider="test", outcome="error") == 1
+
+
+@pytest.mark.unit
+@override_settings(OUTBOUND_HTTP=OPTIONS)
+def test_trickling_body_is_cut_off_at_the_deadline(server):
+    """Each byte arrives well within the read timeout; the call still ends."""
+    server.body = b"x" * 50
+    server.trickle = 0.05
+    client = HttpClient("test")
+
+    started = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        client.post(server.url, deadline=0.3)
+
+    assert time.monotonic() - started < 0.6
+
+
+@pytest.mark.unit
+@override_settings(OUTBOUND_HTTP=OPTIONS)
+def test_unexpected_error_in_the_trial_call_does_not_wedge_the_circuit(server):
+    client = HttpClient("test")
+    for _ in range(2):
+        client.breaker.record_failure()
+    client.breaker._opened_at -= 61
+
+    with patch.object(client, "_read_body", side_effect=ValueError("bad body")):
+        with pytest.raises(ValueError):
+            client.post(server.url)
+
+    client.breaker._opened_at -= 61
+    assert client.post(server.url).status_code == 200
+    assert not client.breaker.is_open
@@ -0,0 +1,297 @@
+import pytest
+from smtplib import SMTPRecipientsRefused
+from unittest.mock import MagicMock, patch
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives
+
+from apps.core.mail import (
+    BACKOFF_KEY,
+    MailBackoff,
+    PROCESSING_KEY,
+    QUEUE_KEY,
+    MailInFlight,
+    MailQueue,
+    deserialize,
+    serialize,
+)
+from apps.core.models import DeadLetter
+from apps.core.tasks import send_mail_message
+
+
+class FakeLock:
+    def __init__(self, client):
+        self.client = client
+
+    def acquire(self, blocking):
+        if self.client.locked:
+            return False
+        self.client.locked = True
+        return True
+
+    def release(self):
+        self.client.locked = False
+
+    def reacquire(self):
+        pass
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def lmove(self, *args):
+        self.calls.append(args)
+
+    def execute(self):
+        return [self.client.lmove(*args) for args in self.calls]
+
+
+class FakeRedis:
+    """Just enough of the redis client for the mail queue."""
+
+    def __init__(self):
+        self.lists = {QUEUE_KEY: [], PROCESSING_KEY: []}
+        self.locked = False
+        self.values = {}
+
+    @property
+    def items(self):
+        return self.lists[QUEUE_KEY]
+
+    def rpush(self, key, *values):
+        self.lists[key].extend(values)
+
+    def lpop(self, key):
+        return self.lists[key].pop(0) if self.lists[key] else None
+
+    def lmove(self, source, destination, src, dest):
+        items = self.lists[source]
+        if not items:
+            return None
+        value = items.pop(0 if src == "LEFT" else -1)
+        if dest == "LEFT":
+            self.lists[destination].insert(0, value)
+        else:
+            self.lists[destination].append(value)
+        return value
+
+    def pipeline(self, transaction):
+        return FakePipeline(self)
+
+    def llen(self, key):
+        return len(self.lists[key])
+
+    def lock(self, name, timeout):
+        return FakeLock(self)
+
+    def exists(self, key):
+        return int(key in self.values)
+
+    def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    def set(self, key, value, px=None):
+        self.values[key] = value
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+def message(number):
+    email = EmailMultiAlternatives(
+        subject=f"Message {number}", body="Body", to=["a@example.com"]
+    )
+    email.attach_alternative("<p>Body</p>", "text/html")
+    return email
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def redis_client():
+    client = FakeRedis()
+    with patch("apps.core.mail.get_redis_client", return_value=client):
+        yield client
+
+
+@pytest.fixture
+def connection():
+    connection = MagicMock()
+    with patch("apps.core.mail.get_connection", return_value=connection):
+        yield connection
+
+
+@pytest.mark.unit
+def test_serialize_round_trip():
+    restored = deserialize(serialize(message(1)))
+
+    assert restored.subject == "Message 1"
+    assert restored.to == ["a@example.com"]
+    assert restored.alternatives[0][1] == "text/html"
+
+
+@pytest.mark.unit
+def test_drain_sends_batches_over_one_connection(redis_client, connection):
+    redis_client.rpush(QUEUE_KEY, *(serialize(message(i)) for i in range(5)))
+
+    assert MailQueue().drain(batch_size=2) == 5
+
+    connection.open.assert_called_once()
+    connection.close.assert_called_once()
+    assert connection.send_messages.call_count == 5
+    assert redis_client.items == []
+    assert not redis_client.locked
+
+
+@pytest.mark.unit
+def test_unsent_messages_are_requeued_in_order(redis_client, connection):
+    redis_client.rpush(QUEUE_KEY, *(serialize(message(i)) for i in range(4)))
+    connection.send_messages.side_effect = [1, OSError("SMTP down")]
+
+    with pytest.raises(OSError):
+        MailQueue().drain(batch_size=4)
+
+    subjects = [deserialize(raw).subject for raw in redis_client.items]
+    assert subjects == ["Message 1", "Message 2", "Message 3"]
+    assert redis_client.lists[PROCESSING_KEY] == []
+    connection.close.assert_called_once()
+    assert not redis_client.locked
+
+
+@pytest.mark.unit
+def test_failed_connection_takes_nothing_from_the_queue(redis_client, connection):
+    redis_client.rpush(QUEUE_KEY, *(serialize(message(i)) for i in range(3)))
+    connection.open.side_effect = OSError("SMTP down")
+
+    with pytest.raises(OSError):
+        MailQueue().drain()
+
+    assert len(redis_client.items) == 3
+    assert redis_client.lists[PROCESSING_KEY] == []
+    connection.send_messages.assert_not_called()
+
+
+@pytest.mark.unit
+def test_batch_left_by_a_crashed_worker_is_sent(redis_client, connection):
+    redis_client.rpush(PROCESSING_KEY, serialize(message(0)))
+    redis_client.rpush(QUEUE_KEY, serialize(message(1)))
+
+    assert MailQueue().drain() == 2
+
+    subjects = [
+        call.args[0][0].subject for call in connection.send_messages.call_args_list
+    ]
+    assert subjects == ["Message 0", "Message 1"]
+    assert redis_client.lists[PROCESSING_KEY] == []
+
+
+@pytest.mark.unit
+def test_drain_skips_while_another_worker_holds_the_lock(redis_client, connection):
+    redis_client.locked = True
+
+    MailQueue().enqueue(message(1))
+
+    assert len(redis_client.items) == 1
+    connection.send_messages.assert_not_called()
+
+
+@pytest.mark.unit
+def test_without_redis_mail_is_sent_immediately(connection):
+    with patch("apps.core.mail.get_redis_client", return_value=None):
+        MailQueue().enqueue(message(1))
+
+    connection.send_messages.assert_called_once()
+
+
+@pytest.mark.unit
+def test_failed_dispatch_backs_off_inline_sends(redis_client, connection):
+    connection.send_messages.side_effect = OSError("SMTP down")
+
+    with pytest.raises(OSError):
+        MailQueue().enqueue(message(1))
+    assert BACKOFF_KEY in redis_client.values
+
+    # While backing off, tasks only queue: no connection attempt per message
+    connection.reset_mock()
+    with pytest.raises(MailBackoff):
+        MailQueue().enqueue(message(2))
+    assert MailQueue().drain() == 0
+    connection.open.assert_not_called()
+    assert len(redis_client.items) == 2
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_refused_message_is_dead_lettered_and_the_rest_sent(redis_client, connection):
+    redis_client.rpush(QUEUE_KEY, *(serialize(message(i)) for i in range(3)))
+    connection.send_messages.side_effect = [
+        1,
+        SMTPRecipientsRefused({"a@example.com": (550, b"No such user")}),
+        1,
+    ]
+
+    assert MailQueue().drain() == 2
+
+    assert redis_client.items == []
+    letter = DeadLetter.objects.get()
+    assert deserialize(letter.args[0]).subject == "Message 1"
+
+
+@pytest.mark.unit
+def test_idempotency_key_queues_a_message_once(redis_client, connection):
+    queue = MailQueue()
+
+    assert queue.enqueue(message(1), idempotency_key="k") is True
+    assert queue.enqueue(message(1), idempotency_key="k") is False
+
+    assert connection.send_messages.call_count == 1
+
+
+@pytest.mark.unit
+def test_failed_enqueue_releases_the_idempotency_key(connection):
+    queue = MailQueue()
+    connection.send_messages.side_effect = [OSError("SMTP down"), 1]
+
+    with patch("apps.core.mail.get_redis_client", return_value=None):
+        with pytest.raises(OSError):
+            queue.enqueue(message(1), idempotency_key="k")
+        assert queue.enqueue(message(1), idempotency_key="k") is True
+
+
+@pytest.mark.unit
+def test_message_being_queued_elsewhere_is_retried_later(connection):
+    cache.add("mail:sent:k", "pending")
+
+    with pytest.raises(MailInFlight):
+        MailQueue().enqueue(message(1), idempotency_key="k")
+
+
+@pytest.mark.unit
+def test_smtp_outage_is_retried_by_the_task(redis_client, connection):
+    connection.open.side_effect = [OSError("SMTP down"), None]
+
+    # Without the pause the eager retry reaches the server again at once
+    with patch.object(MailQueue, "_back_off"):
+        result = send_mail_message.apply(args=[serialize(message(1))])
+
+    assert result.successful()
+    assert connection.open.call_count == 2
+    assert connection.send_messages.call_count == 1
+    assert redis_client.items == []
+
+
+@pytest.mark.unit
+def test_replaying_a_message_twice_queues_it_once(redis_client, connection):
+    raw = serialize(message(1))
+
+    assert send_mail_message.apply(args=[raw]).result == "Queued email"
+    assert send_mail_message.apply(args=[raw]).result == "Email already queued"
+
+    assert connection.send_messages.call_count == 1
@@ -0,0 +1,167 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from apps.core import metrics
+from apps.core.tasks import dispatch_mail
+from apps.core.throttling import token_buckets
+
+TOKEN = "scraper-token"
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(settings, tmp_path):
+    settings.METRICS = {**settings.METRICS, "DIR": str(tmp_path), "TOKEN": TOKEN}
+    cache.clear()
+    token_buckets.local.reset()
+    metrics.reset_queue_lengths()
+    yield tmp_path
+    token_buckets.local.reset()
+    metrics.reset_queue_lengths()
+
+
+def scrape(client):
+    return client.get(reverse("metrics"), HTTP_AUTHORIZATION=f"Bearer {TOKEN}")
+
+
+def sample_lines(text, prefix):
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+@pytest.mark.unit
+def test_value_file_survives_reopening_and_grows(metrics_dir):
+    path = str(metrics_dir / "1.db")
+    values = metrics.ValueFile(path)
+    for i in range(5000):
+        values.add(f"key-{i}", i)
+
+    metrics.ValueFile(path).add("key-1", 1)
+
+    totals = metrics.collect()
+    assert os.path.getsize(path) > metrics._INITIAL_SIZE
+    assert len(totals) == 5000
+    assert totals["key-1"] == 2
+    assert totals["key-4999"] == 4999
+
+
+@pytest.mark.unit
+def test_counters_add_up_across_processes():
+    metrics.DB_QUERIES.inc(2, route="book-list")
+
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - child process
+        try:
+            metrics.DB_QUERIES.inc(3, route="book-list")
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert 'db_queries_total{route="book-list"} 5.0' in metrics.render()
+
+
+@pytest.mark.unit
+def test_recycled_workers_are_folded_into_one_file(metrics_dir):
+    metrics.DB_QUERIES.inc(1, route="book-list")
+    for pid in range(100001, 100011):
+        values = metrics.ValueFile(str(metrics_dir / f"{pid}.db"))
+        values.add(metrics._key(metrics.DB_QUERIES.name, {"route": "book-list"}), 2)
+        values.close()
+        metrics.mark_process_dead(pid)
+
+    names = {path.name for path in metrics_dir.glob("*.db")}
+    assert names == {"dead.db", f"{os.getpid()}.db"}
+    assert 'db_queries_total{route="book-list"} 21.0' in metrics.render()
+
+
+@pytest.mark.unit
+def test_histogram_buckets_are_cumulative():
+    metrics.REQUEST_LATENCY.observe(0.003, route="login", method="POST", status=200)
+    metrics.REQUEST_LATENCY.observe(0.2, route="login", method="POST", status=200)
+    metrics.REQUEST_LATENCY.observe(20, route="login", method="POST", status=200)
+
+    lines = sample_lines(metrics.render(), "http_request_duration_seconds")
+    labels = 'method="POST",route="login",status="200"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1.0' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.25"}} 2.0' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="10.0"}} 2.0' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3.0' in lines
+    assert f"http_request_duration_seconds_count{{{labels}}} 3.0" in lines
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_endpoint_reports_routes_cache_and_queues(client):
+    client.get(reverse("health-check"))
+    cache.set("present", 1)
+    cache.get("present")
+    cache.get("missing")
+
+    response = scrape(client)
+
+    body = response.content.decode()
+    assert response["Content-Type"] == metrics.CONTENT_TYPE
+    assert 'route="health-check"' in body
+    assert "cache_hit_ratio 0.5" in body
+    assert "celery_broker_up 1.0" in body
+    assert 'celery_queue_length{queue="email"} 0.0' in body
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_throttle_rejections_are_counted(client, settings):
+    settings.TOKEN_BUCKET_THROTTLES = {"password_reset": {"ip": "1/hour"}}
+    url = reverse("password-reset-request")
+    for _ in range(2):
+        client.post(url, {"email": "a@example.com"}, content_type="application/json")
+
+    body = scrape(client).content.decode()
+
+    assert 'throttle_rejections_total{scope="password_reset"} 1.0' in body
+
+
+@pytest.mark.unit
+def test_task_timings_are_recorded():
+    dispatch_mail.apply()
+
+    body = metrics.render()
+
+    assert (
+        'celery_task_duration_seconds_count{state="SUCCESS",'
+        'task="apps.core.tasks.dispatch_mail"} 1.0'
+    ) in body
+
+
+@pytest.mark.unit
+def test_token_is_required(client):
+    url = reverse("metrics")
+
+    assert client.get(url).status_code == 401
+    assert client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code == 401
+    assert scrape(client).status_code == 200
+
+
+@pytest.mark.unit
+def test_endpoint_is_closed_without_a_token_unless_debugging(client, settings):
+    settings.METRICS = {**settings.METRICS, "TOKEN": ""}
+    url = reverse("metrics")
+
+    assert client.get(url).status_code == 403
+    settings.DEBUG = True
+    assert client.get(url).status_code == 200
+
+
+@pytest.mark.unit
+def test_queue_lengths_are_probed_once_per_interval(settings):
+    settings.METRICS = {**settings.METRICS, "QUEUE_CACHE_SECONDS": 60}
+
+    with patch.object(
+        metrics, "_read_queue_lengths", return_value={"email": 3}
+    ) as read:
+        metrics.render()
+        body = metrics.render()
+
+    assert read.call_count == 1
+    assert 'celery_queue_length{queue="email"} 3' in body
@@ -0,0 +1,51 @@
+import pytest
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.urls import reverse
+
+from apps.accounts.tests.factories import AccountFactory
+from apps.core.middleware import BrowserMiddleware
+
+
+@pytest.mark.unit
+def test_api_requests_skip_sessions_and_csrf(client):
+    response = client.get(reverse("health-check"))
+
+    assert response.status_code == 200
+    assert not hasattr(response.wsgi_request, "session")
+    assert not response.cookies
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_admin_gets_the_browser_middleware(client):
+    admin = AccountFactory(admin=True)
+    client.force_login(admin)
+
+    response = client.get("/admin/")
+
+    assert response.status_code == 200
+    assert response.wsgi_request.user == admin
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_csrf_is_still_enforced_outside_the_api():
+    client = Client(enforce_csrf_checks=True)
+
+    response = client.post("/admin/login/", {"username": "a", "password": "b"})
+
+    assert response.status_code == 403
+
+
+@pytest.mark.unit
+async def test_runs_natively_in_async_mode():
+    async def view(request):
+        return HttpResponse()
+
+    middleware = BrowserMiddleware(view)
+    response = await middleware(RequestFactory().get("/api/health/"))
+
+    assert iscoroutinefunction(middleware)
+    assert response.status_code == 200
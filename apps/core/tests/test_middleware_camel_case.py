@@ -0,0 +1,35 @@
+import pytest
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from apps.core.middleware import CamelCaseQueryMiddleware
+
+
+@pytest.mark.unit
+def test_query_names_are_snake_cased_in_sync_mode():
+    seen = {}
+
+    def view(request):
+        seen.update(request.GET.dict())
+        return HttpResponse()
+
+    CamelCaseQueryMiddleware(view)(RequestFactory().get("/", {"pageSize": "5"}))
+
+    assert seen == {"page_size": "5"}
+
+
+@pytest.mark.unit
+async def test_runs_natively_in_async_mode():
+    seen = {}
+
+    async def view(request):
+        seen.update(request.GET.dict())
+        return HttpResponse()
+
+    middleware = CamelCaseQueryMiddleware(view)
+    assert iscoroutinefunction(middleware)
+
+    await middleware(RequestFactory().get("/", {"sortBy": "title"}))
+
+    assert seen == {"sort_by": "title"}
@@ -0,0 +1,103 @@
+import logging
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from apps.books.models import Book
+from apps.books.tests.factories import BookFactory
+from apps.categories.tests.factories import CategoryFactory
+from apps.core.middleware import QueryInspectionMiddleware
+from apps.core.queries import NPlusOneError, fingerprint, query_budget, budget_of
+
+INSPECTING = {"ENABLED": True, "REPEAT_THRESHOLD": 3, "RAISE": True}
+
+
+def titles_with_categories(request):
+    # Category is not selected with the book: one query per row
+    names = [book.category.name for book in Book.objects.all()]
+    return HttpResponse(", ".join(names))
+
+
+def titles_with_joined_categories(request):
+    names = [book.category.name for book in Book.objects.select_related("category")]
+    return HttpResponse(", ".join(names))
+
+
+@pytest.fixture
+def books(db):
+    return BookFactory.create_batch(5, category=CategoryFactory())
+
+
+@pytest.mark.unit
+def test_fingerprint_ignores_literals_and_list_lengths():
+    assert fingerprint(
+        "SELECT * FROM books WHERE id = 1 AND title = 'a'"
+    ) == fingerprint("SELECT  *  FROM books\nWHERE id = 22 AND title = 'it''s'")
+    assert fingerprint("SELECT 1 FROM t WHERE id IN (%s, %s, %s)") == fingerprint(
+        "SELECT 1 FROM t WHERE id IN (%s)"
+    )
+    assert fingerprint("SELECT 1 FROM a WHERE id = %s") != fingerprint(
+        "SELECT 1 FROM b WHERE id = %s"
+    )
+
+
+@pytest.mark.unit
+@override_settings(QUERY_INSPECTION=INSPECTING)
+def test_repeated_query_shapes_raise(books):
+    middleware = QueryInspectionMiddleware(titles_with_categories)
+
+    with pytest.raises(NPlusOneError, match="categories"):
+        middleware(RequestFactory().get("/api/books/"))
+
+
+@pytest.mark.unit
+@override_settings(QUERY_INSPECTION=INSPECTING)
+def test_joined_queries_pass(books):
+    middleware = QueryInspectionMiddleware(titles_with_joined_categories)
+
+    response = middleware(RequestFactory().get("/api/books/"))
+
+    assert response.status_code == 200
+
+
+@pytest.mark.unit
+@override_settings(QUERY_INSPECTION={**INSPECTING, "RAISE": False})
+def test_repeats_are_logged_when_not_raising(books, caplog):
+    middleware = QueryInspectionMiddleware(titles_with_categories)
+
+    with caplog.at_level(logging.WARNING, logger="apps.core.middleware"):
+        response = middleware(RequestFactory().get("/api/books/"))
+
+    assert response.status_code == 200
+    assert "Possible N+1: GET /api/books/ ran 5 queries" in caplog.text
+
+
+@pytest.mark.unit
+@override_settings(QUERY_INSPECTION={**INSPECTING, "ENABLED": False})
+def test_disabled_inspection_is_not_loaded():
+    with pytest.raises(MiddlewareNotUsed):
+        QueryInspectionMiddleware(lambda request: HttpResponse())
+
+
+@pytest.mark.unit
+def test_budget_is_found_on_function_and_class_views():
+    @query_budget(3)
+    def view(request):
+        return HttpResponse()
+
+    class View:
+        query_budget = 4
+
+        @classmethod
+        def as_view(cls):
+            def view(request):
+                return HttpResponse()
+
+            view.view_class = cls
+            return view
+
+    assert budget_of(view) == 3
+    assert budget_of(View.as_view()) == 4
+    assert budget_of(lambda request: None) is None
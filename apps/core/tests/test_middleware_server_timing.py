@@ -0,0 +1,140 @@
+import json
+import logging
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.accounts.models import Account
+from apps.core.middleware import ServerTimingMiddleware
+
+ENABLED = {"ENABLED": True, "SAMPLE_RATE": 1.0, "PUBLIC": True}
+STAFF_ONLY = {**ENABLED, "PUBLIC": False}
+
+
+def metrics(response):
+    """``{name: (duration, description)}`` from the Server-Timing header."""
+    parsed = {}
+    for metric in response["Server-Timing"].split(", "):
+        name, *params = metric.split(";")
+        values = dict(param.split("=", 1) for param in params)
+        parsed[name] = (float(values["dur"]), values.get("desc", "").strip('"'))
+    return parsed
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(SERVER_TIMING=ENABLED)
+def test_reports_queries_and_cache_use():
+    def view(request):
+        list(Account.objects.all())
+        cache.get("missing")
+        cache.set("present", 1)
+        cache.get_many(["present", "missing"])
+        return HttpResponse()
+
+    response = ServerTimingMiddleware(view)(RequestFactory().get("/"))
+
+    timing = metrics(response)
+    assert timing["db"][1] == "1 queries"
+    assert timing["cache"][1] == "1 hits 2 misses"
+    assert timing["total"][0] >= timing["db"][0]
+
+
+@pytest.mark.unit
+@override_settings(SERVER_TIMING=ENABLED)
+def test_render_is_timed_and_logged(caplog, monkeypatch):
+    monkeypatch.setattr(logging.getLogger("apps.core.timing"), "propagate", True)
+
+    class View(APIView):
+        authentication_classes = []
+
+        def get(self, request):
+            return Response({"items": list(range(1000))})
+
+    view = View.as_view()
+
+    def get_response(request):
+        # What Django's handler does around the middleware hooks
+        middleware.process_view(request, view, (), {})
+        response = middleware.process_template_response(request, view(request))
+        return response.render()
+
+    middleware = ServerTimingMiddleware(get_response)
+    with caplog.at_level("INFO", logger="apps.core.timing"):
+        response = middleware(RequestFactory().get("/api/things/"))
+
+    timing = metrics(response)
+    assert timing["render"][0] > 0
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["path"] == "/api/things/"
+    assert record["status"] == 200
+    # The header rounds to 0.1 ms, the log to 0.01 ms
+    assert record["render_ms"] == pytest.approx(timing["render"][0], abs=0.06)
+
+
+@pytest.mark.unit
+@override_settings(SERVER_TIMING={**ENABLED, "SAMPLE_RATE": 0.0})
+def test_unsampled_requests_are_not_timed():
+    response = ServerTimingMiddleware(lambda request: HttpResponse())(
+        RequestFactory().get("/")
+    )
+
+    assert "Server-Timing" not in response
+
+
+@pytest.mark.unit
+@override_settings(SERVER_TIMING={**ENABLED, "ENABLED": False})
+def test_disabled_middleware_is_not_loaded():
+    with pytest.raises(MiddlewareNotUsed):
+        ServerTimingMiddleware(lambda request: HttpResponse())
+
+
+@pytest.mark.unit
+@override_settings(SERVER_TIMING=STAFF_ONLY)
+def test_header_is_only_sent_to_staff(caplog, monkeypatch):
+    monkeypatch.setattr(logging.getLogger("apps.core.timing"), "propagate", True)
+
+    def view_as(user):
+        def view(request):
+            request.user = user
+            return HttpResponse()
+
+        return ServerTimingMiddleware(view)
+
+    with caplog.at_level("INFO", logger="apps.core.timing"):
+        anonymous = view_as(AnonymousUser())(RequestFactory().get("/"))
+        staff = view_as(Account(is_admin=True))(RequestFactory().get("/"))
+
+    assert "Server-Timing" not in anonymous
+    assert "total" in metrics(staff)
+    # Both requests are still logged
+    assert len(caplog.records) == 2
+
+
+@pytest.mark.unit
+def test_off_by_default():
+    with pytest.raises(MiddlewareNotUsed):
+        ServerTimingMiddleware(lambda request: HttpResponse())
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(SERVER_TIMING=ENABLED)
+def test_full_stack_sets_the_header(client):
+    """Outermost, so the total covers the whole stack."""
+    response = client.get("/api/books/")
+
+    assert set(metrics(response)) == {"total", "db", "cache", "view", "render"}
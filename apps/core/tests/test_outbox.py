@@ -0,0 +1,80 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.db import transaction
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from apps.accounts.tasks import send_activation_email
+from apps.core import outbox
+from apps.core.models import OutboxMessage
+from apps.core.tasks import relay_outbox
+
+
+@pytest.fixture
+def send_task():
+    with patch("apps.core.outbox.current_app.send_task") as send_task:
+        yield send_task
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_rolled_back_changes_leave_nothing_to_publish():
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            outbox.enqueue(send_activation_email, 1, "http://example.com/activate")
+            raise RuntimeError("signup failed")
+
+    assert not OutboxMessage.objects.exists()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_relay_publishes_in_order_and_deletes(send_task):
+    outbox.enqueue(send_activation_email, 1, "first")
+    outbox.enqueue(send_activation_email, 2, "second")
+
+    assert outbox.relay() == 2
+
+    assert [call.kwargs["args"] for call in send_task.call_args_list] == [
+        [1, "first"],
+        [2, "second"],
+    ]
+    send_task.assert_called_with(
+        "apps.accounts.tasks.send_activation_email", args=[2, "second"], kwargs={}
+    )
+    assert not OutboxMessage.objects.exists()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_failed_publish_backs_off(send_task):
+    send_task.side_effect = OperationalError("broker down")
+    message = outbox.enqueue(send_activation_email, 1, "link")
+
+    assert outbox.relay() == 0
+
+    message.refresh_from_db()
+    assert message.attempts == 1
+    assert message.last_error == "broker down"
+    assert message.available_at > timezone.now()
+
+    # Not due yet, so the next relay leaves it alone
+    send_task.reset_mock()
+    outbox.relay()
+    send_task.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_relay_task_drains_every_batch(send_task, settings):
+    settings.OUTBOX_BATCH_SIZE = 2
+    past = timezone.now() - timedelta(seconds=1)
+    OutboxMessage.objects.bulk_create(
+        OutboxMessage(task="apps.core.tasks.dispatch_mail", available_at=past)
+        for _ in range(5)
+    )
+
+    assert relay_outbox() == "Relayed 5 outbox messages"
+    assert send_task.call_count == 5
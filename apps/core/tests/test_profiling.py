@@ -0,0 +1,138 @@
+import os
+import pstats
+import time
+from unittest.mock import patch
+
+import pytest
+from django.core import signing
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts.tests.factories import AccountFactory
+from apps.core import profiling
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(settings, tmp_path):
+    settings.PROFILING = {**settings.PROFILING, "DIR": str(tmp_path)}
+    return tmp_path
+
+
+def client_for(account):
+    client = APIClient()
+    refresh = RefreshToken.for_user(account)
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+    return client
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_admin_profiles_a_request_and_reads_the_result(profile_dir):
+    client = client_for(AccountFactory(admin=True))
+    token = client.post(reverse("profile-token")).json()["token"]
+
+    response = client.get(reverse("book-list"), HTTP_X_PROFILE=token)
+
+    assert response.status_code == 200
+    profile_id = response[profiling.ID_HEADER]
+    assert (profile_dir / f"{profile_id}.prof").exists()
+
+    listed = client.get(reverse("profile-list")).json()["profiles"]
+    assert [p["id"] for p in listed] == [profile_id]
+
+    summary = client.get(reverse("profile-detail", args=[profile_id]))
+    text = summary.content.decode()
+    assert text.startswith("GET /api/books/ -> 200")
+    assert "peak traced memory" in text
+    assert "cumulative" in text
+
+    download = client.get(
+        reverse("profile-detail", args=[profile_id]), {"download": "1"}
+    )
+    path = profile_dir / "download.prof"
+    path.write_bytes(b"".join(download.streaming_content))
+    assert pstats.Stats(str(path)).total_calls > 0
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_requests_without_the_header_are_not_profiled(client):
+    with (
+        patch("apps.core.profiling.profile") as profile,
+        patch("apps.core.profiling.admin_for") as admin_for,
+    ):
+        response = client.get(reverse("health-check"))
+
+    assert response.status_code == 200
+    profile.assert_not_called()
+    admin_for.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "token",
+    [
+        lambda: profiling.make_token(AccountFactory(active=True)),
+        lambda: profiling.make_token(AccountFactory(admin=True)) + "x",
+        lambda: signing.dumps({"account": AccountFactory(admin=True).pk}),
+    ],
+    ids=["not-admin", "tampered", "other-salt"],
+)
+def test_invalid_tokens_are_ignored(client, token):
+    response = client.get(reverse("health-check"), HTTP_X_PROFILE=token())
+
+    assert response.status_code == 200
+    assert profiling.ID_HEADER not in response
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_expired_tokens_are_ignored(client, settings):
+    token = profiling.make_token(AccountFactory(admin=True))
+    settings.PROFILING = {**settings.PROFILING, "TOKEN_MAX_AGE": -1}
+
+    response = client.get(reverse("health-check"), HTTP_X_PROFILE=token)
+
+    assert profiling.ID_HEADER not in response
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_profiles_are_admin_only():
+    client = client_for(AccountFactory(active=True))
+
+    assert client.post(reverse("profile-token")).status_code == 403
+    assert client.get(reverse("profile-list")).status_code == 403
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_unknown_profiles_are_not_found():
+    client = client_for(AccountFactory(admin=True))
+
+    response = client.get(reverse("profile-detail", args=["missing"]))
+
+    assert response.status_code == 404
+
+
+@pytest.mark.unit
+def test_old_and_excess_profiles_are_pruned(profile_dir, settings):
+    settings.PROFILING = {**settings.PROFILING, "KEEP": 2, "MAX_AGE": 3600}
+    now = time.time()
+    for name, age in [("old", 7200), ("a", 30), ("b", 20), ("c", 10)]:
+        for extension in ("prof", "txt"):
+            path = profile_dir / f"{name}.{extension}"
+            path.write_text("")
+            os.utime(path, (now - age, now - age))
+
+    profiling._prune()
+
+    assert [p["id"] for p in profiling.list_profiles()] == ["c", "b"]
+    assert sorted(path.name for path in profile_dir.iterdir()) == [
+        "b.prof",
+        "b.txt",
+        "c.prof",
+        "c.txt",
+    ]
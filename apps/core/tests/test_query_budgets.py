@@ -0,0 +1,239 @@
+from unittest.mock import patch
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.accounts.tests.factories import AccountFactory
+from apps.accounts.tokens import account_activation_token, password_reset_token
+from apps.books.tests.factories import BookFactory
+from apps.categories.tests.factories import CategoryFactory
+from apps.core import health, profiling
+from apps.core.queries import budget_of
+from apps.core.throttling import token_buckets
+
+# Enough rows that a per-row query would blow any budget
+ROWS = 10
+
+
+def named_patterns(resolver=None, namespace=""):
+    """``{url name: view}`` for every named pattern outside the admin."""
+    found = {}
+    for pattern in (resolver or get_resolver()).url_patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.app_name == "admin":
+                continue
+            prefix = f"{pattern.namespace}:" if pattern.namespace else ""
+            found.update(named_patterns(pattern, namespace + prefix))
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            found[namespace + pattern.name] = pattern.callback
+    return found
+
+
+ROUTES = named_patterns()
+
+
+@pytest.fixture(autouse=True)
+def clear_state(settings, tmp_path):
+    settings.PROFILING = {**settings.PROFILING, "DIR": str(tmp_path)}
+    cache.clear()
+    token_buckets.local.reset()
+    yield
+    cache.clear()
+    token_buckets.local.reset()
+
+
+def signed_in(client, account):
+    refresh = RefreshToken.for_user(account)
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {refresh.access_token}")
+    client.cookies["refresh_token"] = str(refresh)
+    return refresh
+
+
+def signup(client):
+    data = {
+        "email": "newuser@example.com",
+        "password": "StrongPass123",
+        "phone": "+1234567890",
+        "full_name": "John Doe",
+        "birthday": "1990-01-01",
+    }
+    return lambda: client.post(reverse("signup"), data, format="json")
+
+
+def account_activate(client):
+    account = AccountFactory(inactive=True)
+    url = reverse(
+        "account-activate",
+        args=[
+            urlsafe_base64_encode(force_bytes(account.pk)),
+            account_activation_token.make_token(account),
+        ],
+    )
+    return lambda: client.get(url)
+
+
+def login(client):
+    account = AccountFactory(active=True, password="StrongPass123")
+    data = {"email": account.email, "password": "StrongPass123"}
+    return lambda: client.post(reverse("login"), data, format="json")
+
+
+def logout(client):
+    signed_in(client, AccountFactory(active=True))
+    return lambda: client.post(reverse("logout"))
+
+
+def refresh_token(client):
+    signed_in(client, AccountFactory(active=True))
+    client.credentials()
+    return lambda: client.post(reverse("refresh-token"))
+
+
+def google_signin(client):
+    AccountFactory(email="user@gmail.com", active=True)
+    claims = {
+        "iss": "https://accounts.google.com",
+        "aud": "test-client-id",
+        "sub": "123456789",
+        "email": "user@gmail.com",
+        "email_verified": True,
+        "name": "Google User",
+    }
+
+    def request():
+        with (
+            patch(
+                "apps.accounts.serializers.id_token.verify_oauth2_token",
+                return_value=claims,
+            ),
+            patch("django.conf.settings.GOOGLE_CLIENT_ID", "test-client-id"),
+        ):
+            return client.post(
+                reverse("google-signin"), {"credential": "token"}, format="json"
+            )
+
+    return request
+
+
+def password_reset_request(client):
+    account = AccountFactory(active=True)
+    data = {"email": account.email}
+    return lambda: client.post(reverse("password-reset-request"), data, format="json")
+
+
+def password_reset_confirm(client):
+    account = AccountFactory(active=True)
+    data = {
+        "uidb_64": urlsafe_base64_encode(force_bytes(account.pk)),
+        "token": password_reset_token.make_token(account),
+        "new_password": "NewStrongPass123",
+    }
+    return lambda: client.post(reverse("password-reset-confirm"), data, format="json")
+
+
+def edit_user_info(client):
+    signed_in(client, AccountFactory(active=True))
+    data = {"full_name": "Jane Doe"}
+    return lambda: client.patch(reverse("edit-user-info"), data, format="json")
+
+
+def book_list(client):
+    BookFactory.create_batch(ROWS, category=CategoryFactory())
+    return lambda: client.get(reverse("book-list"), {"sort": "top_rated"})
+
+
+def category_list(client):
+    for i in range(ROWS):
+        CategoryFactory(name=f"Category {i}")
+    return lambda: client.get(reverse("categories:category-list"))
+
+
+def health_check(client):
+    return lambda: client.get(reverse("health-check"))
+
+
+def health_ready(client):
+    health.reset()
+    return lambda: client.get(reverse("health-ready"))
+
+
+def metrics(client):
+    def scrape():
+        with override_settings(METRICS={**settings.METRICS, "TOKEN": "token"}):
+            return client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer token")
+
+    return scrape
+
+
+def profile_token(client):
+    signed_in(client, AccountFactory(admin=True))
+    return lambda: client.post(reverse("profile-token"))
+
+
+def profile_list(client):
+    signed_in(client, AccountFactory(admin=True))
+    return lambda: client.get(reverse("profile-list"))
+
+
+def profile_detail(client):
+    admin = AccountFactory(admin=True)
+    signed_in(client, admin)
+    response = client.get(
+        reverse("health-check"), HTTP_X_PROFILE=profiling.make_token(admin)
+    )
+    url = reverse("profile-detail", args=[response[profiling.ID_HEADER]])
+    return lambda: client.get(url)
+
+
+# One representative, successful request per URL name, set up with ROWS
+# related rows wherever the response lists anything
+SCENARIOS = {
+    "signup": signup,
+    "account-activate": account_activate,
+    "login": login,
+    "logout": logout,
+    "refresh-token": refresh_token,
+    "google-signin": google_signin,
+    "password-reset-request": password_reset_request,
+    "password-reset-confirm": password_reset_confirm,
+    "edit-user-info": edit_user_info,
+    "book-list": book_list,
+    "categories:category-list": category_list,
+    "health-check": health_check,
+    "health-ready": health_ready,
+    "metrics": metrics,
+    "profile-token": profile_token,
+    "profile-list": profile_list,
+    "profile-detail": profile_detail,
+}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("name", sorted(ROUTES))
+def test_view_declares_a_query_budget(name):
+    assert budget_of(ROUTES[name]) is not None, f"{name} has no @query_budget"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("name", sorted(ROUTES))
+def test_view_has_a_budget_scenario(name):
+    assert name in SCENARIOS, f"Add a scenario for {name} to SCENARIOS"
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", sorted(SCENARIOS))
+def test_view_stays_within_its_query_budget(name, django_assert_max_num_queries):
+    request = SCENARIOS[name](APIClient())
+
+    with django_assert_max_num_queries(budget_of(ROUTES[name])):
+        response = request()
+
+    assert response.status_code < 400, response.content
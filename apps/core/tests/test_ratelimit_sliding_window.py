@@ -0,0 +1,98 @@
+import pytest
+import redis
+from unittest.mock import MagicMock, patch
+from django.core.cache import cache
+from apps.core.ratelimit import SlidingWindowCounter
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.unit
+def test_increment_count_and_reset_without_redis():
+    """Falls back to the Django cache when Redis is not configured."""
+    counter = SlidingWindowCounter("test", window=60)
+
+    assert counter.count("a") == 0
+    assert [counter.increment("a") for _ in range(3)] == [1, 2, 3]
+    assert counter.count("a") == 3
+    assert counter.count("b") == 0
+
+    counter.reset("a")
+
+    assert counter.count("a") == 0
+
+
+@pytest.mark.unit
+def test_previous_window_is_weighted_by_overlap():
+    """Events from the previous window fade out as the window slides."""
+    counter = SlidingWindowCounter("test", window=100)
+
+    with patch("apps.core.ratelimit.time.time", return_value=1050):
+        for _ in range(4):
+            counter.increment("a")
+
+    with patch("apps.core.ratelimit.time.time", return_value=1125):
+        assert counter.count("a") == 3  # 4 * 0.75
+
+    with patch("apps.core.ratelimit.time.time", return_value=1190):
+        assert counter.count("a") == 1  # ceil(4 * 0.1)
+
+    with patch("apps.core.ratelimit.time.time", return_value=1200):
+        assert counter.count("a") == 0
+
+
+@pytest.mark.unit
+def test_increment_uses_one_redis_pipeline():
+    """With Redis, INCR and EXPIRE go out in a single pipeline."""
+    client = MagicMock()
+    pipe = client.pipeline.return_value
+    pipe.execute.return_value = [2, True, b"4"]
+    counter = SlidingWindowCounter("test", window=100)
+
+    with (
+        patch("apps.core.ratelimit.get_redis_client", return_value=client),
+        patch("apps.core.ratelimit.time.time", return_value=1050),
+    ):
+        assert counter.increment("a") == 4  # 2 + 4 * 0.5
+
+    pipe.incr.assert_called_once_with("ratelimit:test:a:10")
+    pipe.expire.assert_called_once_with("ratelimit:test:a:10", 200)
+    pipe.get.assert_called_once_with("ratelimit:test:a:9")
+    pipe.execute.assert_called_once()
+
+
+def broken_redis():
+    client = MagicMock()
+    client.pipeline.return_value.execute.side_effect = redis.ConnectionError
+    client.mget.side_effect = redis.ConnectionError
+    client.delete.side_effect = redis.ConnectionError
+    return patch("apps.core.ratelimit.get_redis_client", return_value=client)
+
+
+@pytest.mark.unit
+def test_redis_outage_falls_back_to_counting_in_process(caplog):
+    """A Redis outage must not switch the guard off."""
+    counter = SlidingWindowCounter("test", window=60)
+
+    with broken_redis(), caplog.at_level("ERROR", logger="apps.core.ratelimit"):
+        assert [counter.increment("a") for _ in range(3)] == [1, 2, 3]
+        assert counter.count("a") == 3
+
+        counter.reset("a")
+
+        assert counter.count("a") == 0
+    assert caplog.records[0].levelname == "ERROR"
+
+
+@pytest.mark.unit
+def test_fail_open_counter_reads_zero_during_an_outage():
+    counter = SlidingWindowCounter("test", window=60, fail_open=True)
+
+    with broken_redis():
+        assert counter.increment("a") == 0
+        assert counter.count("a") == 0
@@ -0,0 +1,71 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, Sum
+
+from apps.accounts.models import Account
+from apps.books.models import Book
+from apps.comments.models import Comment
+
+
+def seed(*args):
+    out = StringIO()
+    call_command("seed_data", "--clear", *args, stdout=out)
+    return out.getvalue()
+
+
+def snapshot():
+    books = list(
+        Book.objects.order_by("pk").values_list(
+            "title", "author_name", "unit_price", "category__name", "total_rating_value"
+        )
+    )
+    comments = list(
+        Comment.objects.order_by("book_id", "account__email").values_list(
+            "book__title", "account__email", "rating"
+        )
+    )
+    return books, comments
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_same_seed_gives_the_same_data():
+    seed("--books", "12", "--accounts", "6", "--comments", "30", "--seed", "7")
+    first = snapshot()
+    seed(
+        "--books", "12", "--accounts", "6", "--comments", "30", "--seed", "7",
+        "--batch-size", "5",
+    )  # fmt: skip
+
+    assert snapshot() == first
+    assert Book.objects.count() == 12
+    assert Account.objects.count() == 6
+    assert Comment.objects.count() == 30
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_rating_totals_match_the_comments():
+    seed("--books", "10", "--accounts", "5", "--comments", "37", "--seed", "3")
+
+    for book in Book.objects.annotate(
+        comment_count=Count("comments"), comment_sum=Sum("comments__rating")
+    ):
+        assert book.total_rating_count == book.comment_count
+        assert book.total_rating_value == (book.comment_sum or 0)
+        assert (book.rating_score > 0) == (book.comment_count > 0)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_comments_are_capped_at_one_per_account_and_book():
+    output = seed("--books", "3", "--accounts", "4", "--comments", "100", "--seed", "1")
+
+    assert "Only 12 comments fit" in output
+    assert Comment.objects.count() == 12
+    assert (
+        Comment.objects.values("account", "book").distinct().count()
+        == Comment.objects.count()
+    )
@@ -0,0 +1,154 @@
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import ResolverMatch
+
+from apps.books.models import Book
+from apps.core import slow_queries
+from apps.core.middleware import SlowQueryMiddleware
+from apps.core.models import SlowQuery
+from apps.core.tasks import record_slow_queries
+
+CAPTURING = {
+    "ENABLED": True,
+    "THRESHOLD_MS": 0,
+    "EXPLAIN_SAMPLE_RATE": 1.0,
+    "MAX_PER_REQUEST": 20,
+}
+
+
+def count_books(request):
+    return HttpResponse(str(Book.objects.filter(title="Dune").count()))
+
+
+def request_for(view):
+    request = RequestFactory().get("/api/books/")
+    request.resolver_match = ResolverMatch(view, (), {})
+    return request
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(SLOW_QUERIES=CAPTURING)
+def test_slow_queries_are_logged_and_queued_with_their_view(caplog):
+    with patch("apps.core.tasks.record_slow_queries.delay") as delay:
+        SlowQueryMiddleware(count_books)(request_for(count_books))
+
+    view, [(sql, params, duration_ms, explain)] = delay.call_args.args
+    assert 'FROM "books"' in sql
+    assert params == ["Dune"]
+    assert duration_ms >= 0
+    assert view == f"{__name__}.count_books"
+    assert explain is True
+    assert f"in {__name__}.count_books" in caplog.text
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(SLOW_QUERIES={**CAPTURING, "EXPLAIN_SAMPLE_RATE": 0.0})
+def test_parameters_are_only_sent_for_sampled_plans():
+    with patch("apps.core.tasks.record_slow_queries.delay") as delay:
+        SlowQueryMiddleware(count_books)(request_for(count_books))
+
+    _, [(_, params, _, explain)] = delay.call_args.args
+    assert params is None
+    assert explain is False
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(SLOW_QUERIES={**CAPTURING, "THRESHOLD_MS": 10_000})
+def test_fast_queries_are_ignored():
+    with patch("apps.core.tasks.record_slow_queries.delay") as delay:
+        SlowQueryMiddleware(count_books)(request_for(count_books))
+
+    delay.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(SLOW_QUERIES={**CAPTURING, "MAX_PER_REQUEST": 3})
+def test_a_request_sends_one_task_with_at_most_max_per_request(caplog):
+    def count_books_often(request):
+        for _ in range(5):
+            Book.objects.filter(title="Dune").count()
+        return HttpResponse()
+
+    with patch("apps.core.tasks.record_slow_queries.delay") as delay:
+        SlowQueryMiddleware(count_books_often)(request_for(count_books_often))
+
+    delay.assert_called_once()
+    _, queries = delay.call_args.args
+    assert len(queries) == 3
+    # Every statement is still logged
+    assert caplog.text.count("Slow query") == 5
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_task_records_every_statement_of_the_request():
+    sql = 'SELECT COUNT(*) FROM "books" WHERE "books"."title" = %s'
+
+    record_slow_queries.apply(
+        args=["apps.books.views.BookListView", [[sql, None, 250.0, False]] * 2]
+    )
+
+    assert SlowQuery.objects.get().calls == 2
+
+
+@pytest.mark.unit
+@override_settings(SLOW_QUERIES={**CAPTURING, "ENABLED": False})
+def test_disabled_capture_is_not_loaded():
+    with pytest.raises(MiddlewareNotUsed):
+        SlowQueryMiddleware(count_books)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_executions_are_aggregated_by_fingerprint_and_view():
+    sql = 'SELECT COUNT(*) FROM "books" WHERE "books"."title" = %s'
+
+    slow_queries.record(sql, None, 250.0, "apps.books.views.BookListView")
+    slow_queries.record(sql, ["Dune"], 400.0, "apps.books.views.BookListView", True)
+    slow_queries.record(sql, None, 300.0, "apps.core.views.other")
+
+    entry = SlowQuery.objects.get(view="apps.books.views.BookListView")
+    assert entry.calls == 2
+    assert entry.total_ms == 650.0
+    assert entry.max_ms == 400.0
+    assert entry.mean_ms == 325.0
+    assert entry.plan  # SQLite's EXPLAIN QUERY PLAN rows
+    assert entry.plan_captured_at is not None
+    assert SlowQuery.objects.count() == 2
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_statements_that_cannot_be_explained_are_still_recorded():
+    slow_queries.record("SAVEPOINT s1", None, 300.0, "view", with_plan=True)
+
+    entry = SlowQuery.objects.get()
+    assert entry.plan is None
+    assert entry.calls == 1
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_report_lists_the_slowest_first():
+    slow_queries.record('SELECT 1 FROM "books"', None, 100.0, "fast.view")
+    slow_queries.record('SELECT 2 FROM "comments"', None, 900.0, "slow.view")
+
+    out = StringIO()
+    call_command("slow_query_report", "--plans", stdout=out)
+
+    report = out.getvalue()
+    assert report.index("slow.view") < report.index("fast.view")
+    assert "plan: not sampled yet" in report
+
+    call_command("slow_query_report", "--clear", stdout=StringIO())
+    assert not SlowQuery.objects.exists()
@@ -0,0 +1,201 @@
+import pytest
+import redis
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.core.throttling import (
+    LocalTokenBuckets,
+    TokenBucketThrottle,
+    parse_rate,
+    token_buckets,
+)
+
+THROTTLES = {
+    "login": {"ip": "3/min", "email": "2/min", "global": "100/min"},
+    "password_reset": {"ip": "2/hour"},
+    "email_only": {"email": "1/hour"},
+}
+
+
+@pytest.fixture(autouse=True)
+def reset_buckets():
+    token_buckets.local.reset()
+    yield
+    token_buckets.local.reset()
+
+
+@pytest.mark.unit
+def test_parse_rate():
+    assert parse_rate("10/min") == (10, 10 / 60)
+    assert parse_rate("5/s") == (5, 5)
+    assert parse_rate("3/hour") == (3, 3 / 3600)
+
+
+@pytest.mark.unit
+def test_local_buckets_refill_over_time():
+    buckets = LocalTokenBuckets()
+    spec = [("a", 2, 1.0)]
+
+    with patch("apps.core.throttling.time.monotonic", return_value=100.0):
+        assert buckets.consume(spec) == (True, 0.0, [1])
+        assert buckets.consume(spec) == (True, 0.0, [0])
+        allowed, wait, remaining = buckets.consume(spec)
+        assert not allowed
+        assert wait == pytest.approx(1.0)
+
+    with patch("apps.core.throttling.time.monotonic", return_value=101.5):
+        assert buckets.consume(spec)[0] is True
+
+
+@pytest.mark.unit
+def test_local_buckets_drop_refilled_entries_past_the_size_limit():
+    buckets = LocalTokenBuckets()
+
+    with (
+        patch("apps.core.throttling.LOCAL_PRUNE_SIZE", 100),
+        patch("apps.core.throttling.time.monotonic", return_value=100.0),
+    ):
+        buckets.consume([("busy", 2, 0.01)])
+        for i in range(150):
+            buckets.consume([(f"user{i}@example.com", 5, 1.0)])
+
+    with (
+        patch("apps.core.throttling.LOCAL_PRUNE_SIZE", 100),
+        patch("apps.core.throttling.time.monotonic", return_value=110.0),
+    ):
+        buckets.consume([("new@example.com", 5, 1.0)])
+        assert len(buckets._buckets) == 2
+        # A bucket still refilling keeps its state
+        assert buckets.consume([("busy", 2, 0.01)]) == (True, 0.0, [0])
+
+
+@pytest.mark.unit
+def test_rejection_does_not_drain_other_buckets():
+    """Tokens are only taken when every bucket has one."""
+    buckets = LocalTokenBuckets()
+
+    with patch("apps.core.throttling.time.monotonic", return_value=100.0):
+        buckets.consume([("empty", 1, 0.01)])
+        allowed, _, remaining = buckets.consume([("own", 5, 0.01), ("empty", 1, 0.01)])
+        assert not allowed
+        assert buckets.consume([("own", 5, 0.01)]) == (True, 0.0, [4])
+
+
+@pytest.mark.unit
+def test_redis_errors_fall_back_to_local_buckets():
+    client = MagicMock()
+    client.register_script.return_value.side_effect = redis.ConnectionError()
+
+    with patch("apps.core.throttling.get_redis_client", return_value=client):
+        allowed, _, remaining = token_buckets.consume([("a", 3, 1.0)])
+
+    assert allowed
+    assert remaining == [2]
+
+
+@pytest.mark.unit
+def test_redis_result_is_parsed():
+    client = MagicMock()
+    client.register_script.return_value.return_value = [0, b"1.5", [3, 0]]
+
+    with patch("apps.core.throttling.get_redis_client", return_value=client):
+        result = token_buckets.consume([("a", 5, 1.0), ("b", 1, 1.0)])
+
+    assert result == (False, 1.5, [3, 0])
+    script = client.register_script.return_value
+    script.assert_called_once_with(keys=["a", "b"], args=[5, 1.0, 1, 1.0])
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(TOKEN_BUCKET_THROTTLES=THROTTLES)
+def test_login_is_throttled_per_email_with_quota_headers():
+    client = APIClient()
+    url = reverse("login")
+    payload = {"email": "Someone@example.com", "password": "wrong"}
+
+    first = client.post(url, payload, format="json")
+    assert first["X-RateLimit-Limit"] == "2"
+    assert first["X-RateLimit-Remaining"] == "1"
+
+    client.post(url, payload, format="json")
+    throttled = client.post(url, payload, format="json")
+
+    assert throttled.status_code == 429
+    assert int(throttled["Retry-After"]) >= 1
+    assert throttled["X-RateLimit-Remaining"] == "0"
+
+    # Another email from the same IP still has IP quota left
+    other = client.post(url, {"email": "x@example.com", "password": "p"}, format="json")
+    assert other.status_code == 400
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(TOKEN_BUCKET_THROTTLES=THROTTLES)
+def test_password_reset_is_throttled_per_ip():
+    client = APIClient()
+    url = reverse("password-reset-request")
+
+    statuses = [
+        client.post(url, {"email": f"u{i}@example.com"}, format="json").status_code
+        for i in range(3)
+    ]
+
+    assert statuses == [200, 200, 429]
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(TOKEN_BUCKET_THROTTLES=THROTTLES)
+def test_forged_forwarded_for_does_not_reset_the_ip_bucket():
+    client = APIClient()
+    url = reverse("password-reset-request")
+
+    statuses = [
+        client.post(
+            url,
+            {"email": f"u{i}@example.com"},
+            format="json",
+            HTTP_X_FORWARDED_FOR=f"203.0.113.{i}",
+        ).status_code
+        for i in range(3)
+    ]
+
+    assert statuses == [200, 200, 429]
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+@override_settings(
+    TOKEN_BUCKET_THROTTLES=THROTTLES,
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1},
+)
+def test_behind_a_proxy_the_address_it_appended_is_used():
+    client = APIClient()
+    url = reverse("password-reset-request")
+
+    statuses = [
+        client.post(
+            url,
+            {"email": f"u{i}@example.com"},
+            format="json",
+            HTTP_X_FORWARDED_FOR=f"203.0.113.{i}, 198.51.100.7",
+        ).status_code
+        for i in range(3)
+    ]
+
+    assert statuses == [200, 200, 429]
+
+
+@pytest.mark.unit
+@override_settings(TOKEN_BUCKET_THROTTLES=THROTTLES)
+def test_scope_without_applicable_buckets_allows_the_request():
+    request = SimpleNamespace(data={}, META={"REMOTE_ADDR": "192.0.2.1"})
+    view = SimpleNamespace(throttle_scope="email_only")
+
+    assert TokenBucketThrottle().allow_request(request, view) is True
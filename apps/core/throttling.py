@@ -0,0 +1,202 @@
+import logging
+import threading
+import time
+
+import redis
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+from .redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "day": 86400}
+
+# KEYS: one per bucket. ARGV: capacity and refill rate (tokens/s) per bucket.
+# Tokens are only taken when every bucket has one, so a request rejected by
+# the global bucket does not also drain the caller's own bucket.
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local tokens = {}
+local allowed = 1
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local current = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    current = math.min(capacity, current + math.max(0, now - ts) * rate)
+    tokens[i] = current
+    if current < 1 then
+        allowed = 0
+        wait = math.max(wait, (1 - current) / rate)
+    end
+end
+local remaining = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    if allowed == 1 then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens[i]), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+    remaining[i] = math.floor(tokens[i])
+end
+return {allowed, tostring(wait), remaining}
+"""
+
+
+def parse_rate(rate):
+    """Parse ``"10/min"`` into ``(capacity, tokens per second)``."""
+    count, period = rate.split("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period]
+
+
+# Full buckets are dropped from LocalTokenBuckets once it holds this many
+LOCAL_PRUNE_SIZE = 10000
+
+
+class LocalTokenBuckets:
+    """
+    In-process token buckets used when Redis is unavailable.
+
+    Each bucket remembers when it will have refilled to capacity; past that
+    it holds no state, so such buckets are dropped once there are
+    ``LOCAL_PRUNE_SIZE`` of them. Keys include client-chosen emails.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def consume(self, buckets):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) >= LOCAL_PRUNE_SIZE:
+                self._buckets = {
+                    key: bucket
+                    for key, bucket in self._buckets.items()
+                    if bucket[2] > now
+                }
+            tokens = []
+            wait = 0.0
+            for key, capacity, rate in buckets:
+                current, ts, _ = self._buckets.get(key, (capacity, now, now))
+                current = min(capacity, current + (now - ts) * rate)
+                tokens.append(current)
+                if current < 1:
+                    wait = max(wait, (1 - current) / rate)
+
+            allowed = wait == 0
+            if allowed:
+                tokens = [current - 1 for current in tokens]
+            for (key, capacity, rate), current in zip(buckets, tokens):
+                full_at = now + (capacity - current) / rate
+                self._buckets[key] = (current, now, full_at)
+
+        return allowed, wait, [int(current) for current in tokens]
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class TokenBuckets:
+    """Token buckets in Redis, evaluated atomically by a Lua script."""
+
+    def __init__(self):
+        self.local = LocalTokenBuckets()
+        self._scripts = {}
+
+    def consume(self, buckets):
+        """
+        Take one token from every bucket, or none if any is empty.
+
+        ``buckets`` is a list of ``(key, capacity, rate)``. Returns
+        ``(allowed, wait_seconds, remaining_per_bucket)``.
+        """
+        client = get_redis_client()
+        if client is None:
+            return self.local.consume(buckets)
+
+        script = self._scripts.get(id(client))
+        if script is None:
+            script = self._scripts[id(client)] = client.register_script(
+                TOKEN_BUCKET_SCRIPT
+            )
+
+        args = []
+        for _, capacity, rate in buckets:
+            args.extend([capacity, rate])
+        try:
+            allowed, wait, remaining = script(
+                keys=[key for key, _, _ in buckets], args=args
+            )
+        except redis.RedisError:
+            logger.warning("Throttle falling back to in-process buckets", exc_info=True)
+            return self.local.consume(buckets)
+        return bool(allowed), float(wait), [int(value) for value in remaining]
+
+
+token_buckets = TokenBuckets()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Per-IP, per-email and global token buckets for ``view.throttle_scope``.
+
+    Rates come from ``settings.TOKEN_BUCKET_THROTTLES[scope]``, e.g.
+    ``{"ip": "10/min", "email": "5/hour", "global": "100/s"}``; a missing
+    entry disables that bucket. The IP is taken from ``X-Forwarded-For``
+    only as far as ``REST_FRAMEWORK["NUM_PROXIES"]`` trusted proxies reach.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        rates = settings.TOKEN_BUCKET_THROTTLES.get(scope)
+        if not rates:
+            return True
+
+        identities = {"ip": self.get_ident(request), "global": "all"}
+        email = request.data.get("email") if hasattr(request.data, "get") else None
+        if isinstance(email, str) and email:
+            identities["email"] = email.strip().lower()
+
+        buckets = []
+        for kind, rate in rates.items():
+            if kind in identities:
+                capacity, refill = parse_rate(rate)
+                key = f"throttle:{scope}:{kind}:{identities[kind]}"
+                buckets.append((key, capacity, refill))
+        if not buckets:
+            # e.g. an email-only scope and a request without an email
+            return True
+
+        allowed, self._wait, remaining = token_buckets.consume(buckets)
+
+        # Report the bucket closest to running out
+        tightest = min(range(len(buckets)), key=lambda i: remaining[i])
+        request.throttle_quota = (buckets[tightest][1], max(0, remaining[tightest]))
+        if not allowed and metrics.enabled():
+            metrics.THROTTLE_REJECTIONS.inc(scope=scope)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class ThrottleHeadersMixin:
+    """Expose the remaining quota set by ``TokenBucketThrottle`` as headers."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        quota = getattr(request, "throttle_quota", None)
+        if quota is not None:
+            response["X-RateLimit-Limit"] = str(quota[0])
+            response["X-RateLimit-Remaining"] = str(quota[1])
+        return response
@@ -0,0 +1,119 @@
+import json
+import logging
+from contextvars import ContextVar
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_timings", default=None)
+
+
+def current():
+    """The ``RequestTimings`` of the request being handled, if it is sampled."""
+    return _current.get()
+
+
+class RequestTimings:
+    """
+    Where one request's time went.
+
+    Installed as a ``connection.execute_wrapper`` to time queries; the cache
+    backends in ``apps.core.cache`` and ``ServerTimingMiddleware`` fill in
+    the rest. All durations are in seconds.
+    """
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.finished = None
+        self.db = 0.0
+        self.queries = 0
+        self.cache = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Python time in the view: DRF serializes there, so this is the
+        # serialization and business logic without DB and cache time
+        self.view = 0.0
+        self.render = 0.0
+        self._view_started = None
+        self._render_started = None
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += perf_counter() - started
+            self.queries += 1
+
+    def record_cache(self, hits, misses, seconds):
+        self.cache_hits += hits
+        self.cache_misses += misses
+        self.cache += seconds
+
+    def start_view(self):
+        self._view_started = (perf_counter(), self.db + self.cache)
+
+    def _finish_view(self, now):
+        if self._view_started is not None:
+            started, io = self._view_started
+            self.view = max(now - started - (self.db + self.cache - io), 0.0)
+            self._view_started = None
+
+    def start_render(self):
+        self._render_started = perf_counter()
+        self._finish_view(self._render_started)
+
+    def finish_render(self):
+        self.render = perf_counter() - self._render_started
+
+    def finish(self):
+        self.finished = perf_counter()
+        self._finish_view(self.finished)
+
+    @property
+    def total(self):
+        return (self.finished or perf_counter()) - self.started
+
+    def metrics(self):
+        """``(name, seconds, description)`` for each Server-Timing metric."""
+        return [
+            ("total", self.total, ""),
+            ("db", self.db, f"{self.queries} queries"),
+            ("cache", self.cache, f"{self.cache_hits} hits {self.cache_misses} misses"),
+            ("view", self.view, "serialization and logic"),
+            ("render", self.render, ""),
+        ]
+
+    def header(self):
+        parts = []
+        for name, seconds, description in self.metrics():
+            part = f"{name};dur={seconds * 1000:.1f}"
+            if description:
+                part += f';desc="{description}"'
+            parts.append(part)
+        return ", ".join(parts)
+
+    def log(self, request, response):
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(self.total * 1000, 2),
+            "db_ms": round(self.db * 1000, 2),
+            "queries": self.queries,
+            "cache_ms": round(self.cache * 1000, 2),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "view_ms": round(self.view * 1000, 2),
+            "render_ms": round(self.render * 1000, 2),
+        }
+        logger.info(json.dumps(record, separators=(",", ":")))
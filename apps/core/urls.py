@@ -1,6 +1,18 @@
 from django.urls import path
-from .views import health_check_view
+from .views import (
+    health_check_view,
+    metrics_view,
+    profile_detail_view,
+    profile_list_view,
+    profile_token_view,
+    readiness_view,
+)
 
 urlpatterns = [
     path("health/", health_check_view, name="health-check"),
+    path("health/ready/", readiness_view, name="health-ready"),
+    path("metrics/", metrics_view, name="metrics"),
+    path("profiles/", profile_list_view, name="profile-list"),
+    path("profiles/token/", profile_token_view, name="profile-token"),
+    path("profiles/<str:profile_id>/", profile_detail_view, name="profile-detail"),
 ]
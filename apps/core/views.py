@@ -1,9 +1,94 @@
-from rest_framework.decorators import api_view
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 
+from . import health, metrics, profiling
+from .queries import query_budget
 
+
+@query_budget(0)
 @api_view(["GET"])
 def health_check_view(request):
     data = {"status": "ok"}
     return Response(data, status=status.HTTP_200_OK)
+
+
+@query_budget(1)
+@api_view(["GET"])
+def readiness_view(request):
+    """
+    Readiness: probe the database, cache and broker with per-probe latency.
+
+    Answers 503 unless every dependency responded in time. Results are
+    cached briefly per process; ``health_check_view`` stays the cheap
+    liveness check.
+    """
+    report = health.readiness()
+    code = (
+        status.HTTP_200_OK
+        if report["status"] == health.OK
+        else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    return Response(report, status=code)
+
+
+@query_budget(0)
+def metrics_view(request):
+    """
+    Prometheus metrics from every worker process.
+
+    Scrapers must send ``METRICS["TOKEN"]`` as a bearer token. Without a
+    token configured the endpoint is closed, unless ``DEBUG`` is on.
+    """
+    token = settings.METRICS["TOKEN"]
+    if token:
+        expected = f"Bearer {token}"
+        if not constant_time_compare(
+            request.headers.get("Authorization", ""), expected
+        ):
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    elif not settings.DEBUG:
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@query_budget(1)
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def profile_token_view(request):
+    """A token that profiles the admin's requests sent with it as ``X-Profile``."""
+    return Response(
+        {
+            "header": profiling.HEADER,
+            "token": profiling.make_token(request.user),
+            "expires_in": settings.PROFILING["TOKEN_MAX_AGE"],
+        }
+    )
+
+
+@query_budget(1)
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def profile_list_view(request):
+    return Response({"profiles": profiling.list_profiles()})
+
+
+@query_budget(1)
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def profile_detail_view(request, profile_id):
+    """The text summary of a profile, or its pstats dump with ``?download=1``."""
+    download = request.query_params.get("download")
+    path = profiling.profile_path(profile_id, "prof" if download else "txt")
+    if path is None:
+        raise Http404
+    if download:
+        return FileResponse(
+            open(path, "rb"), as_attachment=True, filename=f"{profile_id}.prof"
+        )
+    with open(path) as f:
+        return HttpResponse(f.read(), content_type="text/plain; charset=utf-8")
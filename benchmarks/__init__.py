@@ -0,0 +1,19 @@
+"""
+Standalone performance benchmarks.
+
+Each module is runnable from the project root against a real database, e.g.::
+
+    DJANGO_SETTINGS_MODULE=config.settings.development python -m benchmarks.rating_writes
+
+Benchmarks create their own data and remove it afterwards.
+"""
+
+import os
+
+
+def setup():
+    """Configure Django for a benchmark run outside ``manage.py``."""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+    django.setup()
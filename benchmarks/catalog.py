@@ -0,0 +1,300 @@
+"""
+Latency, queries and memory of the catalog endpoints at growing catalog sizes.
+
+Seeds books with comments up to each of ``--sizes`` (data is added
+incrementally, so 10k, 100k and 1M seed 1M rows in total), then sends
+``--requests`` GETs per scenario straight into a ``WSGIHandler`` with the
+project's middleware: the book list's first page, a deep page, search,
+category filter and all of them combined, the category list and the
+health check. Reports p50/p95/p99, queries per request and the peak
+Python allocation of one request, and writes everything to ``--output`` as
+JSON so runs can be compared across commits.
+
+    python -m benchmarks.catalog --sizes 10000 100000 1000000 --output catalog.json
+    python manage.py benchmark_catalog --sizes 10000 --requests 50
+
+Use PostgreSQL for numbers that mean anything in production; SQLite works
+for comparing commits locally. Seeded rows are removed afterwards unless
+``--keep`` is given.
+"""
+
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks import setup
+
+PREFIX = "Catalog benchmark"
+CATEGORIES = 10
+SEARCH_WORDS = [
+    "river", "glass", "orbit", "ember", "north", "cedar", "quartz", "harbor",
+    "meadow", "signal", "lantern", "tundra", "copper", "violet", "falcon",
+    "canyon", "willow", "cipher", "summit", "atlas",
+]  # fmt: skip
+BATCH_SIZE = 5000
+# Fixed, so every run seeds the same catalog
+SEED = 0
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+        help="Catalog sizes to measure, in books (default: 10k 100k 1M)",
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=200,
+        help="Requests per scenario (default: 200)",
+    )
+    parser.add_argument(
+        "--comments-per-book",
+        type=int,
+        default=3,
+        help="Comments seeded for every book (default: 3)",
+    )
+    parser.add_argument(
+        "--accounts",
+        type=int,
+        default=1000,
+        help="Accounts the comments are spread over (default: 1000)",
+    )
+    parser.add_argument(
+        "--output",
+        help="Write the results to this JSON file",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Leave the seeded rows in the database",
+    )
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, round(fraction * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Seeder:
+    """
+    Adds benchmark books, comments and their rating totals in bulk.
+
+    Rows come from ``seed_data``'s ``SeedPlan`` and ``seed_batch``, planned
+    for the largest size with exactly ``comments_per_book`` comments each,
+    so growing the catalog step by step gives the same rows as seeding it
+    at once.
+    """
+
+    def __init__(self, books, accounts, comments_per_book):
+        from apps.accounts.models import Account
+        from apps.categories.models import Category
+        from apps.core.management.commands.seed_data import SeedPlan
+
+        if comments_per_book > accounts:
+            raise ValueError("--comments-per-book cannot exceed --accounts")
+        self.categories = Category.objects.bulk_create(
+            Category(name=f"{PREFIX} {i}", sort_order=10_000 + i)
+            for i in range(CATEGORIES)
+        )
+        self.accounts = Account.objects.bulk_create(
+            Account(
+                email=f"catalog-benchmark-{i}@example.com",
+                full_name=f"Reader {i}",
+                password="!",
+                is_active=True,
+            )
+            for i in range(accounts)
+        )
+        self.plan = SeedPlan(
+            SEED,
+            books,
+            books * comments_per_book,
+            [category.pk for category in self.categories],
+            [account.pk for account in self.accounts],
+        )
+        # Every search word starts an equal share of the titles
+        self.plan.titles = [
+            f"{SEARCH_WORDS[i % len(SEARCH_WORDS)]} {title}"
+            for i, title in enumerate(self.plan.titles)
+        ]
+        self.books = 0
+
+    def grow(self, books):
+        """Seed books ``self.books`` up to ``books``."""
+        from apps.core.management.commands.seed_data import seed_batch
+
+        while self.books < books:
+            end = min(books, self.books + BATCH_SIZE)
+            seed_batch(self.plan, self.books, end, BATCH_SIZE)
+            self.books = end
+
+    def clear(self):
+        from apps.accounts.models import Account
+        from apps.books.models import Book
+        from apps.comments.services import delete_books
+
+        delete_books(
+            Book.objects.filter(category__in=self.categories).values_list(
+                "pk", flat=True
+            )
+        )
+        for category in self.categories:
+            category.delete()
+        Account.objects.filter(pk__in=[a.pk for a in self.accounts]).delete()
+
+
+def scenarios(books):
+    deep_page = max(1, books // 10 - 1)
+    category = f"{PREFIX} 3"
+    # A twentieth of the titles start with each word, spread over the categories
+    word = SEARCH_WORDS[3]
+    return [
+        ("books_first_page", "/api/books/", {}),
+        ("books_deep_page", "/api/books/", {"page": deep_page}),
+        ("books_search", "/api/books/", {"search": word}),
+        ("books_category", "/api/books/", {"category": category}),
+        (
+            "books_combined",
+            "/api/books/",
+            {"category": category, "search": word, "sort": "top_rated"},
+        ),
+        ("categories", "/api/categories/", {}),
+        ("health", "/api/health/", {}),
+    ]
+
+
+def measure(handler, path, params, requests):
+    from django.db import connections
+    from django.test import RequestFactory
+    from apps.core.middleware import QueryCounter
+
+    request = RequestFactory().get(path, params)
+    environ = request.environ
+    statuses = []
+
+    def start_response(status, headers):
+        statuses.append(status)
+
+    def send():
+        response = handler(dict(environ), start_response)
+        b"".join(response)
+        response.close()
+
+    send()  # warm caches and connections
+    counter = QueryCounter()
+    timings = []
+    with connections["default"].execute_wrapper(counter):
+        for _ in range(requests):
+            started = time.perf_counter()
+            send()
+            timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    send()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert set(statuses) == {"200 OK"}, set(statuses)
+    timings.sort()
+    return {
+        "path": request.get_full_path(),
+        "requests": requests,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+        "queries_per_request": counter.queries / requests,
+        "peak_alloc_kb": peak / 1024,
+    }
+
+
+def run(options, write=print):
+    """Seed, measure every scenario at every size and return the report."""
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "comments_per_book": options["comments_per_book"],
+        "results": [],
+    }
+    # Inspection, timing and profiling middleware would add their own cost
+    # (and log lines) to every request
+    with override_settings(
+        ALLOWED_HOSTS=["testserver"],
+        QUERY_INSPECTION={**settings.QUERY_INSPECTION, "ENABLED": False},
+        SERVER_TIMING={**settings.SERVER_TIMING, "ENABLED": False},
+        SLOW_QUERIES={**settings.SLOW_QUERIES, "ENABLED": False},
+        PROFILING={**settings.PROFILING, "ENABLED": False},
+    ):
+        handler = WSGIHandler()
+        seeder = Seeder(
+            max(options["sizes"]), options["accounts"], options["comments_per_book"]
+        )
+        try:
+            for size in sorted(options["sizes"]):
+                started = time.perf_counter()
+                seeder.grow(size)
+                write(f"{size} books seeded in {time.perf_counter() - started:.1f}s")
+                for name, path, params in scenarios(size):
+                    result = measure(handler, path, params, options["requests"])
+                    report["results"].append(
+                        {"books": size, "scenario": name, **result}
+                    )
+                    write(
+                        f"  {name:<17} p50 {result['p50_ms']:7.2f} ms"
+                        f"  p95 {result['p95_ms']:7.2f} ms"
+                        f"  p99 {result['p99_ms']:7.2f} ms"
+                        f"  {result['queries_per_request']:4.1f} queries"
+                        f"  {result['peak_alloc_kb']:8.1f} KiB"
+                    )
+        finally:
+            if not options["keep"]:
+                seeder.clear()
+
+    # ru_maxrss is in KiB on Linux
+    report["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if options["output"]:
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        write(f"Results written to {options['output']}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    setup()
+    run(vars(args))
+
+
+if __name__ == "__main__":
+    main()
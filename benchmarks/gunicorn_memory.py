@@ -0,0 +1,138 @@
+"""
+Memory per gunicorn worker: default settings vs the gunicorn.conf.py profiles.
+
+Starts gunicorn three times with ``--workers`` workers each: with gunicorn's
+defaults (sync workers, every worker importing the app itself) and with
+``gunicorn.conf.py`` as ``sync`` and as ``gthread``. Each server gets
+``--requests`` requests spread over the catalog endpoints, then the
+master's and workers' memory is read from ``/proc/<pid>/smaps_rollup``:
+
+- RSS counts shared pages in full for every process;
+- PSS splits shared pages between the processes sharing them, so the PSS
+  of all processes adds up to what the server really uses;
+- USS (private pages) is what each extra worker costs.
+
+Linux only. Uses the database of ``DJANGO_SETTINGS_MODULE``, which must
+allow ``localhost``:
+
+    python -m benchmarks.gunicorn_memory --workers 4 --requests 500
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+PATHS = ["/api/health/", "/api/books/", "/api/books/?search=book", "/api/categories/"]
+
+PROFILES = [
+    ("defaults", ["-c", os.devnull], {}),
+    ("conf sync", ["-c", "gunicorn.conf.py"], {"GUNICORN_WORKER_CLASS": "sync"}),
+    ("conf gthread", ["-c", "gunicorn.conf.py"], {"GUNICORN_WORKER_CLASS": "gthread"}),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def memory(pid):
+    """``{"rss", "pss", "uss"}`` of ``pid`` in KiB."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                fields[name] = int(value.split()[0])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def wait_until_up(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"gunicorn did not answer {url} within {timeout}s")
+
+
+def measure(options, env, workers, requests):
+    port = free_port()
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "config.wsgi",
+        *options,
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(workers),
+        "--access-logfile",
+        os.devnull,
+    ]
+    process = subprocess.Popen(
+        command,
+        env={**os.environ, **env, "GUNICORN_MAX_REQUESTS": "0"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base = f"http://localhost:{port}"
+    try:
+        wait_until_up(base + PATHS[0], process)
+        for i in range(requests):
+            urllib.request.urlopen(base + PATHS[i % len(PATHS)], timeout=30).read()
+        master = memory(process.pid)
+        worker_memory = [memory(pid) for pid in children(process.pid)]
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return master, worker_memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.development")
+    print(f"{args.workers} workers, {args.requests} requests, KiB per process")
+    print(
+        f"{'':<13} {'master RSS':>10} {'worker RSS':>10} {'worker PSS':>10} "
+        f"{'worker USS':>10} {'total PSS':>10}"
+    )
+    for label, options, env in PROFILES:
+        master, workers = measure(options, env, args.workers, args.requests)
+        count = len(workers)
+        average = {
+            key: sum(worker[key] for worker in workers) // count
+            for key in ("rss", "pss", "uss")
+        }
+        total = master["pss"] + sum(worker["pss"] for worker in workers)
+        print(
+            f"{label:<13} {master['rss']:>10} {average['rss']:>10} "
+            f"{average['pss']:>10} {average['uss']:>10} {total:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
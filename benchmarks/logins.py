@@ -0,0 +1,119 @@
+"""
+Logins per second: sync LoginView (WSGI, threads) vs AsyncLoginView (ASGI).
+
+Both runs go through the full middleware stack with Django's test clients
+and keep ``--concurrency`` logins in flight: the sync run with that many
+threads, as a gthread worker would, and the async run with that many
+tasks on one event loop, hashing in the bounded ``hashing`` pool.
+
+    python -m benchmarks.logins --logins 200 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.urls import path
+
+from benchmarks import setup
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "BenchPass123"
+
+# Filled in by main(); this module is the URLconf during the run
+urlpatterns = []
+
+
+def _urlpatterns():
+    from apps.accounts.async_views import AsyncLoginView
+    from apps.accounts.views import LoginView
+
+    return [
+        path("sync/login/", LoginView.as_view()),
+        path("async/login/", AsyncLoginView.as_view()),
+    ]
+
+
+def run_sync(logins, concurrency):
+    from django.test import Client
+
+    def login(_):
+        response = Client().post(
+            "/sync/login/",
+            {"email": EMAIL, "password": PASSWORD},
+            content_type="application/json",
+        )
+        assert response.status_code == 200, response.content
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(login, range(logins)))
+
+
+async def run_async(logins, concurrency):
+    from django.test import AsyncClient
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            response = await AsyncClient().post(
+                "/async/login/",
+                {"email": EMAIL, "password": PASSWORD},
+                content_type="application/json",
+            )
+            assert response.status_code == 200, response.content
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    setup()
+    from django.test.utils import override_settings
+    from apps.accounts.models import Account
+
+    global urlpatterns
+    urlpatterns = _urlpatterns()
+
+    Account.objects.filter(email=EMAIL).delete()
+    account = Account.objects.create_user(
+        email=EMAIL,
+        password=PASSWORD,
+        full_name="Benchmark",
+        phone="+10000000000",
+        birthday="1990-01-01",
+    )
+    account.is_active = True
+    account.save(update_fields=["is_active"])
+
+    cores = os.cpu_count() or 1
+    runs = [
+        ("sync", lambda: run_sync(args.logins, args.concurrency)),
+        ("async", lambda: asyncio.run(run_async(args.logins, args.concurrency))),
+    ]
+    try:
+        with override_settings(
+            ROOT_URLCONF=__name__,
+            ALLOWED_HOSTS=["testserver"],
+            TOKEN_BUCKET_THROTTLES={},
+        ):
+            for label, run in runs:
+                started = time.perf_counter()
+                run()
+                rate = args.logins / (time.perf_counter() - started)
+                print(
+                    f"{label:>5}: {rate:7.1f} logins/s  {rate / cores:6.2f} per core "
+                    f"({args.logins} logins, concurrency {args.concurrency})"
+                )
+    finally:
+        account.delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Activation-email throughput: one SMTP session per message vs batched dispatch.
+
+Runs a local SMTP sink and sends ``--messages`` activation emails twice:
+the old way (``render_to_string`` twice and ``EmailMessage.send()`` per
+message, i.e. a new connection each time) and through the batched path
+(cached templates, ``deliver`` over one connection, ``MAIL_BATCH_SIZE`` per
+batch). ``--connect-delay`` adds latency to each new session, as a remote
+relay with TLS would.
+
+    python -m benchmarks.mail --messages 500 --connect-delay 0.02
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+
+from benchmarks import setup
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server that accepts and discards every message."""
+
+    connect_delay = 0.0
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        time.sleep(self.connect_delay)
+        self.reply("220 sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250-sink")
+                self.reply("250 8BITMIME")
+            elif command == "DATA":
+                self.reply("354 end with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.received += 1
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class Sink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    received = 0
+
+
+def send_unbatched(users, link):
+    from django.conf import settings
+    from django.core.mail import EmailMultiAlternatives
+    from django.template.loader import render_to_string
+
+    for user in users:
+        context = {"user": user, "activation_link": link}
+        email = EmailMultiAlternatives(
+            subject="Activate Your Bookstore Account",
+            body=render_to_string("accounts/emails/activation_email.txt", context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email],
+        )
+        email.attach_alternative(
+            render_to_string("accounts/emails/activation_email.html", context),
+            "text/html",
+        )
+        email.send()
+
+
+def send_batched(users, link):
+    from django.conf import settings
+    from django.core.mail import get_connection
+    from apps.core.mail import deliver, deserialize, render_message, serialize
+
+    # Messages go through the same serialization as the Redis queue
+    queued = [
+        serialize(
+            render_message(
+                "accounts/emails/activation_email",
+                {"user": user, "activation_link": link},
+                subject="Activate Your Bookstore Account",
+                to=[user.email],
+            )
+        )
+        for user in users
+    ]
+    connection = get_connection()
+    connection.open()
+    try:
+        for start in range(0, len(queued), settings.MAIL_BATCH_SIZE):
+            stop = start + settings.MAIL_BATCH_SIZE
+            batch = [deserialize(raw) for raw in queued[start:stop]]
+            sent, error = deliver(batch, connection)
+            if error:
+                raise error
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--connect-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    setup()
+    from types import SimpleNamespace
+    from django.test.utils import override_settings
+
+    SinkHandler.connect_delay = args.connect_delay
+    sink = Sink(("127.0.0.1", 0), SinkHandler)
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+
+    users = [
+        SimpleNamespace(email=f"user{i}@example.com", full_name=f"User {i}")
+        for i in range(args.messages)
+    ]
+    link = "https://example.com/activate/MQ/abc123"
+
+    with override_settings(
+        EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+        EMAIL_HOST="127.0.0.1",
+        EMAIL_PORT=sink.server_address[1],
+        EMAIL_USE_TLS=False,
+        EMAIL_HOST_USER="",
+        EMAIL_HOST_PASSWORD="",
+    ):
+        for label, send in [("unbatched", send_unbatched), ("batched", send_batched)]:
+            before = sink.received
+            started = time.perf_counter()
+            send(users, link)
+            elapsed = time.perf_counter() - started
+            assert sink.received - before == args.messages
+            print(f"{label:>9}: {args.messages / elapsed:8.1f} messages/s")
+
+    sink.shutdown()
+
+
+if __name__ == "__main__":
+    main()
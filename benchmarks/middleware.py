@@ -0,0 +1,105 @@
+"""
+Per-request cost of the middleware stack on API routes.
+
+Sends ``--requests`` GETs of ``/api/health/`` and ``/api/books/`` straight
+into a ``WSGIHandler`` with the old flat ``MIDDLEWARE`` (sessions, CSRF,
+auth and messages on every request) and with the current one, where
+``BrowserMiddleware`` skips them for ``/api/``. Stacks alternate over
+``--rounds`` and the fastest round of each is reported.
+
+    python -m benchmarks.middleware --requests 200 --rounds 30 --books 20
+
+The saving is a fixed cost per request, so it shows clearly on the health
+check; on the book list it is smaller than the run-to-run noise of the
+query and serialization work.
+"""
+
+import argparse
+import time
+
+from benchmarks import setup
+
+FLAT_MIDDLEWARE = [
+    "corsheaders.middleware.CorsMiddleware",
+    "apps.core.middleware.CamelCaseQueryMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+
+def time_requests(handler, path, requests):
+    from django.test import RequestFactory
+
+    environ = RequestFactory()._base_environ(PATH_INFO=path, REQUEST_METHOD="GET")
+    statuses = []
+
+    def start_response(status, headers):
+        statuses.append(status)
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = handler(dict(environ), start_response)
+        b"".join(response)
+        response.close()
+    elapsed = time.perf_counter() - started
+    assert set(statuses) == {"200 OK"}, set(statuses)
+    return elapsed / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--books", type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.test.utils import override_settings
+    from apps.books.models import Book
+    from apps.categories.models import Category
+
+    category = Category.objects.create(name="Middleware benchmark")
+    Book.objects.bulk_create(
+        Book(
+            title=f"Book {i}",
+            author_name="Benchmark",
+            unit_price=10,
+            category=category,
+        )
+        for i in range(args.books)
+    )
+
+    stacks = [("flat", FLAT_MIDDLEWARE), ("scoped", settings.MIDDLEWARE)]
+    try:
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            handlers = {}
+            for label, middleware in stacks:
+                with override_settings(MIDDLEWARE=middleware):
+                    handlers[label] = WSGIHandler()
+
+            for path in ["/api/health/", "/api/books/"]:
+                results = {label: float("inf") for label in handlers}
+                for _ in range(args.rounds):
+                    for label, handler in handlers.items():
+                        elapsed = time_requests(handler, path, args.requests)
+                        results[label] = min(results[label], elapsed)
+                saved = results["flat"] - results["scoped"]
+                print(
+                    f"{path:<14} flat {results['flat'] * 1e6:8.1f} us"
+                    f"   scoped {results['scoped'] * 1e6:8.1f} us"
+                    f"   saved {saved * 1e6:7.1f} us ({saved / results['flat']:.0%})"
+                )
+    finally:
+        Book.objects.filter(category=category).delete()
+        category.delete()
+
+
+if __name__ == "__main__":
+    main()
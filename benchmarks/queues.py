@@ -0,0 +1,121 @@
+"""
+Email latency while a bulk job runs: one shared queue vs dedicated queues.
+
+Runs in-process thread-pool workers with the same total concurrency in
+both setups: one worker on a single queue, or an email worker and a
+maintenance worker routed by ``CELERY_TASK_ROUTES``. A bulk job of
+``--bulk`` maintenance tasks is queued first, then ``--emails`` emails one
+every ``--interval`` seconds; each email records how long it waited from
+publish to start. The tasks only sleep, so the numbers show queueing.
+
+    python -m benchmarks.queues --bulk 40 --bulk-seconds 0.1
+    python -m benchmarks.queues --broker redis://localhost:6379/15
+
+The default in-memory broker has no event loop: a worker whose prefetch
+window is full only takes new messages every couple of seconds, which
+inflates the shared-queue wait. A local Redis gives realistic absolutes;
+the dedicated email queue stays flat on either.
+"""
+
+import argparse
+import statistics
+import time
+from contextlib import ExitStack
+
+from benchmarks import setup
+
+# Named so that the real CELERY_TASK_ROUTES patterns route them
+EMAIL_TASK = "apps.accounts.tasks.send_benchmark_email"
+BULK_TASK = "apps.books.tasks.benchmark_bulk_step"
+
+
+def make_app(broker, routes, bulk_seconds, latencies):
+    from celery import Celery
+
+    app = Celery("benchmark", broker=broker, backend="cache+memory://")
+    app.conf.update(
+        task_default_queue="default",
+        task_routes=routes,
+        worker_prefetch_multiplier=1,
+        task_acks_late=True,
+        worker_hijack_root_logger=False,
+        # The memory transport polls; the default 1 s would dominate latency
+        broker_transport_options={"polling_interval": 0.005},
+    )
+
+    @app.task(name=EMAIL_TASK, ignore_result=True)
+    def send_email(published_at):
+        latencies.append(time.perf_counter() - published_at)
+        time.sleep(0.005)
+
+    @app.task(name=BULK_TASK, ignore_result=True)
+    def bulk_step():
+        time.sleep(bulk_seconds)
+
+    return app
+
+
+def run(label, routes, profiles, args):
+    from celery.contrib.testing.worker import start_worker
+
+    latencies = []
+    app = make_app(args.broker, routes, args.bulk_seconds, latencies)
+    with ExitStack() as workers:
+        for queues, concurrency in profiles:
+            workers.enter_context(
+                start_worker(
+                    app,
+                    pool="threads",
+                    concurrency=concurrency,
+                    queues=queues,
+                    perform_ping_check=False,
+                )
+            )
+
+        for _ in range(args.bulk):
+            app.send_task(BULK_TASK)
+        for _ in range(args.emails):
+            app.send_task(EMAIL_TASK, args=[time.perf_counter()])
+            time.sleep(args.interval)
+
+        deadline = time.monotonic() + args.timeout
+        while len(latencies) < args.emails and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    if len(latencies) < args.emails:
+        print(f"{label:>10}: only {len(latencies)} of {args.emails} emails ran")
+        return
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:>10}: email wait p50 {statistics.median(latencies) * 1000:8.1f} ms"
+        f"   p95 {p95 * 1000:8.1f} ms   max {latencies[-1] * 1000:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bulk", type=int, default=200)
+    parser.add_argument("--bulk-seconds", type=float, default=0.1)
+    parser.add_argument("--emails", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--broker", default="memory://")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+
+    half = max(args.concurrency // 2, 1)
+    run("shared", {}, [(["default"], args.concurrency)], args)
+    run(
+        "dedicated",
+        settings.CELERY_TASK_ROUTES,
+        [(["email", "default"], half), (["maintenance"], half)],
+        args,
+    )
+
+
+if __name__ == "__main__":
+    main()
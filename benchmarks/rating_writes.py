@@ -0,0 +1,138 @@
+"""
+Review-write throughput on a single hot book, with and without sharded counters.
+
+Every thread writes reviews for the same book from its own accounts, so the
+unsharded run serializes on the ``books`` row lock while the sharded run
+spreads the writes across ``BOOK_RATING_SHARDS`` counter rows.
+
+    python -m benchmarks.rating_writes --threads 16 --reviews 200 --shards 16
+
+Use PostgreSQL: SQLite serializes all writers regardless of the mode.
+"""
+
+import argparse
+import threading
+import time
+
+from benchmarks import setup
+
+
+def run(mode_shards, accounts, category, threads):
+    from django.db import connection
+    from django.db.models import Count, Sum
+    from django.db.models.functions import Coalesce
+    from django.test.utils import override_settings
+    from apps.books.counters import fold_rating_shards, live_rating_totals
+    from apps.books.models import Book
+    from apps.comments.models import Comment
+
+    book = Book.objects.create(
+        title="Hot launch", author_name="Benchmark", unit_price=10, category=category
+    )
+    chunks = [accounts[i::threads] for i in range(threads)]
+    errors = []
+
+    def writer(chunk):
+        try:
+            for index, account in enumerate(chunk):
+                Comment(account=account, book=book, rating=index % 5 + 1).save()
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+        finally:
+            connection.close()
+
+    with override_settings(BOOK_RATING_SHARDS=mode_shards):
+        workers = [threading.Thread(target=writer, args=(c,)) for c in chunks]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        book.refresh_from_db()
+        live = live_rating_totals(book)
+        if mode_shards:
+            fold_rating_shards()
+
+    book.refresh_from_db()
+    folded = (book.total_rating_value, book.total_rating_count)
+    written = Comment.objects.filter(book=book).aggregate(
+        value=Coalesce(Sum("rating"), 0), count=Count("pk")
+    )
+    # A lost update can keep the count right and drop rating values, so both
+    # totals are compared, before and after folding
+    expected = (written["value"], written["count"])
+    return {
+        "shards": mode_shards,
+        "reviews": len(accounts),
+        "seconds": elapsed,
+        "reviews_per_second": len(accounts) / elapsed,
+        "consistent": live == expected and folded == expected and not errors,
+        "errors": len(errors),
+        "book": book,
+    }
+
+
+def cleanup(category, books, accounts):
+    from django.db import connection
+    from apps.comments.models import Comment
+
+    book_ids = [book.pk for book in books]
+    with connection.cursor() as cursor:
+        # Raw delete skips the per-comment rating signals
+        cursor.execute(
+            f"DELETE FROM {Comment._meta.db_table} WHERE book_id IN "
+            f"({', '.join(['%s'] * len(book_ids))})",
+            book_ids,
+        )
+    for book in books:
+        book.delete()
+    category.delete()
+    type(accounts[0]).objects.filter(pk__in=[a.pk for a in accounts]).delete()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--reviews", type=int, default=100, help="Reviews per thread")
+    parser.add_argument("--shards", type=int, default=16)
+    args = parser.parse_args()
+
+    setup()
+
+    from django.contrib.auth.hashers import make_password
+    from apps.accounts.models import Account
+    from apps.categories.models import Category
+
+    category = Category.objects.create(name=f"benchmark-{time.time_ns()}")
+    password = make_password("benchmark")
+    accounts = []
+    results = []
+    try:
+        for run_index, shards in enumerate((0, args.shards)):
+            batch = Account.objects.bulk_create(
+                Account(
+                    email=f"bench-{run_index}-{i}-{time.time_ns()}@example.com",
+                    full_name="Benchmark",
+                    password=password,
+                    is_active=True,
+                )
+                for i in range(args.threads * args.reviews)
+            )
+            accounts.extend(batch)
+            results.append(run(shards, batch, category, args.threads))
+    finally:
+        cleanup(category, [r["book"] for r in results], accounts)
+
+    print(f"{'mode':<18}{'reviews':>10}{'seconds':>10}{'reviews/s':>12}{'ok':>6}")
+    for result in results:
+        mode = f"{result['shards']} shards" if result["shards"] else "single row"
+        print(
+            f"{mode:<18}{result['reviews']:>10}{result['seconds']:>10.2f}"
+            f"{result['reviews_per_second']:>12.1f}{str(result['consistent']):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
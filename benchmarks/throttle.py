@@ -0,0 +1,76 @@
+"""
+Per-request overhead of the token-bucket throttle on the auth endpoints.
+
+Times ``TokenBucketThrottle.allow_request`` for the login scope (per-IP,
+per-email and global buckets) against Redis when ``REDIS_URL`` is set and
+against the in-process fallback, and reports the mean and p99 per call.
+
+    python -m benchmarks.throttle --requests 5000
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks import setup
+
+
+def measure(throttle, requests, view):
+    samples = []
+    for request in requests:
+        started = time.perf_counter()
+        throttle.allow_request(request, view)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    setup()
+    from unittest.mock import patch
+    from django.test.utils import override_settings
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from apps.accounts.views import LoginView
+    from apps.core.redis import get_redis_client
+    from apps.core.throttling import TokenBucketThrottle
+
+    factory = APIRequestFactory()
+    view = LoginView()
+    requests = []
+    for i in range(args.requests):
+        request = Request(
+            factory.post(
+                "/api/accounts/login/",
+                {"email": f"user{i % 500}@example.com", "password": "x"},
+                format="json",
+                REMOTE_ADDR=f"10.0.{i % 200}.{i % 250}",
+            ),
+            parsers=view.get_parsers(),
+        )
+        request.data  # parse up front so only the throttle is timed
+        requests.append(request)
+
+    # Generous rates so every call takes the full allow path
+    rates = {"login": {"ip": "10000/s", "email": "10000/s", "global": "100000/s"}}
+    modes = [("in-process", None)]
+    if get_redis_client() is not None:
+        modes.insert(0, ("redis", get_redis_client()))
+
+    with override_settings(TOKEN_BUCKET_THROTTLES=rates):
+        for label, client in modes:
+            with patch("apps.core.throttling.get_redis_client", return_value=client):
+                measure(TokenBucketThrottle(), requests[:100], view)  # warm up
+                mean, p99 = measure(TokenBucketThrottle(), requests, view)
+            print(
+                f"{label:>10}: mean {mean * 1e6:7.1f} us  p99 {p99 * 1e6:7.1f} us  "
+                f"over {len(requests)} requests"
+            )
+
+
+if __name__ == "__main__":
+    main()
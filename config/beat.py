@@ -0,0 +1,44 @@
+"""
+Periodic tasks for ``celery beat``.
+
+Intervals are read from the settings when the Celery app is configured;
+``CELERY_TASK_ROUTES`` decides which queue, and so which worker profile,
+runs each of them.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+
+from .celery import app
+
+
+def beat_schedule():
+    return {
+        "refresh-book-rating-prior": (
+            "apps.books.tasks.refresh_rating_prior",
+            timedelta(hours=1),
+        ),
+        "fold-book-rating-shards": (
+            "apps.books.tasks.fold_rating_shards",
+            timedelta(minutes=1),
+        ),
+        "relay-outbox": (
+            "apps.core.tasks.relay_outbox",
+            timedelta(seconds=settings.OUTBOX_RELAY_INTERVAL),
+        ),
+        "dispatch-mail": (
+            "apps.core.tasks.dispatch_mail",
+            timedelta(seconds=settings.MAIL_DISPATCH_INTERVAL),
+        ),
+        "flush-last-logins": (
+            "apps.accounts.tasks.flush_last_logins",
+            timedelta(seconds=settings.LAST_LOGIN_FLUSH_INTERVAL),
+        ),
+    }
+
+
+@app.on_after_configure.connect
+def add_periodic_tasks(sender, **kwargs):
+    for name, (task, every) in beat_schedule().items():
+        sender.add_periodic_task(every, sender.signature(task), name=name)
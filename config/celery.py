@@ -9,3 +9,6 @@ app = Celery("bookstore")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
 app.autodiscover_tasks()
+
+# Registers the periodic tasks once the app is configured
+from . import beat  # noqa: E402, F401
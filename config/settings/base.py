@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
@@ -51,16 +53,117 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "apps.core.middleware.ProfilingMiddleware",
+    "apps.core.middleware.MetricsMiddleware",
+    "apps.core.middleware.ServerTimingMiddleware",
+    "apps.core.middleware.QueryInspectionMiddleware",
+    "apps.core.middleware.SlowQueryMiddleware",
     "corsheaders.middleware.CorsMiddleware",
-    "djangorestframework_camel_case.middleware.CamelCaseMiddleWare",
+    "apps.core.middleware.CamelCaseQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "apps.core.middleware.BrowserMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+# Run by BrowserMiddleware for everything outside API_PATH_PREFIXES (the
+# admin); API calls authenticate with JWTs and need none of it
+BROWSER_MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
+API_PATH_PREFIXES = ["/api/"]
+
+# Per-request timing (apps.core.timing): a JSON log line for SAMPLE_RATE of
+# requests, with a Server-Timing header for staff users (everyone if PUBLIC).
+# Off by default; when disabled the middleware is not loaded
+SERVER_TIMING = {
+    "ENABLED": config("SERVER_TIMING", default=False, cast=bool),
+    "SAMPLE_RATE": config("SERVER_TIMING_SAMPLE_RATE", default=0.01, cast=float),
+    "PUBLIC": config("SERVER_TIMING_PUBLIC", default=False, cast=bool),
+}
+
+# Prometheus metrics at /api/metrics/ (apps.core.metrics). Each process writes
+# its own file in DIR and scrapes add them all up, so DIR must be shared by
+# every worker on the host and emptied when the server starts. Scrapers must
+# send TOKEN as a bearer token; without one the endpoint only answers when
+# DEBUG is on. QUEUES are the Celery queues whose length is read from the
+# broker, at most once per QUEUE_CACHE_SECONDS per process.
+METRICS = {
+    "ENABLED": config("METRICS", default=True, cast=bool),
+    "DIR": config(
+        "PROMETHEUS_MULTIPROC_DIR",
+        default=os.path.join(tempfile.gettempdir(), "bookstore-metrics"),
+    ),
+    "TOKEN": config("METRICS_TOKEN", default=""),
+    "QUEUES": ["email", "default", "maintenance"],
+    "QUEUE_CACHE_SECONDS": config(
+        "METRICS_QUEUE_CACHE_SECONDS", default=15.0, cast=float
+    ),
+}
+
+# /api/health/ready/ (apps.core.health): every probe must answer within
+# TIMEOUT seconds, and a worker reuses its last report for CACHE_SECONDS so
+# load balancer polling does not multiply the probes
+HEALTH_CHECK = {
+    "TIMEOUT": config("HEALTH_CHECK_TIMEOUT", default=1.0, cast=float),
+    "CACHE_SECONDS": config("HEALTH_CHECK_CACHE_SECONDS", default=2.0, cast=float),
+}
+
+# Slow statements (apps.core.slow_queries): logged with their view above
+# THRESHOLD_MS and aggregated by fingerprint off the request path, with an
+# EXPLAIN captured for EXPLAIN_SAMPLE_RATE of them. A request sends them in
+# one task, with at most MAX_PER_REQUEST statements. See slow_query_report
+SLOW_QUERIES = {
+    "ENABLED": config("SLOW_QUERIES", default=True, cast=bool),
+    "THRESHOLD_MS": config("SLOW_QUERY_THRESHOLD_MS", default=200, cast=float),
+    "EXPLAIN_SAMPLE_RATE": config(
+        "SLOW_QUERY_EXPLAIN_SAMPLE_RATE", default=0.1, cast=float
+    ),
+    "MAX_PER_REQUEST": 20,
+}
+
+# On-demand profiling (apps.core.profiling): an admin gets a token from
+# /api/profiles/token/ valid for TOKEN_MAX_AGE seconds and sends it as the
+# X-Profile header; the request's cProfile and tracemalloc results go to DIR.
+# DIR is per host unless it is on a shared volume, and only the newest KEEP
+# profiles younger than MAX_AGE seconds are kept
+PROFILING = {
+    "ENABLED": config("PROFILING", default=True, cast=bool),
+    "DIR": config(
+        "PROFILING_DIR",
+        default=os.path.join(tempfile.gettempdir(), "bookstore-profiles"),
+    ),
+    "TOKEN_MAX_AGE": 3600,
+    "TRACEMALLOC_FRAMES": 10,
+    "TOP": 40,
+    "KEEP": config("PROFILING_KEEP", default=50, cast=int),
+    "MAX_AGE": config("PROFILING_MAX_AGE", default=7 * 24 * 3600, cast=int),
+}
+
+# N+1 detection (apps.core.queries): a query shape repeated REPEAT_THRESHOLD
+# times in one request is logged, or raised with RAISE. On in development and
+# tests only
+QUERY_INSPECTION = {"ENABLED": False, "REPEAT_THRESHOLD": 3, "RAISE": False}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "apps.core.timing": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+# The admin checks look for its middleware in MIDDLEWARE only; it is in
+# BROWSER_MIDDLEWARE instead
+SILENCED_SYSTEM_CHECKS = ["admin.E408", "admin.E409", "admin.E410"]
 
 ROOT_URLCONF = "config.urls"
 
@@ -144,10 +247,106 @@ REST_FRAMEWORK = {
         "djangorestframework_camel_case.parser.CamelCaseJSONParser",
     ),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.accounts.authentication.CachedJWTAuthentication",
     ),
+    # Proxies in front of the app that append to X-Forwarded-For; throttles
+    # key on the address the nearest one saw, not on what the client sent
+    "NUM_PROXIES": config("NUM_PROXIES", default=0, cast=int),
 }
 
+# last_login writes are buffered in Redis and flushed in batches; this bounds
+# how stale the column can be. The buffer expires after LAST_LOGIN_BUFFER_TTL
+# seconds without logins, so it can't outlive a flush task that stopped
+LAST_LOGIN_FLUSH_INTERVAL = config("LAST_LOGIN_FLUSH_INTERVAL", default=10, cast=int)
+LAST_LOGIN_FLUSH_BATCH_SIZE = 1000
+LAST_LOGIN_BUFFER_TTL = config("LAST_LOGIN_BUFFER_TTL", default=86400, cast=int)
+
+# Seconds an authenticated Account stays cached between JWT requests
+AUTH_USER_CACHE_TIMEOUT = 30
+
+# Revoked refresh tokens: Redis keys with an in-process Bloom filter in front
+TOKEN_BLACKLIST = {
+    "BLOOM_CAPACITY": 100_000,
+    "BLOOM_ERROR_RATE": 0.001,
+    # Rebuild the Bloom filter from Redis so expired tokens stop matching
+    "BLOOM_REBUILD_INTERVAL": 3600,
+}
+
+# Token buckets per view ``throttle_scope``: "<burst>/<refill period>" for each
+# of the per-IP, per-email and global buckets; omit a key to skip that bucket
+TOKEN_BUCKET_THROTTLES = {
+    "signup": {"ip": "10/hour", "global": "300/min"},
+    "login": {"ip": "30/min", "email": "10/min", "global": "1200/min"},
+    "google_signin": {"ip": "30/min", "global": "1200/min"},
+    "password_reset": {"ip": "5/hour", "email": "3/hour", "global": "120/min"},
+}
+
+
+# Tasks recorded in the transactional outbox (apps.core.outbox) are published
+# by a beat task; failed publishes back off exponentially up to the maximum
+OUTBOX_RELAY_INTERVAL = 2
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_BACKOFF = 300
+
+# Outgoing mail is queued in Redis and sent in batches over one SMTP session
+# (apps.core.mail); the periodic dispatch picks up anything left behind
+MAIL_BATCH_SIZE = 50
+MAIL_DISPATCH_INTERVAL = 30
+MAIL_DISPATCH_LOCK_TIMEOUT = 60
+# After a failed dispatch, inline sends pause for MAIL_BACKOFF seconds,
+# doubling (with jitter) per consecutive failure up to the maximum
+MAIL_BACKOFF = 5
+MAIL_BACKOFF_MAX = 300
+# Email tasks retry transient failures with exponential backoff and jitter,
+# then land in the dead-letter table (see the replay_dead_letters command);
+# a rendered message is queued at most once within MAIL_IDEMPOTENCY_TTL
+MAIL_TASK_MAX_RETRIES = 8
+MAIL_TASK_RETRY_BACKOFF = 2
+MAIL_TASK_RETRY_BACKOFF_MAX = 600
+MAIL_IDEMPOTENCY_TTL = 60 * 60 * 24
+
+# Async auth views (apps.accounts.async_views) for ASGI deployments, and the
+# bounded thread pools they hand blocking work to
+ASYNC_AUTH_VIEWS = config("ASYNC_AUTH_VIEWS", default=False, cast=bool)
+ASYNC_EXECUTORS = {
+    "hashing": config("ASYNC_HASHING_THREADS", default=os.cpu_count() or 1, cast=int),
+    "io": config("ASYNC_IO_THREADS", default=32, cast=int),
+}
+
+# Outbound HTTP clients (apps.core.http) per provider; see DEFAULTS there
+OUTBOUND_HTTP = {
+    "recaptcha": {"deadline": 2.0, "failure_threshold": 5, "reset_timeout": 30.0},
+    "google": {"deadline": 3.0, "failure_threshold": 3, "reset_timeout": 30.0},
+}
+
+
+# Redis used by the app itself (token blacklist, counters); empty disables it
+REDIS_URL = config("REDIS_URL", default="redis://localhost:6379/0")
+REDIS_SOCKET_TIMEOUT = 0.5
+# Pub/sub subscribers wait indefinitely and ping this often instead
+REDIS_HEALTH_CHECK_INTERVAL = 30
+
+# Shared across gunicorn workers so cached users and counters agree everywhere
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "apps.core.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "bookstore",
+            "OPTIONS": {
+                "socket_timeout": REDIS_SOCKET_TIMEOUT,
+                "socket_connect_timeout": REDIS_SOCKET_TIMEOUT,
+                **(
+                    {"ssl_cert_reqs": ssl.CERT_NONE}
+                    if REDIS_URL.startswith("rediss://")
+                    else {}
+                ),
+            },
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "apps.core.cache.LocMemCache"}}
+
 
 # Celery configuration for development
 CELERY_BROKER_URL = config("REDIS_URL", default="redis://localhost:6379/0")
@@ -158,6 +357,26 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+# Work is split by queue so bulk jobs never delay account emails:
+# - email: the account email tasks and mail dispatch (short, latency-sensitive)
+# - default: frequent housekeeping (outbox relay, last_login flush)
+# - maintenance: heavy periodic and batch jobs (rating refresh, exports, ...)
+# Each worker profile in the Procfile consumes its own queues. Periodic tasks
+# are scheduled in config/beat.py.
+CELERY_TASK_DEFAULT_QUEUE = "default"
+CELERY_TASK_ROUTES = {
+    "apps.accounts.tasks.send_*": {"queue": "email"},
+    "apps.core.tasks.send_mail_message": {"queue": "email"},
+    "apps.core.tasks.dispatch_mail": {"queue": "email"},
+    "apps.books.tasks.*": {"queue": "maintenance"},
+    "apps.core.tasks.record_slow_queries": {"queue": "maintenance"},
+}
+# Workers reserve one message per process; long maintenance tasks would
+# otherwise sit prefetched behind each other. Email workers raise it with
+# --prefetch-multiplier. Tasks with acks_late are redelivered after a crash,
+# so the visibility timeout must exceed the longest of them.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_BROKER_TRANSPORT_OPTIONS = {"visibility_timeout": 60 * 60}
 
 
 # Frontend domain
@@ -165,6 +384,10 @@ FRONTEND_DOMAIN = config("FRONTEND_DOMAIN", default="http://localhost:5173/")
 
 # Google OAuth Configuration
 GOOGLE_CLIENT_ID = config("GOOGLE_CLIENT_ID", default="")
+# Google's signing certs are cached for the max-age they are served with
+# (or the default below) and refreshed in the background before expiry
+GOOGLE_CERTS_DEFAULT_MAX_AGE = 300
+GOOGLE_CERTS_REFRESH_MARGIN = 300
 
 
 # reCAPTCHA Settings
@@ -172,13 +395,29 @@ RECAPTCHA_SITE_KEY = config("SITE_KEY", default="")
 RECAPTCHA_SECRET_KEY = config("SECRET_KEY", default="")
 
 
+# Book ranking
+# rating_score = (weight * prior_mean + sum of ratings) / (weight + number of ratings)
+BOOK_RATING_PRIOR_WEIGHT = config("BOOK_RATING_PRIOR_WEIGHT", default=10, cast=int)
+BOOK_RATING_PRIOR_DEFAULT_MEAN = 3.0
+# Seconds each process reuses the loaded prior row
+BOOK_RATING_PRIOR_CACHE_SECONDS = 60
+# Rescore every book only when the refreshed prior mean moves at least this much
+BOOK_RATING_PRIOR_RESCORE_THRESHOLD = 0.01
+BOOK_RATING_RESCORE_BATCH_SIZE = 1000
+# Number of counter rows per book for review writes; 0 updates the book row directly
+BOOK_RATING_SHARDS = config("BOOK_RATING_SHARDS", default=0, cast=int)
+# Rows removed per DELETE ... RETURNING statement by the bulk deletion service
+COMMENT_DELETE_CHUNK_SIZE = 5000
+
+
 # JWT Settings
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
-    "UPDATE_LAST_LOGIN": True,
+    # Logins record last_login through apps.accounts.last_login instead
+    "UPDATE_LAST_LOGIN": False,
     "ALGORITHM": "HS256",
     "SIGNING_KEY": config("SECRET_KEY", default="your-secret-key"),
     "VERIFYING_KEY": None,
@@ -22,6 +22,9 @@ DATABASES = {
     }
 }
 
+QUERY_INSPECTION = {**QUERY_INSPECTION, "ENABLED": True}
+SERVER_TIMING = {"ENABLED": True, "SAMPLE_RATE": 1.0, "PUBLIC": True}
+
 CORS_ALLOWED_ORIGINS = ["http://localhost:5173", "http://127.0.0.1:5173"]
 CORS_ALLOW_CREDENTIALS = True
 
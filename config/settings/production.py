@@ -21,6 +21,18 @@ DATABASES = {
 }
 
 
+# JSON only: the browsable API renders templates and is not used in production.
+# Requests arrive through the Heroku router, which appends the client address
+# to X-Forwarded-For
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": (
+        "djangorestframework_camel_case.render.CamelCaseJSONRenderer",
+    ),
+    "NUM_PROXIES": config("NUM_PROXIES", default=1, cast=int),
+}
+
+
 # Email configuration
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = config("EMAIL_HOST", default="smtp.gmail.com")
@@ -22,6 +22,17 @@ DATABASES = {
     }
 }
 
+# Tests run without Redis; features backed by it use their in-process fallbacks
+REDIS_URL = ""
+CACHES = {"default": {"BACKEND": "apps.core.cache.LocMemCache"}}
+
+# Fail any test whose request looks like N+1
+QUERY_INSPECTION = {**QUERY_INSPECTION, "ENABLED": True, "RAISE": True}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
 ]
+
+# Keep Celery off Redis too, so tasks can be applied eagerly in tests
+CELERY_BROKER_URL = "memory://"
+CELERY_RESULT_BACKEND = "cache+memory://"
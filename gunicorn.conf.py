@@ -0,0 +1,91 @@
+"""
+Gunicorn settings for the web process, loaded from the project root.
+
+The app is imported once in the master and shared copy-on-write with the
+workers: the garbage collector is kept off while it loads and everything it
+allocated is frozen right before each fork, so collections in the workers
+never touch (and copy) those pages. Workers are recycled after
+``GUNICORN_MAX_REQUESTS`` requests, with jitter so they do not all restart
+at once.
+
+``GUNICORN_WORKER_CLASS`` picks the worker type:
+
+- ``gthread`` (default): ``GUNICORN_THREADS`` threads per process, so a
+  request waiting on Google, SMTP or the database does not idle a whole
+  process. Fewer processes serve the same traffic with less memory.
+- ``sync``: one request per process, for CPU-bound load or to rule out
+  thread-safety issues.
+
+See "Gunicorn" in the README for memory per worker with each profile
+(``python -m benchmarks.gunicorn_memory``).
+"""
+
+import gc
+import glob
+import os
+
+# Gunicorn reads every module-level name as a setting, and ``config`` is
+# one: do not ``from decouple import config`` here
+import decouple
+
+# Keep the collector from running (and dirtying pages) while the app loads;
+# pre_fork turns it back on once the heap is frozen
+gc.disable()
+
+bind = f"0.0.0.0:{decouple.config('PORT', default='8000')}"
+worker_class = decouple.config("GUNICORN_WORKER_CLASS", default="gthread")
+workers = decouple.config("WEB_CONCURRENCY", default=2, cast=int)
+threads = decouple.config(
+    "GUNICORN_THREADS", default=4 if worker_class == "gthread" else 1, cast=int
+)
+preload_app = True
+
+max_requests = decouple.config("GUNICORN_MAX_REQUESTS", default=1000, cast=int)
+max_requests_jitter = decouple.config(
+    "GUNICORN_MAX_REQUESTS_JITTER", default=100, cast=int
+)
+timeout = decouple.config("GUNICORN_TIMEOUT", default=30, cast=int)
+graceful_timeout = 30
+# Behind the Heroku router / a load balancer that reuses connections
+keepalive = 5
+# Heartbeat files on tmpfs: a slow disk must not get workers killed
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    """Drop metrics files left by the previous run's workers."""
+    from django.conf import settings
+
+    for path in glob.glob(os.path.join(settings.METRICS["DIR"], "*.db")):
+        os.remove(path)
+
+
+def child_exit(server, worker):
+    """Fold a dead worker's metrics into one file instead of leaving its own."""
+    from django.conf import settings
+
+    from apps.core import metrics
+
+    if settings.METRICS["ENABLED"]:
+        metrics.mark_process_dead(worker.pid)
+
+
+def pre_fork(server, worker):
+    from django.db import connections
+
+    # A connection opened while loading the app must not be shared by workers
+    connections.close_all()
+    gc.freeze()
+    # The master keeps forking (restarts, max_requests), so it must collect
+    # its own garbage too; frozen objects are never scanned again
+    gc.enable()
+
+
+def post_fork(server, worker):
+    from django.db import connections
+
+    # Start every worker without database connection state from the master
+    connections.close_all()